@@ -1,7 +1,105 @@
+import threading
+import time
 import requests
 
 from flask_restful import current_app
-from typing import List, Tuple
+from typing import Dict, List, Tuple, Optional
+
+from .HTTPSessions import PooledSession, AsyncPooledSession, httpx
+from .ResponseCache import ResponseCache
+from .Singleflight import Singleflight
+from .RateLimiter import RateLimiter, RateLimiterDefaults
+from .CircuitBreaker import CircuitBreaker, CircuitBreakerDefaults
+from .staleness import note_stale_response
+from .instrumentation import instrumented
+from .utils import bind_app_context
+from .exceptions import NotOKTMDB, NotOKQuickchart, TMDBRateLimited, TMDBUnavailable
+
+
+class TMDBCacheDefaults:
+    """A class of constants that specifies the fallback values of the TMDB
+    response cache configuration, used if the app config does not set them."""
+    MAX_ENTRIES: int = 2048
+    MAX_BYTES: int = 16 * 1024 * 1024
+    STALE_TTL: float = 300.0
+    TTL: dict = {
+        "popular": 600.0,
+        "discover": 600.0,
+        "movie": 3600.0,
+        "credits": 86400.0,
+        "genres": 86400.0,
+    }
+
+
+class TMDBRateLimitDefaults:
+    """A class of constants that specifies the fallback values of the TMDB
+    rate limiter configuration, used if the app config does not set them."""
+    RATE: float = RateLimiterDefaults.RATE
+    BURST: int = RateLimiterDefaults.BURST
+    MIN_CONCURRENCY: int = RateLimiterDefaults.MIN_CONCURRENCY
+    MAX_CONCURRENCY: int = RateLimiterDefaults.MAX_CONCURRENCY
+    LATENCY_TARGET: float = RateLimiterDefaults.LATENCY_TARGET
+    MAX_WAIT: float = RateLimiterDefaults.MAX_WAIT
+
+
+class TMDBCircuitBreakerDefaults:
+    """A class of constants that specifies the fallback values of the TMDB
+    circuit breaker configuration, used if the app config does not set them."""
+    FAILURE_RATIO: float = CircuitBreakerDefaults.FAILURE_RATIO
+    WINDOW: int = CircuitBreakerDefaults.WINDOW
+    MIN_CALLS: int = CircuitBreakerDefaults.MIN_CALLS
+    SLOW_CALL: float = CircuitBreakerDefaults.SLOW_CALL
+    OPEN_SECONDS: float = CircuitBreakerDefaults.OPEN_SECONDS
+
+
+class UpstreamDefaults:
+    """A class of constants that specifies the fallback values of the upstream
+    API base urls, used if the app config does not set them."""
+    TMDB_BASE_URL: str = "https://api.themoviedb.org/3"
+    QUICKCHART_BASE_URL: str = "https://quickchart.io"
+
+
+class TMDBUrls:
+    """A class of static methods that construct the urls of the TMDB v3 API
+    endpoints, shared by the synchronous and the async TMDB clients.
+
+    The base url is taken from the ``TMDB_BASE_URL`` app config key, so that
+    the clients can be pointed at a local stand-in of TMDB, e.g. for load tests.
+    """
+    @staticmethod
+    def base() -> str:
+        """The base url of the TMDB v3 API, without a trailing slash"""
+        return current_app.config.get("TMDB_BASE_URL", UpstreamDefaults.TMDB_BASE_URL).rstrip("/")
+    @staticmethod
+    def movie(movie_id: int) -> str:
+        """The url of the ``/movie/{movie_id}`` API"""
+        return f"{TMDBUrls.base()}/movie/{movie_id}?api_key={current_app.config['API_KEY_TMDB']}"
+
+    @staticmethod
+    def movie_with_credits(movie_id: int) -> str:
+        """The url of the ``/movie/{movie_id}`` API, with the credits appended to the response"""
+        return f"{TMDBUrls.base()}/movie/{movie_id}?append_to_response=credits&api_key={current_app.config['API_KEY_TMDB']}"
+
+    @staticmethod
+    def popular_page(page: int) -> str:
+        """The url of the ``/movie/popular`` API"""
+        return f"{TMDBUrls.base()}/movie/popular?page={page}&api_key={current_app.config['API_KEY_TMDB']}"
+
+    @staticmethod
+    def credits(movie_id: int) -> str:
+        """The url of the ``/movie/{movie_id}/credits`` API"""
+        return f"{TMDBUrls.base()}/movie/{movie_id}/credits?api_key={current_app.config['API_KEY_TMDB']}"
+
+    @staticmethod
+    def discover_page(page: int, query_string: str) -> str:
+        """The url of the ``/discover/movie`` API, for en-US translations"""
+        language: str = "en-US"
+        return f"{TMDBUrls.base()}/discover/movie?api_key={current_app.config['API_KEY_TMDB']}{query_string}&page={page}&language={language}"
+
+    @staticmethod
+    def movie_genres() -> str:
+        """The url of the ``/genre/movie/list`` API"""
+        return f"{TMDBUrls.base()}/genre/movie/list?api_key={current_app.config['API_KEY_TMDB']}"
 
 
 class TMDBClient:
@@ -13,35 +111,337 @@ class TMDBClient:
     
     This custom class is absolutely necessary instead of a package
     because I forgot API client packages exist.
+
+    All calls go through the shared :class:`PooledSession`, so connections
+    to TMDB are kept alive and reused between calls.
+
+    Responses of endpoints that rarely change are kept in a per-app
+    :class:`ResponseCache`. The TTL per endpoint is configured through the
+    ``TMDB_CACHE_TTL`` app config dict, e.g. ``{"movie": 3600}``. Endpoints
+    without a TTL are never cached. The cache bounds are configured through
+    ``TMDB_CACHE_MAX_ENTRIES`` and ``TMDB_CACHE_MAX_BYTES``, and expired
+    responses are served for another ``TMDB_CACHE_STALE_TTL`` seconds while
+    they are refreshed in the background.
+
+    Concurrent calls of the same url, e.g. a burst of front page views that
+    all miss the cache, share a single upstream call through a per-app
+    :class:`Singleflight`, unless ``TMDB_SINGLEFLIGHT`` is disabled.
+
+    Every upstream request waits for a permit of a per-app :class:`RateLimiter`,
+    which keeps the requests within TMDB's quota, adapts their concurrency to
+    TMDB's latency and errors, and pauses them after a 429 for as long as its
+    Retry-After header asks. Requests are queued for at most ``TMDB_RATE_LIMIT_MAX_WAIT``
+    seconds, after which a :class:`TMDBRateLimited` exception is raised. The limiter
+    is configured through the ``TMDB_RATE_LIMIT*`` app config keys, and disabled
+    if ``TMDB_RATE_LIMIT`` is None.
+
+    Each TMDB endpoint has a :class:`CircuitBreaker`, which refuses the calls
+    of the endpoint for a while once too many of them failed or were slow,
+    configured through the ``TMDB_BREAKER*`` app config keys, and disabled if
+    ``TMDB_BREAKER_FAILURE_RATIO`` is None. Refused calls raise a :class:`TMDBUnavailable`
+    exception. If a call of a cached endpoint is refused or fails, its last known
+    good response is served instead, if it is still cached, and the request is
+    flagged as stale, see :func:`note_stale_response`.
     """
+    CACHE_EXTENSION_KEY: str = "tmdb_response_cache"
+    SINGLEFLIGHT_EXTENSION_KEY: str = "tmdb_singleflight"
+    LIMITER_EXTENSION_KEY: str = "tmdb_rate_limiter"
+    BREAKERS_EXTENSION_KEY: str = "tmdb_circuit_breakers"
+    _cache_lock: threading.Lock = threading.Lock()
+
+    @staticmethod
+    def cache() -> ResponseCache:
+        """Get the TMDB response cache of the current app, creating it if necessary.
+
+        :return: The response cache
+        """
+        extensions: dict = current_app.extensions
+        cache = extensions.get(TMDBClient.CACHE_EXTENSION_KEY, None)
+        if cache is None:
+            with TMDBClient._cache_lock:
+                cache = extensions.get(TMDBClient.CACHE_EXTENSION_KEY, None)
+                if cache is None:
+                    cache = ResponseCache(
+                        max_entries=current_app.config.get("TMDB_CACHE_MAX_ENTRIES", TMDBCacheDefaults.MAX_ENTRIES),
+                        max_bytes=current_app.config.get("TMDB_CACHE_MAX_BYTES", TMDBCacheDefaults.MAX_BYTES)
+                    )
+                    extensions[TMDBClient.CACHE_EXTENSION_KEY] = cache
+        return cache
+
+    @staticmethod
+    def singleflight() -> Singleflight:
+        """Get the TMDB call coalescer of the current app, creating it if necessary.
+
+        :return: The singleflight
+        """
+        extensions: dict = current_app.extensions
+        singleflight = extensions.get(TMDBClient.SINGLEFLIGHT_EXTENSION_KEY, None)
+        if singleflight is None:
+            with TMDBClient._cache_lock:
+                singleflight = extensions.get(TMDBClient.SINGLEFLIGHT_EXTENSION_KEY, None)
+                if singleflight is None:
+                    singleflight = Singleflight()
+                    extensions[TMDBClient.SINGLEFLIGHT_EXTENSION_KEY] = singleflight
+        return singleflight
+
+    @staticmethod
+    def limiter() -> Optional[RateLimiter]:
+        """Get the TMDB rate limiter of the current app, creating it if necessary.
+
+        :return: The rate limiter, or None if rate limiting is disabled
+        """
+        config = current_app.config
+        if config.get("TMDB_RATE_LIMIT", TMDBRateLimitDefaults.RATE) is None:
+            return None
+
+        extensions: dict = current_app.extensions
+        limiter = extensions.get(TMDBClient.LIMITER_EXTENSION_KEY, None)
+        if limiter is None:
+            with TMDBClient._cache_lock:
+                limiter = extensions.get(TMDBClient.LIMITER_EXTENSION_KEY, None)
+                if limiter is None:
+                    limiter = RateLimiter(
+                        rate=config.get("TMDB_RATE_LIMIT", TMDBRateLimitDefaults.RATE),
+                        burst=config.get("TMDB_RATE_LIMIT_BURST", TMDBRateLimitDefaults.BURST),
+                        min_concurrency=config.get("TMDB_RATE_LIMIT_MIN_CONCURRENCY", TMDBRateLimitDefaults.MIN_CONCURRENCY),
+                        max_concurrency=config.get("TMDB_RATE_LIMIT_MAX_CONCURRENCY", TMDBRateLimitDefaults.MAX_CONCURRENCY),
+                        latency_target=config.get("TMDB_RATE_LIMIT_LATENCY_TARGET", TMDBRateLimitDefaults.LATENCY_TARGET)
+                    )
+                    extensions[TMDBClient.LIMITER_EXTENSION_KEY] = limiter
+        return limiter
+
     @staticmethod
+    def breaker(endpoint: str) -> Optional[CircuitBreaker]:
+        """Get the circuit breaker of a TMDB endpoint of the current app, creating it if necessary.
+
+        :param endpoint: The name of the TMDB endpoint
+        :return: The circuit breaker, or None if circuit breaking is disabled
+        """
+        config = current_app.config
+        if config.get("TMDB_BREAKER_FAILURE_RATIO", TMDBCircuitBreakerDefaults.FAILURE_RATIO) is None:
+            return None
+
+        breakers: Dict[str, CircuitBreaker] = current_app.extensions.setdefault(TMDBClient.BREAKERS_EXTENSION_KEY, {})
+        breaker = breakers.get(endpoint, None)
+        if breaker is None:
+            with TMDBClient._cache_lock:
+                breaker = breakers.get(endpoint, None)
+                if breaker is None:
+                    breaker = CircuitBreaker(
+                        failure_ratio=config.get("TMDB_BREAKER_FAILURE_RATIO", TMDBCircuitBreakerDefaults.FAILURE_RATIO),
+                        window=config.get("TMDB_BREAKER_WINDOW", TMDBCircuitBreakerDefaults.WINDOW),
+                        min_calls=config.get("TMDB_BREAKER_MIN_CALLS", TMDBCircuitBreakerDefaults.MIN_CALLS),
+                        slow_call=config.get("TMDB_BREAKER_SLOW_CALL", TMDBCircuitBreakerDefaults.SLOW_CALL),
+                        open_seconds=config.get("TMDB_BREAKER_OPEN_SECONDS", TMDBCircuitBreakerDefaults.OPEN_SECONDS)
+                    )
+                    breakers[endpoint] = breaker
+        return breaker
+
+    @staticmethod
+    def limiter_deadline() -> float:
+        """Get the ``time.monotonic`` time until which a TMDB request that starts now may be queued by the rate limiter."""
+        return time.monotonic() + current_app.config.get("TMDB_RATE_LIMIT_MAX_WAIT", TMDBRateLimitDefaults.MAX_WAIT)
+
+    @staticmethod
+    def coalesce() -> bool:
+        """Whether concurrent identical TMDB calls share a single upstream call, per the app config."""
+        return current_app.config.get("TMDB_SINGLEFLIGHT", True)
+
+    @staticmethod
+    def cache_ttl(endpoint: str) -> Optional[float]:
+        """Get the configured cache TTL of a TMDB endpoint.
+
+        :param endpoint: The name of the TMDB endpoint
+        :return: The TTL in seconds, or None if the endpoint should not be cached
+        """
+        return current_app.config.get("TMDB_CACHE_TTL", TMDBCacheDefaults.TTL).get(endpoint, None)
+
+    @staticmethod
+    def _get(endpoint: str, url: str) -> requests.Response:
+        """Perform a GET request to TMDB through the response cache and the shared, pooled session.
+
+        Raises a `NotOKTMDB` exception if the call fails on the transport level,
+        e.g. because of a timeout, so that callers can handle it like any other
+        unusable TMDB response. If the endpoint is cached, its last known good
+        response is served instead of such a failure, or of a server error.
+
+        :param endpoint: The name of the TMDB endpoint, used to look up its cache TTL
+        :param url: The full TMDB url to GET
+        :return: The TMDB response
+        """
+        ttl = TMDBClient.cache_ttl(endpoint)
+        if ttl is None:
+            return TMDBClient._fetch(endpoint, url)
+
+        try:
+            response: requests.Response = TMDBClient.cache().get_or_fetch(
+                url,
+                bind_app_context(lambda: TMDBClient._fetch(endpoint, url)),
+                ttl=ttl,
+                stale_ttl=current_app.config.get("TMDB_CACHE_STALE_TTL", TMDBCacheDefaults.STALE_TTL)
+            )
+        except NotOKTMDB:
+            last_known: Optional[requests.Response] = TMDBClient._last_known(url)
+            if last_known is None:
+                raise
+            return last_known
+        if response.status_code >= 500:
+            return TMDBClient._last_known(url) or response
+        return response
+
+    @staticmethod
+    def _last_known(url: str) -> Optional[requests.Response]:
+        """Get the last known good response of a url from the response cache, and flag the current request as stale.
+
+        :param url: The full TMDB url
+        :return: The last known good response, or None if it is not cached
+        """
+        last_known = TMDBClient.cache().get_last_known(url)
+        if last_known is None:
+            return None
+        response, age = last_known
+        note_stale_response(age)
+        return response
+
+    @staticmethod
+    def refresh(endpoint: str, url: str) -> requests.Response:
+        """Fetch a fresh TMDB response and store it in the response cache, even if a fresh response is cached already.
+
+        Used to warm the cache ahead of the requests, see :class:`CacheWarmer`.
+        Responses of endpoints without a cache TTL are fetched, but not cached.
+
+        :param endpoint: The name of the TMDB endpoint, used to look up its cache TTL
+        :param url: The full TMDB url to GET
+        :return: The TMDB response
+        """
+        response: requests.Response = TMDBClient._fetch(endpoint, url)
+        ttl = TMDBClient.cache_ttl(endpoint)
+        if ttl is not None:
+            TMDBClient.cache().put(url, response, ttl)
+        return response
+
+    @staticmethod
+    def _fetch(endpoint: str, url: str) -> requests.Response:
+        """Perform a GET request to TMDB through the shared, pooled session, bypassing the cache.
+
+        Concurrent calls of the same url share the response of a single request.
+
+        :param endpoint: The name of the TMDB endpoint, which selects its circuit breaker
+        :param url: The full TMDB url to GET
+        :return: The TMDB response
+        """
+        if TMDBClient.coalesce():
+            return TMDBClient.singleflight().do(url, lambda: TMDBClient._request(endpoint, url))
+        return TMDBClient._request(endpoint, url)
+
+    @staticmethod
+    def _request(endpoint: str, url: str) -> requests.Response:
+        """Perform a GET request to TMDB, unless the circuit breaker of its endpoint refuses it.
+
+        May raise a `TMDBUnavailable` exception if the circuit breaker is open.
+
+        :param endpoint: The name of the TMDB endpoint, which selects its circuit breaker
+        :param url: The full TMDB url to GET
+        :return: The TMDB response
+        """
+        breaker: Optional[CircuitBreaker] = TMDBClient.breaker(endpoint)
+        if breaker is None:
+            return TMDBClient._send(url)
+        if not breaker.allow():
+            raise TMDBUnavailable()
+
+        failed, seconds = None, 0.0
+        try:
+            response = TMDBClient._send(url)
+            failed, seconds = response.status_code >= 500, response.elapsed.total_seconds()
+            return response
+        except TMDBRateLimited:
+            # Refused by the local rate limiter, without calling TMDB, so it says nothing about TMDB's health
+            raise
+        except NotOKTMDB:
+            failed = True
+            raise
+        finally:
+            breaker.record(failed, seconds)
+
+    @staticmethod
+    def _send(url: str) -> requests.Response:
+        """Perform a GET request to TMDB through the shared, pooled session, within the rate limit.
+
+        A 429 response is retried as soon as the rate limiter allows it, if that
+        is still before the request's deadline. May raise a `TMDBRateLimited`
+        exception if the request could not be made before its deadline.
+
+        :param url: The full TMDB url to GET
+        :return: The TMDB response
+        """
+        limiter: Optional[RateLimiter] = TMDBClient.limiter()
+        if limiter is None:
+            try:
+                return PooledSession.get(url)
+            except requests.RequestException as e:
+                raise NotOKTMDB() from e
+
+        deadline: float = TMDBClient.limiter_deadline()
+        while True:
+            started_at: float = limiter.acquire(deadline)
+            status_code, retry_after = None, None
+            try:
+                response = PooledSession.get(url)
+                status_code, retry_after = response.status_code, response.headers.get("Retry-After", None)
+            except requests.RequestException as e:
+                raise NotOKTMDB() from e
+            finally:
+                limiter.release(started_at, status_code, retry_after)
+            if status_code != 429:
+                return response
+
+    @staticmethod
+    @instrumented("tmdb")
     def get_movie(movie_id: int) -> requests.Response:
         """Get the primary information about a movie from the TMDB ``/movie/{movie_id}`` API.
 
         :param movie_id: Which movie's information to retrieve
         :return: The TMDB response, containing the requested movie if successful
         """
-        return requests.get(f"https://api.themoviedb.org/3/movie/{movie_id}?api_key={current_app.config['API_KEY_TMDB']}")
+        return TMDBClient._get("movie", TMDBUrls.movie(movie_id))
 
     @staticmethod
+    @instrumented("tmdb")
+    def get_movie_with_credits(movie_id: int) -> requests.Response:
+        """Get the primary information and the credits of a movie in a single call to the TMDB ``/movie/{movie_id}`` API.
+
+        The credits are appended to the primary information under the key "credits",
+        through TMDB's ``append_to_response`` query parameter. This fuses the calls of
+        :func:`get_movie` and :func:`get_credits` into a single upstream call.
+
+        :param movie_id: Which movie's information and credits to retrieve
+        :return: The TMDB response, containing the requested movie and its credits if successful
+        """
+        return TMDBClient._get("movie", TMDBUrls.movie_with_credits(movie_id))
+
+    @staticmethod
+    @instrumented("tmdb")
     def get_popular_page(page: int) -> requests.Response:
         """Get a *page* of popular movies from the TMDB ``/movie/popular`` API.
         
         :param page: Which page to retrieve
         :return: The TMDB response, containing the list op popular movies if successful
         """
-        return requests.get(f"https://api.themoviedb.org/3/movie/popular?page={page}&api_key={current_app.config['API_KEY_TMDB']}")
+        return TMDBClient._get("popular", TMDBUrls.popular_page(page))
 
     @staticmethod
+    @instrumented("tmdb")
     def get_credits(movie_id: int) -> requests.Response:
         """Get the crew and cast for the specified movie from the TMDB ``/movie/{movie_id}/credits`` API.
 
         :param movie_id: Which movie get the credits for
         :return: The TMDB response, containing the credits if successful
         """
-        return requests.get(f"https://api.themoviedb.org/3/movie/{movie_id}/credits?api_key={current_app.config['API_KEY_TMDB']}")
+        return TMDBClient._get("credits", TMDBUrls.credits(movie_id))
 
     @staticmethod
+    @instrumented("tmdb")
     def get_discover_page(page: int, query_string: str) -> requests.Response:
         """Get a *page* of movies from the TMDB ``/discover/movie`` API.
 
@@ -53,16 +453,16 @@ class TMDBClient:
         :param query_string: A string of query parameters of the TMDB discover API, must start with an '&'
         :return: The TMDB response, containing the list op discover movies if successful
         """
-        language: str = "en-US"
-        return requests.get(f"https://api.themoviedb.org/3/discover/movie?api_key={current_app.config['API_KEY_TMDB']}{query_string}&page={page}&language={language}")
+        return TMDBClient._get("discover", TMDBUrls.discover_page(page, query_string))
 
     @staticmethod
+    @instrumented("tmdb")
     def get_movie_genres() -> requests.Response:
         """Get all movie genres from the TMDB ``/genre/movie/list`` API.
 
         :return: The TMDB response, containing the list op movie genres if successful
         """
-        return requests.get(f"https://api.themoviedb.org/3/genre/movie/list?api_key={current_app.config['API_KEY_TMDB']}")
+        return TMDBClient._get("genres", TMDBUrls.movie_genres())
 
 
 class QuickchartClient:
@@ -73,14 +473,32 @@ class QuickchartClient:
     
     This custom class is absolutely necessary instead of a package
     because I forgot API client packages exist.
+
+    All calls go through the shared :class:`PooledSession`, so connections
+    to quickchart are kept alive and reused between calls.
     """
     @staticmethod
-    def get_barplot(movies_data: List[Tuple[str, int]]) -> requests.Response:
+    @instrumented("quickchart")
+    def get_barplot(movies_data: List[Tuple[str, int]], image_format: str="webp") -> requests.Response:
         """Get a barplot from the quickchart ``/chart`` API.
         
         :param movies_data: The movies' data to plot, of the format `[ (label, avg. score), ...]`
+        :param image_format: The image format of the barplot, e.g. webp, png or svg
         :return: The quickchart response, containing the barplot if successful
         """
+        try:
+            return PooledSession.get(QuickchartClient.barplot_url(movies_data, image_format))
+        except requests.RequestException as e:
+            raise NotOKQuickchart() from e
+
+    @staticmethod
+    def barplot_url(movies_data: List[Tuple[str, int]], image_format: str="webp") -> str:
+        """Construct the url of a barplot from the quickchart ``/chart`` API.
+
+        :param movies_data: The movies' data to plot, of the format `[ (label, avg. score), ...]`
+        :param image_format: The image format of the barplot, e.g. webp, png or svg
+        :return: The url of the barplot
+        """
         chart: dict = {
             "type": "bar",
             "data": {
@@ -93,4 +511,158 @@ class QuickchartClient:
                 ]
             }
         }
-        return requests.get(f"https://quickchart.io/chart?c={chart}")
+        base_url: str = current_app.config.get("QUICKCHART_BASE_URL", UpstreamDefaults.QUICKCHART_BASE_URL).rstrip("/")
+        return f"{base_url}/chart?c={chart}&format={image_format}"
+
+
+class AsyncTMDBClient:
+    """The asyncio counterpart of :class:`TMDBClient`, used when the API is served in async mode.
+
+    Every method is a coroutine with the same signature and return value as
+    its synchronous counterpart. All calls go through the shared
+    :class:`AsyncPooledSession` and share the response cache, the singleflight, the rate limiter and
+    the circuit breakers of :class:`TMDBClient`, so they must be awaited on the app's :class:`AsyncRuntime` event loop.
+    """
+    @staticmethod
+    async def _get(endpoint: str, url: str) -> requests.Response:
+        """The asyncio counterpart of :func:`TMDBClient._get`.
+
+        :param endpoint: The name of the TMDB endpoint, used to look up its cache TTL
+        :param url: The full TMDB url to GET
+        :return: The TMDB response
+        """
+        ttl = TMDBClient.cache_ttl(endpoint)
+        if ttl is None:
+            return await AsyncTMDBClient._fetch(endpoint, url)
+
+        try:
+            response: requests.Response = await TMDBClient.cache().get_or_fetch_async(
+                url,
+                lambda: AsyncTMDBClient._fetch(endpoint, url),
+                ttl=ttl,
+                stale_ttl=current_app.config.get("TMDB_CACHE_STALE_TTL", TMDBCacheDefaults.STALE_TTL)
+            )
+        except NotOKTMDB:
+            last_known: Optional[requests.Response] = TMDBClient._last_known(url)
+            if last_known is None:
+                raise
+            return last_known
+        if response.status_code >= 500:
+            return TMDBClient._last_known(url) or response
+        return response
+
+    @staticmethod
+    async def _fetch(endpoint: str, url: str) -> requests.Response:
+        """The asyncio counterpart of :func:`TMDBClient._fetch`.
+
+        :param endpoint: The name of the TMDB endpoint, which selects its circuit breaker
+        :param url: The full TMDB url to GET
+        :return: The TMDB response
+        """
+        if TMDBClient.coalesce():
+            return await TMDBClient.singleflight().do_async(url, lambda: AsyncTMDBClient._request(endpoint, url))
+        return await AsyncTMDBClient._request(endpoint, url)
+
+    @staticmethod
+    async def _request(endpoint: str, url: str) -> requests.Response:
+        """The asyncio counterpart of :func:`TMDBClient._request`.
+
+        :param endpoint: The name of the TMDB endpoint, which selects its circuit breaker
+        :param url: The full TMDB url to GET
+        :return: The TMDB response
+        """
+        breaker: Optional[CircuitBreaker] = TMDBClient.breaker(endpoint)
+        if breaker is None:
+            return await AsyncTMDBClient._send(url)
+        if not breaker.allow():
+            raise TMDBUnavailable()
+
+        failed, seconds = None, 0.0
+        try:
+            response = await AsyncTMDBClient._send(url)
+            failed, seconds = response.status_code >= 500, response.elapsed.total_seconds()
+            return response
+        except TMDBRateLimited:
+            # Refused by the local rate limiter, without calling TMDB, so it says nothing about TMDB's health
+            raise
+        except NotOKTMDB:
+            failed = True
+            raise
+        finally:
+            breaker.record(failed, seconds)
+
+    @staticmethod
+    async def _send(url: str) -> requests.Response:
+        """The asyncio counterpart of :func:`TMDBClient._send`.
+
+        :param url: The full TMDB url to GET
+        :return: The TMDB response
+        """
+        limiter: Optional[RateLimiter] = TMDBClient.limiter()
+        if limiter is None:
+            try:
+                return await AsyncPooledSession.get(url)
+            except httpx.HTTPError as e:
+                raise NotOKTMDB() from e
+
+        deadline: float = TMDBClient.limiter_deadline()
+        while True:
+            started_at: float = await limiter.acquire_async(deadline)
+            status_code, retry_after = None, None
+            try:
+                response = await AsyncPooledSession.get(url)
+                status_code, retry_after = response.status_code, response.headers.get("Retry-After", None)
+            except httpx.HTTPError as e:
+                raise NotOKTMDB() from e
+            finally:
+                limiter.release(started_at, status_code, retry_after)
+            if status_code != 429:
+                return response
+
+    @staticmethod
+    @instrumented("tmdb")
+    async def get_movie(movie_id: int) -> requests.Response:
+        """The asyncio counterpart of :func:`TMDBClient.get_movie`."""
+        return await AsyncTMDBClient._get("movie", TMDBUrls.movie(movie_id))
+
+    @staticmethod
+    @instrumented("tmdb")
+    async def get_movie_with_credits(movie_id: int) -> requests.Response:
+        """The asyncio counterpart of :func:`TMDBClient.get_movie_with_credits`."""
+        return await AsyncTMDBClient._get("movie", TMDBUrls.movie_with_credits(movie_id))
+
+    @staticmethod
+    @instrumented("tmdb")
+    async def get_popular_page(page: int) -> requests.Response:
+        """The asyncio counterpart of :func:`TMDBClient.get_popular_page`."""
+        return await AsyncTMDBClient._get("popular", TMDBUrls.popular_page(page))
+
+    @staticmethod
+    @instrumented("tmdb")
+    async def get_credits(movie_id: int) -> requests.Response:
+        """The asyncio counterpart of :func:`TMDBClient.get_credits`."""
+        return await AsyncTMDBClient._get("credits", TMDBUrls.credits(movie_id))
+
+    @staticmethod
+    @instrumented("tmdb")
+    async def get_discover_page(page: int, query_string: str) -> requests.Response:
+        """The asyncio counterpart of :func:`TMDBClient.get_discover_page`."""
+        return await AsyncTMDBClient._get("discover", TMDBUrls.discover_page(page, query_string))
+
+    @staticmethod
+    @instrumented("tmdb")
+    async def get_movie_genres() -> requests.Response:
+        """The asyncio counterpart of :func:`TMDBClient.get_movie_genres`."""
+        return await AsyncTMDBClient._get("genres", TMDBUrls.movie_genres())
+
+
+class AsyncQuickchartClient:
+    """The asyncio counterpart of :class:`QuickchartClient`, used when the API is served in async mode."""
+    @staticmethod
+    @instrumented("quickchart")
+    async def get_barplot(movies_data: List[Tuple[str, int]], image_format: str="webp") -> requests.Response:
+        """The asyncio counterpart of :func:`QuickchartClient.get_barplot`."""
+        try:
+            return await AsyncPooledSession.get(QuickchartClient.barplot_url(movies_data, image_format))
+        except httpx.HTTPError as e:
+            raise NotOKQuickchart() from e
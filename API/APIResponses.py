@@ -3,6 +3,7 @@ from flask import make_response, Response
 
 class CustomHeaders:
     EXCLUDED_MOVIE_IDS = "Excluded-Movie-IDs"
+    STALE_DATA_AGE = "Stale-Data-Age"
 
 
 class GenericResponseMessages:
@@ -49,7 +50,10 @@ def make_response_message(message: str, status_code: int, **kwargs) -> Response:
             "message": *message*
         }
     """
-    return make_response(Message(message=message, **kwargs), status_code)
+    from .profiling import timed_phase, Phases
+
+    with timed_phase(Phases.SERIALIZE):
+        return make_response(Message(message=message, **kwargs), status_code)
 
 def make_response_error(message: str, error_message: str, status_code: int, **kwargs) -> Response:
     """A simple wrapper for the Flask make_response function with
@@ -79,7 +83,10 @@ def make_response_error(message: str, error_message: str, status_code: int, **kw
             "error": *error*
         }
     """
-    return make_response(Error(message=message, error_message=error_message, **kwargs), status_code)
+    from .profiling import timed_phase, Phases
+
+    with timed_phase(Phases.SERIALIZE):
+        return make_response(Error(message=message, error_message=error_message, **kwargs), status_code)
 
 
 class Message(dict):
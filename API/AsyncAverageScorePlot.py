@@ -0,0 +1,120 @@
+import asyncio
+from flask import current_app, request
+from requests.exceptions import JSONDecodeError
+from typing import List, Tuple, Set, Optional
+
+from .utils import catch_unexpected_exceptions
+from .exceptions import NotOKTMDB, NotOKQuickchart
+from .AverageScorePlot import AverageScorePlot, PlotParameters, PlotDefaults, parser, plot_key, plot_response
+from .AsyncRuntime import run_in_event_loop
+from .APIResponses import make_response_error, GenericResponseMessages as E_MSG, TMDBResponseMessages as E_TMDB, QuickchartResponseMessages as E_QC
+from .APIClients import AsyncTMDBClient, AsyncQuickchartClient
+from .ChartRenderer import ChartRenderer, ChartDefaults, PlotBackends
+from .PlotCache import PlotCache
+
+
+async def resolve_movie_data_async(movie_id: int, semaphore: asyncio.Semaphore) -> Optional[Tuple[str, int]]:
+    """The asyncio counterpart of :func:`resolve_movie_data`.
+
+    :param movie_id: The movie to fetch the plot data of
+    :param semaphore: The semaphore that bounds the fan-out of the request
+    :return: The movie's data of the format `(label, avg. score)`, or None if the movie does not exist
+    """
+    async with semaphore:
+        tmdb_resp = await AsyncTMDBClient.get_movie(movie_id)
+    if tmdb_resp.status_code == 404:
+        return None
+    if not tmdb_resp.ok:
+        raise NotOKTMDB()
+
+    tmdb_resp_json = tmdb_resp.json()
+    return (
+        f"{tmdb_resp_json['title']} ({tmdb_resp_json['id']})",
+        tmdb_resp_json["vote_average"]
+    )
+
+
+async def render_plot_async(movies_data: List[Tuple[str, int]], image_format: str) -> bytes:
+    """The asyncio counterpart of :func:`render_plot`.
+
+    :param movies_data: The movies' data to plot, of the format `[ (label, avg. score), ...]`
+    :param image_format: The image format, one of :class:`PlotFormats`
+    :return: The encoded image
+    """
+    if current_app.config.get("PLOT_BACKEND", ChartDefaults.BACKEND) == PlotBackends.QUICKCHART:
+        quickchart_resp = await AsyncQuickchartClient.get_barplot(movies_data, image_format)
+        if not quickchart_resp.ok:
+            raise NotOKQuickchart()
+        return quickchart_resp.content
+
+    return await ChartRenderer.render_async(movies_data, image_format)
+
+
+class AsyncAverageScorePlot(AverageScorePlot):
+    """The async mode counterpart of the :class:`AverageScorePlot` resource.
+
+    The route, the swagger docs and the response schemas are inherited from
+    the AverageScorePlot resource.
+    """
+    @catch_unexpected_exceptions("query the similar score barchart collection")
+    @run_in_event_loop
+    async def get(self):
+        """The fetch endpoint of the average movie score barplot of a collection of Movie resources.
+
+        Silently prunes deleted movie ids from the query string, but does respond with the
+        rejected/excluded movie ids added in the 'Excluded-Movie-IDs'.
+
+        The movies are resolved concurrently, with at most ``PLOT_MAX_CONCURRENCY``
+        pending TMDB calls at once. At most ``PLOT_MAX_MOVIE_IDS`` unique ids are accepted.
+
+        Rendered plots are cached by their content, and carry their content address as a
+        strong ETag. A request whose If-None-Match header matches it is answered with a
+        304 Not Modified response, without rendering the plot.
+
+        :return: The average movie score barplot
+        """
+        args = parser.parse_args()
+        try:
+            from . import movies_attributes
+            movie_ids: List[str] = args[PlotParameters.movie_ids].split(',')
+            if any((movie_id != "" and not movie_id.isnumeric() for movie_id in movie_ids)):
+                return make_response_error(E_MSG.ERROR, f"The {PlotParameters.movie_ids} query param should be a comma separated list of TMDB ids (positive integers)", 400)
+            unique_movie_ids: Set[int] = set([int(movie_id) for movie_id in movie_ids if movie_id != ""])
+            max_movie_ids: int = current_app.config.get("PLOT_MAX_MOVIE_IDS", PlotDefaults.MAX_MOVIE_IDS)
+            if len(unique_movie_ids) > max_movie_ids:
+                return make_response_error(E_MSG.ERROR, f"The {PlotParameters.movie_ids} query param may contain at most {max_movie_ids} unique TMDB ids", 400)
+            valid_movie_ids: List[int] = movies_attributes.prune_deleted_keys(unique_movie_ids)
+            resolved_movie_ids: Set[int] = set()
+
+            # Resolve the movies concurrently, but with a bounded fan-out per request
+            semaphore = asyncio.Semaphore(current_app.config.get("PLOT_MAX_CONCURRENCY", PlotDefaults.MAX_CONCURRENCY))
+            movies_data: List[Tuple[str, int]] = []
+            resolved_movies = await asyncio.gather(*(resolve_movie_data_async(valid_movie_id, semaphore) for valid_movie_id in valid_movie_ids))
+            for valid_movie_id, movie_data in zip(valid_movie_ids, resolved_movies):
+                if movie_data is None:
+                    continue
+
+                resolved_movie_ids.add(valid_movie_id)
+                movies_data.append(movie_data)
+
+            # Plot the movies in a canonical order, so that the same movies
+            # requested in any order share a single cached plot and ETag
+            movies_data.sort()
+            image_format: str = args[PlotParameters.image_format]
+            key: str = plot_key(movies_data, image_format)
+            excluded_movie_ids: Set[int] = set(unique_movie_ids).difference(resolved_movie_ids)
+            if request.if_none_match.contains_weak(key):
+                return plot_response(None, image_format, key, excluded_movie_ids)
+
+            plot_cache: PlotCache = PlotCache.current()
+            image: Optional[bytes] = plot_cache.get(key)
+            if image is None:
+                image = await render_plot_async(movies_data, image_format)
+                plot_cache.put(key, image)
+            return plot_response(image, image_format, key, excluded_movie_ids)
+        except (JSONDecodeError, KeyError) as e:
+            return make_response_error(E_MSG.ERROR, E_TMDB.ERROR_JSON_DECODE, 502)
+        except NotOKTMDB as e:
+            return make_response_error(E_MSG.ERROR, E_TMDB.NOT_OK, 502)
+        except NotOKQuickchart as e:
+            return make_response_error(E_MSG.ERROR, E_QC.NOT_OK, 502)
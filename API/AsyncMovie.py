@@ -0,0 +1,49 @@
+from json import JSONDecodeError
+
+from .utils import catch_unexpected_exceptions, require_movie_not_deleted
+from .exceptions import NotOKTMDB
+from .conditional import ResponseValidator
+from .projection import ProjectionParameters, parse_fields, project_movie
+from .Movie import Movie, parser
+from .AsyncRuntime import run_in_event_loop
+from .APIResponses import GenericResponseMessages as E_MSG, TMDBResponseMessages as E_TMDB, make_response_error, make_response_message
+from .APIClients import AsyncTMDBClient
+
+
+class AsyncMovie(Movie):
+    """The async mode counterpart of the :class:`Movie` resource.
+
+    The route, the swagger docs and the response schemas are inherited from
+    the Movie resource. The delete http method makes no upstream calls, so it
+    is inherited unchanged.
+    """
+    @catch_unexpected_exceptions("fetch a movie's primary information")
+    @require_movie_not_deleted
+    @run_in_event_loop
+    async def get(self, mov_id: int):
+        """The query endpoint of the primary information for a single, specific movie resource.
+
+        :return: The movie's primary information
+        """
+        try:
+            from . import movies_attributes
+            fields = parse_fields(parser.parse_args()[ProjectionParameters.fields])
+            validator = ResponseValidator("movie")
+            # Query TMDB API
+            tmdb_resp = await AsyncTMDBClient.get_movie(movie_id=mov_id)
+            if tmdb_resp.status_code == 404:
+                return make_response_error(E_MSG.ERROR, f"The movie resource, {mov_id}, does not exist", 404)
+            if not tmdb_resp.ok:
+                raise NotOKTMDB()
+
+            validator.update(tmdb_resp.content)
+            if validator.not_modified():
+                return validator.not_modified_response()
+
+            tmdb_resp_json=tmdb_resp.json()
+            tmdb_resp_json["liked"] = movies_attributes.is_liked(mov_id)
+            return validator.apply(make_response_message(E_MSG.SUCCESS, 200, result=project_movie(tmdb_resp_json, fields)))
+        except JSONDecodeError as e:
+            return make_response_error(E_MSG.ERROR, E_TMDB.ERROR_JSON_DECODE, 502)
+        except NotOKTMDB as e:
+            return make_response_error(E_MSG.ERROR, E_TMDB.NOT_OK, 502)
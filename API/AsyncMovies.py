@@ -0,0 +1,57 @@
+from requests.exceptions import JSONDecodeError
+
+from .utils import catch_unexpected_exceptions
+from .exceptions import NotOKTMDB, InvalidCursor
+from .conditional import ResponseValidator
+from .projection import ProjectionParameters, parse_fields, project_movies
+from .streaming import wants_ndjson, ndjson_response
+from .pagination import collect_movie_pages_async, stream_movie_pages_async, decode_cursor, encode_cursor, PagePosition
+from .Movies import Movies, MoviesParameters, parser
+from .AsyncRuntime import AsyncRuntime, run_in_event_loop
+from .APIResponses import make_response_message, make_response_error, GenericResponseMessages as E_MSG, TMDBResponseMessages as E_TMDB
+from .APIClients import AsyncTMDBClient
+
+
+class AsyncMovies(Movies):
+    """The async mode counterpart of the :class:`Movies` resource.
+
+    The route, the swagger docs and the response schemas are inherited from
+    the Movies resource.
+    """
+    @catch_unexpected_exceptions("fetch the Movies collection")
+    @run_in_event_loop
+    async def get(self):
+        """The fetch endpoint of the collection of all Movie resources.
+
+        :return: The requested amount of movies
+        """
+        args = parser.parse_args()
+        try:
+            popular_x: int = args[MoviesParameters.amount]
+
+            if popular_x < 0:
+                return make_response_error(E_MSG.MALFORMED_REQ,
+                                            f"The {MoviesParameters.amount} parameter must be positive",
+                                            400)
+            try:
+                start: PagePosition = decode_cursor("movies", args[MoviesParameters.cursor])
+            except InvalidCursor as e:
+                return make_response_error(E_MSG.MALFORMED_REQ, f"Invalid {MoviesParameters.cursor} parameter: {e}", 400)
+            fields = parse_fields(args[ProjectionParameters.fields])
+
+            if wants_ndjson():
+                # Stream the movies page by page, the first page is fetched up front, to respond with its errors
+                movie_pages = stream_movie_pages_async(lambda page: AsyncTMDBClient.get_discover_page(page=page, query_string=""), popular_x, start, "discover?")
+                return ndjson_response(await movie_pages.__anext__(), AsyncRuntime.iterate(movie_pages), "fetch the Movies collection", fields)
+
+            # Query TMDB API
+            validator = ResponseValidator("movies")
+            movies, next_position = await collect_movie_pages_async(lambda page: AsyncTMDBClient.get_discover_page(page=page, query_string=""), popular_x, validator, start, "discover?")
+            if validator.not_modified():
+                return validator.not_modified_response()
+
+            return validator.apply(make_response_message(E_MSG.SUCCESS, 200, result=project_movies(movies, fields), next=encode_cursor("movies", next_position)))
+        except JSONDecodeError as e:
+            return make_response_error(E_MSG.ERROR, E_TMDB.ERROR_JSON_DECODE, 502)
+        except NotOKTMDB as e:
+            return make_response_error(E_MSG.ERROR, E_TMDB.NOT_OK, 502)
@@ -0,0 +1,159 @@
+import asyncio
+import contextvars
+import threading
+
+from concurrent.futures import Future
+from flask import Flask, current_app
+from typing import Any, AsyncIterator, Callable, Coroutine, Iterator, TypeVar
+
+from .HTTPSessions import AsyncPooledSession
+
+
+T = TypeVar("T")
+
+class AsyncRuntime:
+    """A single asyncio event loop per flask app, running in its own background thread.
+
+    In async mode, all upstream calls of all requests run as coroutines on this
+    loop, multiplexed over the shared :class:`AsyncPooledSession`, instead of
+    occupying a thread each. The request threads merely wait for their
+    coroutine to finish.
+
+    The loop is started lazily, once per flask app, and stored in the app's
+    ``extensions`` dict. Call :func:`shutdown` to stop it, e.g. at the end of
+    a test.
+    """
+    EXTENSION_KEY: str = "async_runtime"
+    _lock: threading.Lock = threading.Lock()
+
+    @staticmethod
+    def loop() -> asyncio.AbstractEventLoop:
+        """Get the event loop of the current app, starting it if necessary.
+
+        :return: The running event loop
+        """
+        extensions: dict = current_app.extensions
+        runtime = extensions.get(AsyncRuntime.EXTENSION_KEY, None)
+        if runtime is None:
+            with AsyncRuntime._lock:
+                runtime = extensions.get(AsyncRuntime.EXTENSION_KEY, None)
+                if runtime is None:
+                    loop = asyncio.new_event_loop()
+                    thread = threading.Thread(target=loop.run_forever, name="async-runtime", daemon=True)
+                    thread.start()
+                    runtime = (loop, thread)
+                    extensions[AsyncRuntime.EXTENSION_KEY] = runtime
+        return runtime[0]
+
+    @staticmethod
+    def run(coroutine: Coroutine) -> Any:
+        """Run a coroutine on the event loop of the current app and wait for its result.
+
+        The coroutine runs in a copy of the calling thread's context, so it has access
+        to the same flask app and request contexts as the caller. Any exception raised
+        by the coroutine is re-raised in the calling thread.
+
+        :param coroutine: The coroutine to run
+        :return: The result of the coroutine
+        """
+        loop = AsyncRuntime.loop()
+        context = contextvars.copy_context()
+        future = Future()
+
+        def propagate(task: asyncio.Task):
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+
+        def start():
+            task = context.run(loop.create_task, coroutine)
+            task.add_done_callback(propagate)
+
+        loop.call_soon_threadsafe(start)
+        return future.result()
+
+    @staticmethod
+    def iterate(async_iterator: AsyncIterator[T]) -> Iterator[T]:
+        """Iterate an async iterator on the event loop of the current app, from a synchronous caller.
+
+        Every step of the async iterator runs on the loop, as with :func:`run`.
+        Closing the returned iterator early closes the async iterator as well.
+
+        e.g. ::
+
+            for movies in AsyncRuntime.iterate(stream_movie_pages_async(fetch_page, 2000)):
+                ...
+
+        :param async_iterator: The async iterator, e.g. an async generator
+        :return: A synchronous iterator over the same items
+        """
+        exhausted = object()
+
+        async def next_item():
+            try:
+                return await async_iterator.__anext__()
+            except StopAsyncIteration:
+                return exhausted
+
+        try:
+            while True:
+                item = AsyncRuntime.run(next_item())
+                if item is exhausted:
+                    return
+                yield item
+        finally:
+            aclose = getattr(async_iterator, "aclose", None)
+            if aclose is not None:
+                AsyncRuntime.run(aclose())
+
+    @staticmethod
+    def shutdown(app: Flask):
+        """Close the async client and stop the event loop of the app, if they were started.
+
+        :param app: The app to shut down the event loop of
+        """
+        runtime = app.extensions.pop(AsyncRuntime.EXTENSION_KEY, None)
+        if runtime is None:
+            return
+        loop, thread = runtime
+
+        client = app.extensions.pop(AsyncPooledSession.EXTENSION_KEY, None)
+        if client is not None:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def run_in_event_loop(http_method: Callable[..., Coroutine]) -> Callable:
+    """A convenience wrapper that runs an async http method on the app's :class:`AsyncRuntime` event loop.
+
+    Flask's method views, and the decorators wrapped around the http methods,
+    expect the http methods to be synchronous. This wrapper should be the
+    innermost decorator of an async http method, so that all other decorators
+    keep working unchanged.
+
+    e.g. ::
+
+        @catch_unexpected_exceptions("fetch a movie's primary information")
+        @require_movie_not_deleted
+        @run_in_event_loop
+        async def get(self, mov_id: int):
+            tmdb_resp = await AsyncTMDBClient.get_movie(mov_id)
+            ...
+
+    :param http_method: The wrapped async http method
+    :return: The synchronous wrapper
+    """
+    def wrapper(*args, **kwargs):
+        return AsyncRuntime.run(http_method(*args, **kwargs))
+
+    # The decorator is called instead of the wrapped
+    # function, but flask restful expects the called
+    # method to have an http verb (get, post, put,
+    # delete, ...) as its name.
+    wrapper.__name__ = http_method.__name__
+    return wrapper
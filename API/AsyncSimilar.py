@@ -0,0 +1,94 @@
+import asyncio
+from json import JSONDecodeError
+from typing import List
+from flask import request
+
+from .utils import catch_unexpected_exceptions, require_movie_not_deleted
+from .exceptions import NotOKTMDB
+from .conditional import ResponseValidator
+from .projection import ProjectionParameters, parse_fields, project_movie, project_movies
+from .streaming import wants_ndjson, ndjson_response
+from .pagination import collect_movie_pages_async, stream_movie_pages_async
+from .Similar import Similar, SimilarityParameters, parser
+from .AsyncRuntime import AsyncRuntime, run_in_event_loop
+from .APIResponses import GenericResponseMessages as E_MSG, TMDBResponseMessages as E_TMDB, make_response_error, make_response_message
+from .APIClients import AsyncTMDBClient
+
+
+class AsyncSimilar(Similar):
+    """The async mode counterpart of the :class:`Similar` resource.
+
+    The route, the swagger docs and the response schemas are inherited from
+    the Similar resource. The subject movie and, if needed, the list of all
+    genres are fetched concurrently, after which the query substring
+    constructors need no further upstream calls.
+    """
+    @catch_unexpected_exceptions("find similar movies")
+    @require_movie_not_deleted
+    @run_in_event_loop
+    async def get(self, mov_id: int):
+        """The query endpoint of the collection of movies similar to the specified movie.
+
+        :return: The similar movies
+        """
+        from . import movies_attributes
+        validator = ResponseValidator("similar")
+        try:
+            # Fetch the subject movie and the genres the query substring constructors need at once
+            upstream_calls = [AsyncTMDBClient.get_movie_with_credits(mov_id)]
+            if SimilarityParameters.GENRES in request.args:
+                upstream_calls.append(AsyncTMDBClient.get_movie_genres())
+            tmdb_resp, *genres_resps = await asyncio.gather(*upstream_calls)
+
+            if tmdb_resp.status_code == 404:
+                return make_response_error(E_MSG.ERROR, f"The movie resource, {mov_id}, does not exist", 404)
+            if not tmdb_resp.ok:
+                raise NotOKTMDB()
+            validator.update(tmdb_resp.content)
+            subject_movie_json = tmdb_resp.json()
+
+            movie_genres: List[dict] = None
+            for genres_resp in genres_resps:
+                if not genres_resp.ok:
+                    raise NotOKTMDB()
+                movie_genres = genres_resp.json()["genres"]
+
+            args = parser.parse_args()
+            supplied_valid_arg_names = [argName for argName in SimilarityParameters.accepted_parameters() if args[argName] is not None]
+            amount: int = args["amount"]
+            fields = parse_fields(args[ProjectionParameters.fields])
+
+            # Store intermediate values produced during the dicover
+            # API querying, to pass along to the frontend for expressiveness
+            intermediate_values_store: dict = {}
+
+            query_string: str = ""
+            substring_constructors = SimilarityParameters.function_mapping()
+
+            # Construct TMDB query string
+            for keyword in supplied_valid_arg_names:
+                query_substr_constructor = substring_constructors.get(keyword, None)
+                if query_substr_constructor is None:
+                    raise RuntimeError(f"A valid and accepted Webservices similarity parameter, '{keyword}', is missing a TMDB query substring constructor implementation")
+                query_string += "&" + query_substr_constructor(mov_id, intermediate_values_store, subject_movie=subject_movie_json, movie_genres=movie_genres)
+
+            # The reference movie only consists of the primary info
+            subject_movie_json.pop("credits", None)
+            subject_movie_json["liked"] = movies_attributes.is_liked(mov_id)
+
+            if wants_ndjson():
+                # Stream the movies page by page, the first page is fetched up front, to respond with its errors
+                movie_pages = stream_movie_pages_async(lambda page: AsyncTMDBClient.get_discover_page(page, query_string), amount, list_key="discover?" + query_string)
+                return ndjson_response(await movie_pages.__anext__(), AsyncRuntime.iterate(movie_pages), "find similar movies", fields)
+
+            # Query TMDB API for similar movies
+            validator.update(query_string.encode("utf-8"))
+            similar_movies, _ = await collect_movie_pages_async(lambda page: AsyncTMDBClient.get_discover_page(page, query_string), amount, validator, list_key="discover?" + query_string)
+            if validator.not_modified():
+                return validator.not_modified_response()
+
+            return validator.apply(make_response_message(E_MSG.SUCCESS, 200, result=project_movies(similar_movies, fields), reference_movie=project_movie(subject_movie_json, fields), **intermediate_values_store))
+        except (JSONDecodeError, KeyError) as e:
+            return make_response_error(E_MSG.ERROR, "TMDB gave an invalid or malformed response", 502)
+        except NotOKTMDB as e:
+            return make_response_error(E_MSG.ERROR, E_TMDB.NOT_OK, 502)
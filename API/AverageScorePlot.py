@@ -1,16 +1,19 @@
 from io import BytesIO
-from flask import send_file
+from flask import send_file, current_app, request, make_response, Response
 import marshmallow
 from requests.exceptions import JSONDecodeError
 from flask_restful import reqparse
-from typing import List, Tuple, Set
+from typing import List, Tuple, Set, Optional
 from flask_apispec import MethodResource, marshal_with, doc
 
 from .Movies import Movies
 from .utils import catch_unexpected_exceptions
 from .exceptions import NotOKTMDB, NotOKQuickchart
-from .APIResponses import make_response_error, GenericResponseMessages as E_MSG, TMDBResponseMessages as E_TMDB, QuickchartResponseMessages as E_QC
+from .APIResponses import make_response_error, CustomHeaders, GenericResponseMessages as E_MSG, TMDBResponseMessages as E_TMDB, QuickchartResponseMessages as E_QC
 from .APIClients import TMDBClient, QuickchartClient
+from .ChartRenderer import ChartRenderer, ChartDefaults, PlotBackends, PlotFormats
+from .PlotCache import PlotCache
+from .WorkerPool import WorkerPool
 from .schemaModels import generate_params_from_parser
 
 
@@ -22,6 +25,7 @@ class PlotParameters:
     specified in their addition as arguments to the reqparser below.
     """
     movie_ids = "movie_ids"
+    image_format = "format"
 
 """The query arguments passed to this endpoint facilitate
 features related to constructing a barplot of average scores
@@ -38,6 +42,90 @@ section of the README
 parser = reqparse.RequestParser()
 parser.add_argument(PlotParameters.movie_ids, type=str, required=True, location=('args',),
                     help="A comma-separated list of TMDB movie ids")
+parser.add_argument(PlotParameters.image_format, type=str, required=False, location=('args',),
+                    default=PlotFormats.WEBP, choices=list(PlotFormats.MIMETYPES.keys()),
+                    help="The image format of the plot: webp (default), png or svg")
+
+
+class PlotDefaults:
+    """A class of constants that specifies the fallback values of the plot
+    configuration, used if the app config does not set them."""
+    MAX_MOVIE_IDS: int = 100
+    MAX_CONCURRENCY: int = 8
+
+
+def resolve_movie_data(movie_id: int) -> Optional[Tuple[str, int]]:
+    """Fetch the plot data of a single movie from TMDB.
+
+    May raise a `JSONDecodeError` or a `KeyError` in case of an erroneous response
+    from TMDB. May raise a `NotOKTMDB` exception if the TMDB response has an invalid
+    status code.
+
+    :param movie_id: The movie to fetch the plot data of
+    :return: The movie's data of the format `(label, avg. score)`, or None if the movie does not exist
+    """
+    tmdb_resp = TMDBClient.get_movie(movie_id)
+    if tmdb_resp.status_code == 404:
+        return None
+    if not tmdb_resp.ok:
+        raise NotOKTMDB()
+
+    tmdb_resp_json = tmdb_resp.json()
+    return (
+        f"{tmdb_resp_json['title']} ({tmdb_resp_json['id']})",
+        tmdb_resp_json["vote_average"]
+    )
+
+
+def render_plot(movies_data: List[Tuple[str, int]], image_format: str) -> bytes:
+    """Render the barplot of average scores with the backend selected by the ``PLOT_BACKEND`` config key.
+
+    The "local" backend renders the plot in-process, in the :class:`ChartRenderer`
+    process pool. The "quickchart" backend fetches it from the quickchart API.
+
+    May raise a `NotOKQuickchart` exception if the quickchart API fails.
+
+    :param movies_data: The movies' data to plot, of the format `[ (label, avg. score), ...]`
+    :param image_format: The image format, one of :class:`PlotFormats`
+    :return: The encoded image
+    """
+    if current_app.config.get("PLOT_BACKEND", ChartDefaults.BACKEND) == PlotBackends.QUICKCHART:
+        quickchart_resp = QuickchartClient.get_barplot(movies_data, image_format)
+        if not quickchart_resp.ok:
+            raise NotOKQuickchart()
+        return quickchart_resp.content
+
+    return ChartRenderer.render(movies_data, image_format)
+
+
+def plot_key(movies_data: List[Tuple[str, int]], image_format: str) -> str:
+    """Get the content address of a plot, which is both its cache key and its ETag.
+
+    :param movies_data: The movies' data to plot, of the format `[ (label, avg. score), ...]`, in plot order
+    :param image_format: The image format, one of :class:`PlotFormats`
+    :return: The content address
+    """
+    return PlotCache.key(movies_data, image_format, current_app.config.get("PLOT_BACKEND", ChartDefaults.BACKEND))
+
+
+def plot_response(image: Optional[bytes], image_format: str, key: str, excluded_movie_ids: Set[int]) -> Response:
+    """Build the response of the AverageScorePlot resource.
+
+    :param image: The encoded plot, or None to respond with 304 Not Modified
+    :param image_format: The image format, one of :class:`PlotFormats`
+    :param key: The content address of the plot, sent as its strong ETag
+    :param excluded_movie_ids: The requested movie ids that are not part of the plot
+    :return: The response
+    """
+    if image is None:
+        response = make_response("", 304)
+        # Negotiates the content encoding, and thereby the ETag, like the full response, see compress_response
+        response.mimetype = PlotFormats.MIMETYPES[image_format]
+    else:
+        response = send_file(BytesIO(image), mimetype=PlotFormats.MIMETYPES[image_format])
+    response.set_etag(key)
+    response.headers[CustomHeaders.EXCLUDED_MOVIE_IDS] = ','.join([str(id) for id in excluded_movie_ids])
+    return response
 
 
 class AverageScorePlot(MethodResource):
@@ -62,6 +150,13 @@ class AverageScorePlot(MethodResource):
         Silently prunes deleted movie ids from the query string, but does respond with the
         rejected/excluded movie ids added in the 'Excluded-Movie-IDs'.
 
+        The movies are resolved concurrently, with at most ``PLOT_MAX_CONCURRENCY``
+        pending TMDB calls at once. At most ``PLOT_MAX_MOVIE_IDS`` unique ids are accepted.
+
+        Rendered plots are cached by their content, and carry their content address as a
+        strong ETag. A request whose If-None-Match header matches it is answered with a
+        304 Not Modified response, without rendering the plot.
+
         :return: The average movie score barplot
         """
         args = parser.parse_args()
@@ -71,36 +166,39 @@ class AverageScorePlot(MethodResource):
             if any((movie_id != "" and not movie_id.isnumeric() for movie_id in movie_ids)):
                 return make_response_error(E_MSG.ERROR, f"The {PlotParameters.movie_ids} query param should be a comma separated list of TMDB ids (positive integers)", 400)
             unique_movie_ids: Set[int] = set([int(movie_id) for movie_id in movie_ids if movie_id != ""])
+            max_movie_ids: int = current_app.config.get("PLOT_MAX_MOVIE_IDS", PlotDefaults.MAX_MOVIE_IDS)
+            if len(unique_movie_ids) > max_movie_ids:
+                return make_response_error(E_MSG.ERROR, f"The {PlotParameters.movie_ids} query param may contain at most {max_movie_ids} unique TMDB ids", 400)
             valid_movie_ids: List[int] = movies_attributes.prune_deleted_keys(unique_movie_ids)
             resolved_movie_ids: Set[int] = set()
 
+            # Resolve the movies concurrently, but with a bounded fan-out per request
             movies_data: List[Tuple[str, int]] = []
-            for valid_movie_id in valid_movie_ids:
-                tmdb_resp = TMDBClient.get_movie(valid_movie_id)
-                tmdb_resp_json = tmdb_resp.json()
-
-                if tmdb_resp.status_code == 404:
+            resolved_movies = WorkerPool.map(resolve_movie_data, valid_movie_ids,
+                                             max_in_flight=current_app.config.get("PLOT_MAX_CONCURRENCY", PlotDefaults.MAX_CONCURRENCY))
+            for valid_movie_id, movie_data in zip(valid_movie_ids, resolved_movies):
+                if movie_data is None:
                     continue
 
-                if not tmdb_resp.ok:
-                    raise NotOKTMDB()
-
                 resolved_movie_ids.add(valid_movie_id)
-                movies_data.append((
-                    f"{tmdb_resp_json['title']} ({tmdb_resp_json['id']})",
-                    tmdb_resp_json["vote_average"]
-                ))
-
-            quickchart_resp = QuickchartClient.get_barplot(movies_data)
-            barchart_file: BytesIO = BytesIO(quickchart_resp.content)
-
-            if not quickchart_resp.ok:
-                raise NotOKQuickchart()
-
-            response = send_file(barchart_file, mimetype="image/webp")
-            response.headers["Excluded-Movie-IDs"] = ','.join([str(id) for id in set(unique_movie_ids).difference(resolved_movie_ids)])
-            return response
-        except JSONDecodeError as e:
+                movies_data.append(movie_data)
+
+            # Plot the movies in a canonical order, so that the same movies
+            # requested in any order share a single cached plot and ETag
+            movies_data.sort()
+            image_format: str = args[PlotParameters.image_format]
+            key: str = plot_key(movies_data, image_format)
+            excluded_movie_ids: Set[int] = set(unique_movie_ids).difference(resolved_movie_ids)
+            if request.if_none_match.contains_weak(key):
+                return plot_response(None, image_format, key, excluded_movie_ids)
+
+            plot_cache: PlotCache = PlotCache.current()
+            image: Optional[bytes] = plot_cache.get(key)
+            if image is None:
+                image = render_plot(movies_data, image_format)
+                plot_cache.put(key, image)
+            return plot_response(image, image_format, key, excluded_movie_ids)
+        except (JSONDecodeError, KeyError) as e:
             return make_response_error(E_MSG.ERROR, E_TMDB.ERROR_JSON_DECODE, 502)
         except NotOKTMDB as e:
             return make_response_error(E_MSG.ERROR, E_TMDB.NOT_OK, 502)
@@ -0,0 +1,178 @@
+import logging
+import random
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask
+from typing import Callable, Dict, List, Optional
+
+from .APIClients import TMDBClient, TMDBUrls
+
+
+class CacheWarmerDefaults:
+    """A class of constants that specifies the fallback values of the cache
+    warmer configuration, used if the app config does not set them."""
+    INTERVAL: float = 300.0
+    # The relative deviation of each interval, e.g. 0.1 waits between 0.9 and 1.1 times the interval
+    JITTER: float = 0.1
+    MAX_WORKERS: int = 4
+    POPULAR_PAGES: int = 5
+    DISCOVER_PAGES: int = 5
+    TOP_MOVIES: int = 20
+
+
+class CacheWarmer:
+    """A background thread that periodically refreshes the hottest TMDB responses in the TMDB response cache.
+
+    Every interval, it refetches the first pages of the popular movies and of
+    the discover API, as used by the popular movies and movies collections, the
+    list of movie genres, as used by the similar movies collection, and the
+    details of the most popular movies. The responses are stored through
+    :func:`TMDBClient.refresh`, so the requests of the hot routes nearly always
+    find them in the cache. Only endpoints with a cache TTL in the ``TMDB_CACHE_TTL``
+    app config dict are warmed, and their TTL should exceed the interval.
+
+    The refreshes of a cycle run in a small executor of their own, so that the
+    warmer never occupies the shared :class:`WorkerPool` of the requests. The
+    interval is randomized by a jitter, so that the warmers of several worker
+    processes do not refresh in lockstep.
+
+    The warmer is started by the app factory if ``CACHE_WARMER_ENABLED`` is set,
+    and stored in the app's ``extensions`` dict. Call :func:`shutdown` to stop
+    it, e.g. at the end of a test.
+    """
+    EXTENSION_KEY: str = "tmdb_cache_warmer"
+
+    def __init__(self, app: Flask):
+        """
+        :param app: The app whose TMDB response cache to warm
+        """
+        config = app.config
+        self.app: Flask = app
+        self.interval: float = config.get("CACHE_WARMER_INTERVAL", CacheWarmerDefaults.INTERVAL)
+        self.jitter: float = config.get("CACHE_WARMER_JITTER", CacheWarmerDefaults.JITTER)
+        self.popular_pages: int = config.get("CACHE_WARMER_POPULAR_PAGES", CacheWarmerDefaults.POPULAR_PAGES)
+        self.discover_pages: int = config.get("CACHE_WARMER_DISCOVER_PAGES", CacheWarmerDefaults.DISCOVER_PAGES)
+        self.top_movies: int = config.get("CACHE_WARMER_TOP_MOVIES", CacheWarmerDefaults.TOP_MOVIES)
+
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=config.get("CACHE_WARMER_MAX_WORKERS", CacheWarmerDefaults.MAX_WORKERS),
+            thread_name_prefix="cache-warmer"
+        )
+        self._stopped: threading.Event = threading.Event()
+        self._thread: threading.Thread = threading.Thread(target=self._run, name="cache-warmer", daemon=True)
+        self._lock: threading.Lock = threading.Lock()
+
+        self.cycles: int = 0
+        self.refreshes: int = 0
+        self.failures: int = 0
+        self.last_cycle_seconds: float = 0.0
+
+    @staticmethod
+    def start(app: Flask) -> "CacheWarmer":
+        """Start the cache warmer of the app, if it is not running yet. The first cycle starts immediately.
+
+        :param app: The app whose TMDB response cache to warm
+        :return: The cache warmer
+        """
+        warmer: Optional[CacheWarmer] = app.extensions.get(CacheWarmer.EXTENSION_KEY, None)
+        if warmer is None:
+            warmer = CacheWarmer(app)
+            app.extensions[CacheWarmer.EXTENSION_KEY] = warmer
+            warmer._thread.start()
+        return warmer
+
+    @staticmethod
+    def shutdown(app: Flask):
+        """Stop the cache warmer of the app, if it was started, and wait for its current cycle to end.
+
+        The refreshes of the cycle that have not started yet are cancelled.
+
+        :param app: The app to stop the cache warmer of
+        """
+        warmer: Optional[CacheWarmer] = app.extensions.pop(CacheWarmer.EXTENSION_KEY, None)
+        if warmer is None:
+            return
+        warmer._stopped.set()
+        warmer._executor.shutdown(wait=False, cancel_futures=True)
+        warmer._thread.join()
+        warmer._executor.shutdown()
+
+    def stats(self) -> Dict[str, float]:
+        """Get a snapshot of the warmer counters.
+
+        :return: The amount of completed cycles, of refreshed and failed responses, and the duration of the last cycle
+        """
+        with self._lock:
+            return {
+                "cycles": self.cycles,
+                "refreshes": self.refreshes,
+                "failures": self.failures,
+                "last_cycle_seconds": self.last_cycle_seconds,
+            }
+
+    def warm(self):
+        """Run a single warming cycle, and wait for it to finish.
+
+        The pages are refreshed first, as the most popular movies are taken from the first popular pages.
+        """
+        with self.app.app_context():
+            refreshes: List[Callable[[], Optional[dict]]] = []
+            if TMDBClient.cache_ttl("popular") is not None or self.top_movies > 0:
+                refreshes += [self._refresher("popular", TMDBUrls.popular_page(page)) for page in range(1, self.popular_pages + 1)]
+            if TMDBClient.cache_ttl("discover") is not None:
+                refreshes += [self._refresher("discover", TMDBUrls.discover_page(page, "")) for page in range(1, self.discover_pages + 1)]
+            if TMDBClient.cache_ttl("genres") is not None:
+                refreshes.append(self._refresher("genres", TMDBUrls.movie_genres()))
+            pages: List[Optional[dict]] = self._run_refreshes(refreshes)
+
+            if self.top_movies <= 0 or TMDBClient.cache_ttl("movie") is None:
+                return
+            movie_ids: List[int] = []
+            for page in pages[:self.popular_pages]:
+                movie_ids += [movie["id"] for movie in (page or {}).get("results", [])]
+            movie_ids = list(dict.fromkeys(movie_ids))[:self.top_movies]
+            self._run_refreshes([self._refresher("movie", TMDBUrls.movie(movie_id)) for movie_id in movie_ids])
+
+    def _run(self):
+        """The loop of the warmer thread, which warms the cache once every interval, until the warmer is stopped."""
+        while not self._stopped.is_set():
+            start: float = time.perf_counter()
+            try:
+                self.warm()
+            except Exception:
+                if self._stopped.is_set():
+                    return
+                logging.getLogger(__name__).exception("Failed to warm the TMDB response cache")
+            with self._lock:
+                self.cycles += 1
+                self.last_cycle_seconds = time.perf_counter() - start
+            self._stopped.wait(self.interval * random.uniform(1.0 - self.jitter, 1.0 + self.jitter))
+
+    def _run_refreshes(self, refreshes: List[Callable[[], Optional[dict]]]) -> List[Optional[dict]]:
+        """Run the refreshes in the executor of the warmer, and wait for them.
+
+        :return: The parsed responses, in the order of the refreshes, None for those that failed
+        """
+        if self._stopped.is_set():
+            return []
+        futures = [self._executor.submit(refresh) for refresh in refreshes]
+        return [future.result() for future in futures]
+
+    def _refresher(self, endpoint: str, url: str) -> Callable[[], Optional[dict]]:
+        """Create the function that refreshes a single TMDB response, in an app context of the warmed app."""
+        def refresh() -> Optional[dict]:
+            with self.app.app_context():
+                try:
+                    response = TMDBClient.refresh(endpoint, url)
+                    result: Optional[dict] = response.json() if response.ok else None
+                except Exception:
+                    result = None
+            with self._lock:
+                if result is None:
+                    self.failures += 1
+                else:
+                    self.refreshes += 1
+            return result
+        return refresh
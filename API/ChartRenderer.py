@@ -0,0 +1,297 @@
+import asyncio
+import multiprocessing
+import threading
+
+from concurrent.futures import ProcessPoolExecutor
+from flask import Flask, current_app
+from io import BytesIO
+from typing import List, Tuple, Optional
+from xml.sax.saxutils import escape
+
+# Pillow is only required to render raster plots (webp, png) locally
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:
+    Image = ImageDraw = ImageFont = None
+
+
+class ChartDefaults:
+    """A class of constants that specifies the fallback values of the chart
+    renderer configuration, used if the app config does not set them."""
+    BACKEND: str = "local"
+    RENDER_PROCESSES: int = 2
+
+
+class PlotBackends:
+    """An enum of the backends that can render the average score plot, selected by ``PLOT_BACKEND``."""
+    LOCAL: str = "local"
+    QUICKCHART: str = "quickchart"
+
+
+class PlotFormats:
+    """An enum of the image formats the average score plot can be rendered in."""
+    WEBP: str = "webp"
+    PNG: str = "png"
+    SVG: str = "svg"
+
+    MIMETYPES: dict = {
+        WEBP: "image/webp",
+        PNG: "image/png",
+        SVG: "image/svg+xml",
+    }
+
+
+class BarplotLayout:
+    """The geometry of a barplot of average scores, shared by the svg and raster renderers.
+
+    The plot mimics quickchart's default bar chart: a legend at the top, a y axis
+    ranging over all possible TMDB scores, and a label below every bar. Labels are
+    drawn at an angle and truncated, so any amount of movies fits.
+    """
+    MIN_WIDTH: int = 500
+    BAR_SLOT: int = 28
+    MARGIN_LEFT: int = 40
+    MARGIN_RIGHT: int = 20
+    MARGIN_TOP: int = 36
+    PLOT_HEIGHT: int = 220
+    LABEL_HEIGHT: int = 150
+    MAX_LABEL_LENGTH: int = 32
+    # The approximate width of a label character, to keep the angled labels within the image
+    CHAR_WIDTH: int = 6
+    Y_MAX: int = 10
+    Y_TICK: int = 2
+
+    LEGEND: str = "Vote Avg."
+    BAR_FILL: Tuple[int, int, int, int] = (54, 162, 235, 128)
+    BAR_BORDER: Tuple[int, int, int] = (54, 162, 235)
+    GRID: Tuple[int, int, int] = (229, 229, 229)
+    TEXT: Tuple[int, int, int] = (102, 102, 102)
+
+    def __init__(self, movies_data: List[Tuple[str, float]]):
+        self.labels: List[str] = [self._truncate(str(label)) for label, _ in movies_data]
+        self.values: List[float] = [min(max(float(value or 0), 0), self.Y_MAX) for _, value in movies_data]
+        # The label of the first bar extends to the left of the plot, at an angle of 45 degrees
+        first_label_overhang: int = int(len(self.labels[0]) * self.CHAR_WIDTH * 0.71) - self.BAR_SLOT // 2 if self.labels else 0
+        self.plot_left: int = max(self.MARGIN_LEFT, first_label_overhang)
+        self.width: int = max(self.MIN_WIDTH, self.plot_left + len(movies_data) * self.BAR_SLOT + self.MARGIN_RIGHT)
+        self.height: int = self.MARGIN_TOP + self.PLOT_HEIGHT + self.LABEL_HEIGHT
+        self.plot_right: int = self.width - self.MARGIN_RIGHT
+        self.plot_top: int = self.MARGIN_TOP
+        self.plot_bottom: int = self.MARGIN_TOP + self.PLOT_HEIGHT
+
+    def _truncate(self, label: str) -> str:
+        if len(label) <= self.MAX_LABEL_LENGTH:
+            return label
+        return label[:self.MAX_LABEL_LENGTH - 1] + "…"
+
+    def y(self, value: float) -> float:
+        """The vertical pixel coordinate of a score."""
+        return self.plot_bottom - value / self.Y_MAX * self.PLOT_HEIGHT
+
+    def ticks(self) -> List[Tuple[int, float]]:
+        """The `(score, y)` pairs of the y axis ticks."""
+        return [(value, self.y(value)) for value in range(0, self.Y_MAX + 1, self.Y_TICK)]
+
+    def bars(self) -> List[Tuple[float, float, float, float]]:
+        """The `(left, top, right, bottom)` boxes of the bars."""
+        if len(self.values) == 0:
+            return []
+        slot: float = (self.plot_right - self.plot_left) / len(self.values)
+        bar_width: float = slot * 0.7
+        return [
+            (self.plot_left + (index + 0.5) * slot - bar_width / 2, self.y(value),
+             self.plot_left + (index + 0.5) * slot + bar_width / 2, self.plot_bottom)
+            for index, value in enumerate(self.values)
+        ]
+
+
+def render_barplot(movies_data: List[Tuple[str, float]], image_format: str) -> bytes:
+    """Render a barplot of average scores in-process.
+
+    This function is self-contained, so that it can run in a worker process of
+    the :class:`ChartRenderer`.
+
+    :param movies_data: The movies' data to plot, of the format `[ (label, avg. score), ...]`
+    :param image_format: The image format, one of :class:`PlotFormats`
+    :return: The encoded image
+    """
+    layout = BarplotLayout(movies_data)
+    if image_format == PlotFormats.SVG:
+        return _render_svg(layout)
+    return _render_raster(layout, image_format)
+
+
+def _render_svg(layout: BarplotLayout) -> bytes:
+    def rgb(color: tuple) -> str:
+        return f"rgb({color[0]},{color[1]},{color[2]})"
+
+    bar_style: str = f'fill="{rgb(layout.BAR_FILL)}" fill-opacity="{layout.BAR_FILL[3] / 255:.2f}" stroke="{rgb(layout.BAR_BORDER)}"'
+    elements: List[str] = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{layout.width}" height="{layout.height}" '
+        f'viewBox="0 0 {layout.width} {layout.height}" font-family="Helvetica, Arial, sans-serif" font-size="11">',
+        f'<rect width="{layout.width}" height="{layout.height}" fill="white"/>',
+    ]
+    for value, y in layout.ticks():
+        elements.append(f'<line x1="{layout.plot_left}" y1="{y:.1f}" x2="{layout.plot_right}" y2="{y:.1f}" stroke="{rgb(layout.GRID)}"/>')
+        elements.append(f'<text x="{layout.plot_left - 6}" y="{y + 4:.1f}" text-anchor="end" fill="{rgb(layout.TEXT)}">{value}</text>')
+
+    legend_x: float = layout.width / 2 - 30
+    elements.append(f'<rect x="{legend_x:.1f}" y="12" width="30" height="10" {bar_style}/>')
+    elements.append(f'<text x="{legend_x + 36:.1f}" y="21" fill="{rgb(layout.TEXT)}">{escape(layout.LEGEND)}</text>')
+
+    for (left, top, right, bottom), label in zip(layout.bars(), layout.labels):
+        elements.append(f'<rect x="{left:.1f}" y="{top:.1f}" width="{right - left:.1f}" height="{bottom - top:.1f}" '
+                        f'{bar_style}/>')
+        label_x: float = (left + right) / 2
+        label_y: float = layout.plot_bottom + 12
+        elements.append(f'<text x="{label_x:.1f}" y="{label_y:.1f}" text-anchor="end" fill="{rgb(layout.TEXT)}" '
+                        f'transform="rotate(-45 {label_x:.1f} {label_y:.1f})">{escape(label)}</text>')
+
+    elements.append('</svg>')
+    return "\n".join(elements).encode("utf-8")
+
+
+class GlyphCache:
+    """Composes text masks from cached, individually rendered glyphs.
+
+    Rendering text with FreeType costs about a millisecond per string, which would
+    dominate the rendering time of a plot with many labels. The plot only uses a
+    few dozen distinct characters, so every glyph is rendered once per process and
+    the text masks are pasted together from the cached glyph masks. Kerning is lost,
+    which is invisible at the plot's font size.
+    """
+    def __init__(self, font):
+        self.font = font
+        ascent, descent = font.getmetrics()
+        self.height: int = ascent + descent
+        self._glyphs: dict = {}
+
+    def _glyph(self, char: str) -> Tuple["Image.Image", float]:
+        glyph = self._glyphs.get(char, None)
+        if glyph is None:
+            advance: float = self.font.getlength(char)
+            mask = Image.new("L", (int(advance) + 2, self.height), 0)
+            ImageDraw.Draw(mask).text((0, 0), char, fill=255, font=self.font)
+            glyph = self._glyphs[char] = (mask, advance)
+        return glyph
+
+    def mask(self, text: str) -> "Image.Image":
+        """Get the mask of a line of text, as tall as the font and as wide as the text.
+
+        :param text: The text to get the mask of
+        :return: The mask, with the text in white on black
+        """
+        glyphs = [self._glyph(char) for char in text]
+        mask = Image.new("L", (int(sum(advance for _, advance in glyphs)) + 2, self.height), 0)
+        x: float = 0.0
+        for glyph_mask, advance in glyphs:
+            mask.paste(glyph_mask, (round(x), 0), glyph_mask)
+            x += advance
+        return mask
+
+
+_glyph_cache: Optional[GlyphCache] = None
+
+def _get_glyph_cache() -> GlyphCache:
+    """Get the glyph cache of the current process, creating it if necessary."""
+    global _glyph_cache
+    if _glyph_cache is None:
+        _glyph_cache = GlyphCache(ImageFont.load_default(size=11))
+    return _glyph_cache
+
+
+def _render_raster(layout: BarplotLayout, image_format: str) -> bytes:
+    if Image is None:
+        raise RuntimeError("Rendering webp or png plots locally requires the Pillow package, see requirements.txt")
+
+    glyphs: GlyphCache = _get_glyph_cache()
+    image = Image.new("RGB", (layout.width, layout.height), "white")
+    draw = ImageDraw.Draw(image, "RGBA")
+    for value, y in layout.ticks():
+        draw.line([(layout.plot_left, y), (layout.plot_right, y)], fill=layout.GRID)
+        mask = glyphs.mask(str(value))
+        image.paste(layout.TEXT, (layout.plot_left - 6 - mask.width, int(y - mask.height / 2)), mask)
+
+    legend_x: float = layout.width / 2 - 30
+    draw.rectangle([legend_x, 12, legend_x + 30, 22], fill=layout.BAR_FILL, outline=layout.BAR_BORDER)
+    mask = glyphs.mask(layout.LEGEND)
+    image.paste(layout.TEXT, (int(legend_x + 36), int(17 - mask.height / 2)), mask)
+
+    for (left, top, right, bottom), label in zip(layout.bars(), layout.labels):
+        draw.rectangle([left, top, right, bottom], fill=layout.BAR_FILL, outline=layout.BAR_BORDER)
+        # Paste the label rotated by 45 degrees, with its right end just below the center of its bar
+        mask = glyphs.mask(label).rotate(45, expand=True)
+        center: float = (left + right) / 2
+        image.paste(layout.TEXT, (int(center - mask.width + 5), int(layout.plot_bottom + 4)), mask)
+
+    buffer = BytesIO()
+    if image_format == PlotFormats.WEBP:
+        image.save(buffer, format="WEBP", lossless=True, method=0)
+    else:
+        image.save(buffer, format="PNG", optimize=False)
+    return buffer.getvalue()
+
+
+class ChartRenderer:
+    """Renders plots locally, in a pool of worker processes shared by all requests of a flask app.
+
+    Rendering a raster image is CPU bound, so it would hold the GIL and stall the
+    threads serving other requests. The worker processes avoid that. The pool is
+    created lazily, once per flask app, and stored in the app's ``extensions``
+    dict. Its size is configured through the ``PLOT_RENDER_PROCESSES`` app config
+    key. A size of 0 renders in the calling thread instead.
+    """
+    EXTENSION_KEY: str = "chart_renderer_pool"
+    _lock: threading.Lock = threading.Lock()
+
+    @staticmethod
+    def executor() -> Optional[ProcessPoolExecutor]:
+        """Get the process pool of the current app, creating it if necessary.
+
+        :return: The process pool, or None if plots are rendered in the calling thread
+        """
+        processes: int = current_app.config.get("PLOT_RENDER_PROCESSES", ChartDefaults.RENDER_PROCESSES)
+        if processes <= 0:
+            return None
+
+        extensions: dict = current_app.extensions
+        executor = extensions.get(ChartRenderer.EXTENSION_KEY, None)
+        if executor is None:
+            with ChartRenderer._lock:
+                executor = extensions.get(ChartRenderer.EXTENSION_KEY, None)
+                if executor is None:
+                    # Forking a multi-threaded server process is unsafe, so the workers are spawned
+                    executor = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+                    extensions[ChartRenderer.EXTENSION_KEY] = executor
+        return executor
+
+    @staticmethod
+    def render(movies_data: List[Tuple[str, float]], image_format: str) -> bytes:
+        """Render a barplot of average scores in the process pool, and wait for it.
+
+        :param movies_data: The movies' data to plot, of the format `[ (label, avg. score), ...]`
+        :param image_format: The image format, one of :class:`PlotFormats`
+        :return: The encoded image
+        """
+        executor = ChartRenderer.executor()
+        if executor is None:
+            return render_barplot(movies_data, image_format)
+        return executor.submit(render_barplot, movies_data, image_format).result()
+
+    @staticmethod
+    async def render_async(movies_data: List[Tuple[str, float]], image_format: str) -> bytes:
+        """The asyncio counterpart of :func:`render`, which never blocks the event loop."""
+        executor = ChartRenderer.executor()
+        if executor is None:
+            return render_barplot(movies_data, image_format)
+        return await asyncio.wrap_future(executor.submit(render_barplot, movies_data, image_format))
+
+    @staticmethod
+    def shutdown(app: Flask):
+        """Stop the worker processes of the app, if they were started.
+
+        :param app: The app to stop the worker processes of
+        """
+        executor = app.extensions.pop(ChartRenderer.EXTENSION_KEY, None)
+        if executor is not None:
+            executor.shutdown()
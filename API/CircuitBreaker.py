@@ -0,0 +1,127 @@
+import threading
+import time
+
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+class CircuitBreakerDefaults:
+    """A class of constants that specifies the fallback values of the upstream
+    circuit breaker configuration, used if the app config does not set them."""
+    # The share of failed calls among the last WINDOW calls that opens the circuit
+    FAILURE_RATIO: float = 0.5
+    WINDOW: int = 20
+    # The least amount of calls in the window before the circuit may open
+    MIN_CALLS: int = 10
+    # Calls slower than this, in seconds, count as failed
+    SLOW_CALL: float = 5.0
+    # The amount of seconds the circuit stays open before a probe call is let through
+    OPEN_SECONDS: float = 30.0
+
+
+class CircuitStates(object):
+    """An enum of the states of a :class:`CircuitBreaker`."""
+    CLOSED: str = "closed"
+    OPEN: str = "open"
+    HALF_OPEN: str = "half_open"
+
+
+class CircuitBreaker:
+    """A thread-safe circuit breaker of the calls to a single upstream endpoint.
+
+    While the circuit is closed, every call is let through, and the outcomes of
+    the last *window* calls are kept. A call fails if it raised a transport error,
+    responded with a server error, or took longer than *slow_call* seconds. Once
+    at least *min_calls* outcomes are known, and the share of failures reaches
+    *failure_ratio*, the circuit opens.
+
+    While the circuit is open, every call is refused right away, so that the
+    callers fail fast instead of waiting on an upstream that is down. After
+    *open_seconds*, the circuit becomes half-open, and lets a single probe call
+    through. If the probe succeeds, the circuit closes again, else it reopens
+    for another *open_seconds*.
+
+    e.g. ::
+
+        breaker = CircuitBreaker(failure_ratio=0.5, window=20, min_calls=10, slow_call=5, open_seconds=30)
+        if not breaker.allow():
+            raise TMDBUnavailable()
+        response = session.get(url)
+        breaker.record(failed=response.status_code >= 500, seconds=response.elapsed.total_seconds())
+    """
+    def __init__(self, failure_ratio: float, window: int, min_calls: int, slow_call: float, open_seconds: float):
+        self.failure_ratio: float = failure_ratio
+        self.min_calls: int = min_calls
+        self.slow_call: float = slow_call
+        self.open_seconds: float = open_seconds
+
+        self.state: str = CircuitStates.CLOSED
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._opened_at: float = 0.0
+        self._probing: bool = False
+        self._lock: threading.Lock = threading.Lock()
+
+        self.opened: int = 0
+        self.refused: int = 0
+
+    def allow(self) -> bool:
+        """Check whether a call may be made now. Every allowed call must be followed by a :func:`record` of its outcome.
+
+        :return: True if the call may be made, False if it should fail right away
+        """
+        with self._lock:
+            if self.state == CircuitStates.OPEN and time.monotonic() >= self._opened_at + self.open_seconds:
+                self.state = CircuitStates.HALF_OPEN
+            if self.state == CircuitStates.CLOSED:
+                return True
+            if self.state == CircuitStates.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.refused += 1
+            return False
+
+    def record(self, failed: Optional[bool], seconds: float=0.0):
+        """Record the outcome of an allowed call.
+
+        :param failed: Whether the call failed, or None if its outcome says nothing about the upstream, e.g. it was cancelled
+        :param seconds: The duration of the call, calls slower than *slow_call* count as failed
+        """
+        with self._lock:
+            probe: bool = self.state == CircuitStates.HALF_OPEN and self._probing
+            if probe:
+                self._probing = False
+            if failed is None:
+                return
+            failed = failed or seconds > self.slow_call
+
+            if probe:
+                if failed:
+                    self._open()
+                else:
+                    self.state = CircuitStates.CLOSED
+                    self._outcomes.clear()
+            elif self.state == CircuitStates.CLOSED:
+                self._outcomes.append(failed)
+                if len(self._outcomes) >= self.min_calls and \
+                        sum(self._outcomes) >= self.failure_ratio * len(self._outcomes):
+                    self._open()
+
+    def stats(self) -> Dict[str, float]:
+        """Get a snapshot of the breaker state and counters.
+
+        :return: The state, how often the circuit opened, the amount of refused calls, and the share of recent failures
+        """
+        with self._lock:
+            return {
+                "state": self.state,
+                "opened": self.opened,
+                "refused": self.refused,
+                "failure_ratio": sum(self._outcomes) / len(self._outcomes) if len(self._outcomes) > 0 else 0.0,
+            }
+
+    def _open(self):
+        """Open the circuit, the lock must be held by the caller."""
+        self.state = CircuitStates.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.opened += 1
@@ -0,0 +1,221 @@
+import asyncio
+import threading
+import requests
+
+from flask import current_app
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+from typing import Tuple
+
+try:
+    import httpx
+except ImportError:
+    # Only required to serve the API in async mode, see AsyncRuntime.py
+    httpx = None
+
+
+class SessionDefaults:
+    """A class of constants that specifies the fallback values of the
+    pooled session configuration, used if the app config does not set them."""
+    POOL_CONNECTIONS: int = 10
+    POOL_MAXSIZE: int = 20
+    CONNECT_TIMEOUT: float = 3.05
+    READ_TIMEOUT: float = 10.0
+    RETRY_TOTAL: int = 2
+    RETRY_BACKOFF_FACTOR: float = 0.3
+    # 429s are not retried here, but by the rate limiter of the TMDB client, see RateLimiter.py
+    RETRY_STATUS_FORCELIST: Tuple[int, ...] = (500, 502, 503, 504)
+
+
+class PooledSession:
+    """A thread-safe wrapper around a single, shared keep-alive ``requests.Session``.
+
+    Every upstream API client should perform its calls through this class
+    instead of through bare ``requests.get`` calls. The shared session keeps
+    a connection pool per upstream host, so consecutive calls to the same
+    host reuse an already established TCP+TLS connection instead of paying
+    for a fresh handshake every time.
+
+    The session is created lazily, once per flask app, and stored in the
+    app's ``extensions`` dict. The following app config keys are taken into
+    account on creation:
+
+        * HTTP_POOL_CONNECTIONS: The amount of per-host pools to keep
+        * HTTP_POOL_MAXSIZE: The max amount of keep-alive connections per host
+        * HTTP_CONNECT_TIMEOUT: The connect timeout of a single call, in seconds
+        * HTTP_READ_TIMEOUT: The read timeout of a single call, in seconds
+        * HTTP_RETRY_TOTAL: The max amount of retries of an idempotent GET
+        * HTTP_RETRY_BACKOFF_FACTOR: The exponential backoff factor between retries
+
+    The underlying urllib3 pools are thread-safe. Cookies are never persisted
+    between calls, so the session holds no other mutable state that is shared
+    between request threads.
+    """
+    EXTENSION_KEY: str = "pooled_http_session"
+    _lock: threading.Lock = threading.Lock()
+
+    @staticmethod
+    def session() -> requests.Session:
+        """Get the shared session of the current app, creating it if necessary.
+
+        :return: The shared session
+        """
+        extensions: dict = current_app.extensions
+        session = extensions.get(PooledSession.EXTENSION_KEY, None)
+        if session is None:
+            with PooledSession._lock:
+                session = extensions.get(PooledSession.EXTENSION_KEY, None)
+                if session is None:
+                    session = PooledSession._create_session()
+                    extensions[PooledSession.EXTENSION_KEY] = session
+        return session
+
+    @staticmethod
+    def timeout() -> Tuple[float, float]:
+        """Get the (connect, read) timeout tuple configured for the current app.
+
+        :return: The timeout tuple
+        """
+        config = current_app.config
+        return (
+            config.get("HTTP_CONNECT_TIMEOUT", SessionDefaults.CONNECT_TIMEOUT),
+            config.get("HTTP_READ_TIMEOUT", SessionDefaults.READ_TIMEOUT)
+        )
+
+    @staticmethod
+    def get(url: str, **kwargs) -> requests.Response:
+        """Perform a GET request over the shared session, with the configured timeouts.
+
+        May raise any ``requests.RequestException`` if the call fails on the
+        transport level, even after retrying.
+
+        :param url: The url to GET
+        :param kwargs: Any further keyword arguments accepted by ``requests.Session.get``
+        :return: The response
+        """
+        kwargs.setdefault("timeout", PooledSession.timeout())
+        return PooledSession.session().get(url, **kwargs)
+
+    @staticmethod
+    def _create_session() -> requests.Session:
+        """Create a new session configured according to the current app config.
+
+        :return: The new session
+        """
+        config = current_app.config
+        retry = Retry(
+            total=config.get("HTTP_RETRY_TOTAL", SessionDefaults.RETRY_TOTAL),
+            backoff_factor=config.get("HTTP_RETRY_BACKOFF_FACTOR", SessionDefaults.RETRY_BACKOFF_FACTOR),
+            status_forcelist=SessionDefaults.RETRY_STATUS_FORCELIST,
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=config.get("HTTP_POOL_CONNECTIONS", SessionDefaults.POOL_CONNECTIONS),
+            pool_maxsize=config.get("HTTP_POOL_MAXSIZE", SessionDefaults.POOL_MAXSIZE),
+            max_retries=retry
+        )
+
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.cookies.set_policy(_RejectAllCookiesPolicy())
+        return session
+
+
+class AsyncPooledSession:
+    """The asyncio counterpart of :class:`PooledSession`, built on a shared ``httpx.AsyncClient``.
+
+    The client is created lazily, once per flask app, and must only ever be
+    used from the app's :class:`AsyncRuntime` event loop. It is configured
+    through the same app config keys as :class:`PooledSession`. Responses are
+    converted to ``requests.Response`` objects, so that the async API clients
+    are interchangeable with the synchronous ones for all callers.
+
+    Requires the optional ``httpx`` dependency.
+    """
+    EXTENSION_KEY: str = "pooled_async_http_session"
+
+    @staticmethod
+    def client() -> "httpx.AsyncClient":
+        """Get the shared async client of the current app, creating it if necessary.
+
+        :return: The shared async client
+        """
+        extensions: dict = current_app.extensions
+        client = extensions.get(AsyncPooledSession.EXTENSION_KEY, None)
+        if client is None:
+            client = AsyncPooledSession._create_client()
+            extensions[AsyncPooledSession.EXTENSION_KEY] = client
+        return client
+
+    @staticmethod
+    async def get(url: str, **kwargs) -> requests.Response:
+        """Perform a GET request over the shared async client.
+
+        Responses with a retryable status code are retried with exponential backoff,
+        honoring the Retry-After header, just like the synchronous session does.
+        May raise any ``httpx.HTTPError`` if the call fails on the transport level.
+
+        :param url: The url to GET
+        :param kwargs: Any further keyword arguments accepted by ``httpx.AsyncClient.get``
+        :return: The response, converted to a ``requests.Response``
+        """
+        config = current_app.config
+        retries: int = config.get("HTTP_RETRY_TOTAL", SessionDefaults.RETRY_TOTAL)
+        backoff_factor: float = config.get("HTTP_RETRY_BACKOFF_FACTOR", SessionDefaults.RETRY_BACKOFF_FACTOR)
+
+        client = AsyncPooledSession.client()
+        response = await client.get(url, **kwargs)
+        for attempt in range(retries):
+            if response.status_code not in SessionDefaults.RETRY_STATUS_FORCELIST:
+                break
+            retry_after: str = response.headers.get("Retry-After", "")
+            await asyncio.sleep(float(retry_after) if retry_after.isnumeric() else backoff_factor * (2 ** attempt))
+            response = await client.get(url, **kwargs)
+
+        return AsyncPooledSession._to_requests_response(response)
+
+    @staticmethod
+    def _create_client() -> "httpx.AsyncClient":
+        """Create a new async client configured according to the current app config.
+
+        :return: The new async client
+        """
+        if httpx is None:
+            raise RuntimeError("The async mode requires the httpx package, see requirements-async.txt")
+
+        config = current_app.config
+        connect_timeout, read_timeout = PooledSession.timeout()
+        max_connections: int = config.get("HTTP_POOL_CONNECTIONS", SessionDefaults.POOL_CONNECTIONS) * \
+                               config.get("HTTP_POOL_MAXSIZE", SessionDefaults.POOL_MAXSIZE)
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=httpx.AsyncHTTPTransport(retries=config.get("HTTP_RETRY_TOTAL", SessionDefaults.RETRY_TOTAL))
+        )
+
+    @staticmethod
+    def _to_requests_response(response: "httpx.Response") -> requests.Response:
+        """Convert an httpx response to an equivalent, fully read ``requests.Response``.
+
+        :param response: The httpx response
+        :return: The converted response
+        """
+        converted = requests.Response()
+        converted.status_code = response.status_code
+        converted.reason = response.reason_phrase
+        converted.headers = CaseInsensitiveDict(response.headers)
+        converted.url = str(response.url)
+        converted.elapsed = response.elapsed
+        converted.encoding = response.encoding
+        converted._content = response.content
+        return converted
+
+
+class _RejectAllCookiesPolicy(requests.cookies.cookielib.DefaultCookiePolicy):
+    """A cookie policy that never stores any cookie in the shared session."""
+    def set_ok(self, cookie, request):
+        return False
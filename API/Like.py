@@ -2,7 +2,6 @@ from flask_apispec import MethodResource, marshal_with, doc
 
 from .utils import catch_unexpected_exceptions, require_movie_not_deleted
 from .Likes import Likes
-from .MovieAttributes import MovieAttributes
 from .APIResponses import make_response_message, GenericResponseMessages as E_MSG
 from .schemaModels import WebservicesResponseSchema, LikeSchema
 
@@ -35,10 +34,7 @@ class Like(MethodResource):
         :return: The like state of the specified TMDB movie
         """
         from . import movies_attributes
-        liked: bool = False
-
-        if mov_id in movies_attributes:
-            liked = movies_attributes[mov_id].liked
+        liked: bool = movies_attributes.is_liked(mov_id)
 
         return make_response_message(E_MSG.SUCCESS, 200, id=mov_id, liked=liked)
     
@@ -55,10 +51,7 @@ class Like(MethodResource):
         """
         from . import movies_attributes
 
-        if mov_id in movies_attributes:
-            movies_attributes[mov_id].liked = True
-        else:
-            movies_attributes[mov_id] = MovieAttributes(liked=True)
+        movies_attributes.set_liked(mov_id, True)
 
         return make_response_message(E_MSG.SUCCESS, 201)
 
@@ -76,6 +69,6 @@ class Like(MethodResource):
         from . import movies_attributes
 
         if mov_id in movies_attributes:
-            movies_attributes[mov_id].liked = False
+            movies_attributes.set_liked(mov_id, False)
 
         return make_response_message(E_MSG.SUCCESS, 200)
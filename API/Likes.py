@@ -1,9 +1,10 @@
-from flask_apispec import MethodResource, marshal_with, doc
+from flask_apispec import MethodResource, marshal_with, use_kwargs, doc
 from typing import List
 
 from .utils import catch_unexpected_exceptions
+from .bulk import apply_bulk_operations
 from .APIResponses import make_response_message, GenericResponseMessages as E_MSG
-from .schemaModels import LikesSchema
+from .schemaModels import LikesSchema, LikesOperationsSchema, OperationResultsSchema
 
 
 
@@ -31,7 +32,18 @@ class Likes(MethodResource):
         :return: A LikesSchema instance
         """
         from . import movies_attributes
-        non_deleted_keys: List[int] = movies_attributes.prune_deleted_keys(movies_attributes.keys())
-        liked_movies: List[int] = [movie_id for movie_id in non_deleted_keys if movies_attributes.is_liked(movie_id)]
+        liked_movies: List[int] = movies_attributes.liked_keys()
         return make_response_message(E_MSG.SUCCESS, 200, result=liked_movies)
 
+    @doc(description="""Apply a batch of like and un-like operations to the Like resources at once.
+    Each operation has the same effect as a PUT (like) or DELETE (unlike) request to the Like resource of its movie. The operations are applied in order and atomically, and the result of each operation is returned.""")
+    # The body is documented here, but parsed by apply_bulk_operations, to keep the API's error format
+    @use_kwargs(LikesOperationsSchema, location='json', apply=False)
+    @marshal_with(OperationResultsSchema, code=(200, 400))
+    @catch_unexpected_exceptions("apply the Like operations")
+    def patch(self):
+        """The bulk update endpoint of the collection of all likes.
+
+        :return: An OperationResultsSchema instance
+        """
+        return apply_bulk_operations(LikesOperationsSchema())
@@ -0,0 +1,72 @@
+from flask import current_app, Response
+from flask_restful import Resource
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from .APIClients import TMDBClient
+from .CacheWarmer import CacheWarmer
+from .PageMap import PageMap
+from .PlotCache import PlotCache
+from .compression import CompressedBodyCache
+from .instrumentation import METRIC_HELP
+from .MetricsRegistry import MetricsRegistry, Labels
+
+
+class Metrics(Resource):
+    """The api endpoint that exposes the metrics of the API in the Prometheus text format.
+
+    Besides the request and upstream call metrics recorded by the
+    instrumentation, it exposes the counters of the movie attribute store,
+    the caches, the singleflight, the rate limiter, the circuit breakers,
+    the cache warmer and the page map as gauges, computed when scraped.
+    Their counters, e.g. the cache hits, only ever increase.
+    """
+    # The Content-Type of the Prometheus text exposition format
+    CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+
+    @staticmethod
+    def route() -> str:
+        """Get the route to the Metrics resource.
+
+        :return: The route string
+        """
+        return "/metrics"
+
+    def get(self):
+        """The scrape endpoint of the metrics.
+
+        :return: The metrics, in the Prometheus text format
+        """
+        from . import movies_attributes
+
+        help_texts: Dict[str, str] = dict(METRIC_HELP)
+        gauges: List[Tuple[str, Labels, float]] = []
+
+        def add_stats(prefix: str, description: str, stats: Mapping[str, object], labels: Labels=()):
+            for key, value in stats.items():
+                name: str = f"{prefix}_{key}"
+                help_texts.setdefault(name, f"The {key} stat of {description}")
+                if isinstance(value, str):
+                    # A state, e.g. of a circuit breaker, is a label of a constant gauge
+                    gauges.append((name, labels + ((key, value),), 1))
+                else:
+                    gauges.append((name, labels, value))
+
+        add_stats("webservices_movies_attributes", "the movie attribute store", movies_attributes.counts())
+        add_stats("webservices_tmdb_cache", "the TMDB response cache", TMDBClient.cache().stats())
+        add_stats("webservices_plot_cache", "the rendered plot cache", PlotCache.current().stats())
+        add_stats("webservices_compressed_body_cache", "the compressed body cache", CompressedBodyCache.current().stats())
+        add_stats("webservices_tmdb_singleflight", "the TMDB call coalescer", TMDBClient.singleflight().stats())
+        add_stats("webservices_page_map", "the deletion-aware page map", PageMap.current().stats())
+
+        limiter = TMDBClient.limiter()
+        if limiter is not None:
+            add_stats("webservices_tmdb_rate_limiter", "the TMDB rate limiter", limiter.stats())
+        breakers: dict = current_app.extensions.get(TMDBClient.BREAKERS_EXTENSION_KEY, {})
+        for endpoint, breaker in sorted(breakers.items()):
+            add_stats("webservices_tmdb_breaker", "the circuit breaker of a TMDB endpoint", breaker.stats(), (("endpoint", endpoint),))
+        warmer: Optional[CacheWarmer] = current_app.extensions.get(CacheWarmer.EXTENSION_KEY, None)
+        if warmer is not None:
+            add_stats("webservices_cache_warmer", "the TMDB cache warmer", warmer.stats())
+
+        body: str = MetricsRegistry.current().render(help_texts, gauges)
+        return Response(body, status=200, content_type=Metrics.CONTENT_TYPE)
@@ -0,0 +1,207 @@
+import bisect
+import itertools
+import threading
+
+from flask import current_app
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
+
+
+"""The labels of a sample, as (name, value) pairs in a fixed order."""
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricsDefaults:
+    """A class of constants that specifies the fallback values of the metrics
+    configuration, used if the app config does not set them."""
+    # The upper bounds of the latency histogram buckets, in seconds
+    LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    # The amount of separately locked stripes the samples are spread over
+    STRIPES: int = 16
+
+
+class MetricTypes(object):
+    """An enum of the Prometheus metric types."""
+    COUNTER: str = "counter"
+    GAUGE: str = "gauge"
+    HISTOGRAM: str = "histogram"
+
+
+class _Stripe(object):
+    """The counters and histograms recorded by a subset of the threads."""
+    __slots__ = ("lock", "counters", "histograms")
+
+    def __init__(self):
+        self.lock: threading.Lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        # The per bucket counts, followed by the sum and the count of the observations
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}
+
+
+class MetricsRegistry:
+    """A thread-safe registry of counters and latency histograms, rendered in the Prometheus text format.
+
+    Recording a sample is meant to be cheap enough to stay on in production.
+    The samples are spread over *stripes* separately locked stripes, each
+    thread records into the stripe it was assigned on its first sample, so that concurrent requests rarely wait on each
+    other, and each lock is only held for a dict update. The stripes are only
+    merged when the metrics are scraped.
+
+    Gauges, e.g. the size of a cache, are not recorded, but computed at scrape
+    time and passed to :func:`render`.
+
+    The registry is created lazily, once per flask app, and stored in the app's
+    ``extensions`` dict. The histogram buckets are configured through the
+    ``METRICS_LATENCY_BUCKETS`` config key.
+
+    e.g. ::
+
+        registry = MetricsRegistry.current()
+        registry.inc("webservices_requests_total", (("resource", "movie"), ("status", "200")))
+        registry.observe("webservices_request_duration_seconds", (("resource", "movie"),), 0.012)
+    """
+    EXTENSION_KEY: str = "metrics_registry"
+    _creation_lock: threading.Lock = threading.Lock()
+
+    def __init__(self, buckets: Sequence[float], stripes: int=MetricsDefaults.STRIPES):
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        self._stripes: Tuple[_Stripe, ...] = tuple(_Stripe() for _ in range(stripes))
+        self._local: threading.local = threading.local()
+        self._next_stripe = itertools.count()
+
+    @staticmethod
+    def current() -> "MetricsRegistry":
+        """Get the metrics registry of the current app, creating it if necessary.
+
+        :return: The metrics registry
+        """
+        extensions: dict = current_app.extensions
+        registry = extensions.get(MetricsRegistry.EXTENSION_KEY, None)
+        if registry is None:
+            with MetricsRegistry._creation_lock:
+                registry = extensions.get(MetricsRegistry.EXTENSION_KEY, None)
+                if registry is None:
+                    registry = MetricsRegistry(current_app.config.get("METRICS_LATENCY_BUCKETS", MetricsDefaults.LATENCY_BUCKETS))
+                    extensions[MetricsRegistry.EXTENSION_KEY] = registry
+        return registry
+
+    def inc(self, name: str, labels: Labels, amount: float=1.0):
+        """Increase a counter.
+
+        :param name: The name of the counter
+        :param labels: The labels of the sample
+        :param amount: The amount to increase the counter by
+        """
+        stripe: _Stripe = self._stripe()
+        key = (name, labels)
+        with stripe.lock:
+            stripe.counters[key] = stripe.counters.get(key, 0.0) + amount
+
+    def observe(self, name: str, labels: Labels, value: float):
+        """Add an observation to a histogram.
+
+        :param name: The name of the histogram
+        :param labels: The labels of the sample
+        :param value: The observed value, e.g. a latency in seconds
+        """
+        stripe: _Stripe = self._stripe()
+        key = (name, labels)
+        bucket: int = bisect.bisect_left(self.buckets, value)
+        with stripe.lock:
+            histogram = stripe.histograms.get(key, None)
+            if histogram is None:
+                histogram = stripe.histograms[key] = [0.0] * (len(self.buckets) + 2)
+            if bucket < len(self.buckets):
+                histogram[bucket] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def render(self, help_texts: Mapping[str, str], gauges: Iterable[Tuple[str, Labels, float]]=()) -> str:
+        """Render the recorded metrics and the given gauges in the Prometheus text exposition format.
+
+        :param help_texts: The help text of each metric, by name
+        :param gauges: The gauges, as (name, labels, value) triples, grouped by name
+        :return: The exposition text
+        """
+        counters, histograms = self._merge()
+        lines: List[str] = []
+
+        for name, samples in _group(counters.items()).items():
+            lines.extend(_header(name, MetricTypes.COUNTER, help_texts))
+            lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+
+        for name, samples in _group(histograms.items()).items():
+            lines.extend(_header(name, MetricTypes.HISTOGRAM, help_texts))
+            for labels, histogram in samples:
+                cumulative: float = 0.0
+                for bound, count in zip(self.buckets, histogram):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', _format_value(bound)),))} {_format_value(cumulative)}")
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {_format_value(histogram[-1])}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram[-2])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {_format_value(histogram[-1])}")
+
+        for name, samples in _group(((name, labels), value) for name, labels, value in gauges).items():
+            lines.extend(_header(name, MetricTypes.GAUGE, help_texts))
+            lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+
+        return "\n".join(lines) + "\n"
+
+    def _stripe(self) -> _Stripe:
+        """Get the stripe of the current thread, assigning the threads to the stripes round robin."""
+        stripe = getattr(self._local, "stripe", None)
+        if stripe is None:
+            stripe = self._local.stripe = self._stripes[next(self._next_stripe) % len(self._stripes)]
+        return stripe
+
+    def _merge(self) -> Tuple[Dict[Tuple[str, Labels], float], Dict[Tuple[str, Labels], List[float]]]:
+        """Merge the samples of all stripes."""
+        counters: Dict[Tuple[str, Labels], float] = {}
+        histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        for stripe in self._stripes:
+            with stripe.lock:
+                stripe_counters = list(stripe.counters.items())
+                stripe_histograms = [(key, list(histogram)) for key, histogram in stripe.histograms.items()]
+            for key, value in stripe_counters:
+                counters[key] = counters.get(key, 0.0) + value
+            for key, histogram in stripe_histograms:
+                merged = histograms.get(key, None)
+                if merged is None:
+                    histograms[key] = histogram
+                else:
+                    histograms[key] = [a + b for a, b in zip(merged, histogram)]
+        return counters, histograms
+
+
+def _group(samples: Iterable[Tuple[Tuple[str, Labels], object]]) -> Dict[str, List[Tuple[Labels, object]]]:
+    """Group the samples by metric name, sorted by their labels within each name."""
+    grouped: Dict[str, List[Tuple[Labels, object]]] = {}
+    for (name, labels), value in samples:
+        grouped.setdefault(name, []).append((labels, value))
+    for name_samples in grouped.values():
+        name_samples.sort(key=lambda sample: sample[0])
+    return dict(sorted(grouped.items()))
+
+
+def _header(name: str, metric_type: str, help_texts: Mapping[str, str]) -> List[str]:
+    """Get the HELP and TYPE lines of a metric."""
+    help_text: str = help_texts.get(name, "").replace("\\", "\\\\").replace("\n", "\\n")
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+
+
+def _format_labels(labels: Labels) -> str:
+    """Format the labels of a sample, escaping their values."""
+    if len(labels) == 0:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f"{name}=\"{value}\"" for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value, integral values without a fraction."""
+    value = float(value)
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
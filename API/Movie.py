@@ -1,13 +1,20 @@
 from json import JSONDecodeError
+from flask_restful import reqparse
 from flask_apispec import MethodResource, marshal_with, marshal_with, doc
 
 from .utils import catch_unexpected_exceptions, require_movie_not_deleted
 from .exceptions import NotOKTMDB
-from .MovieAttributes import MovieAttributes
+from .conditional import ResponseValidator
+from .projection import ProjectionParameters, add_projection_arguments, parse_fields, project_movie
 from .Movies import Movies
 from .APIResponses import GenericResponseMessages as E_MSG, TMDBResponseMessages as E_TMDB, make_response_error, make_response_message
 from .APIClients import TMDBClient
-from .schemaModels import WebservicesResponseSchema, MovieSchema
+from .PageMap import PageMap
+from .schemaModels import WebservicesResponseSchema, MovieSchema, generate_params_from_parser
+
+
+"""The query arguments passed to this endpoint only trim the movie, see projection.py."""
+parser = add_projection_arguments(reqparse.RequestParser())
 
 
 class Movie(MethodResource):
@@ -25,6 +32,7 @@ class Movie(MethodResource):
         return f"{Movies.route()}/<int:mov_id>"
 
     @doc(description='Get a single Movie resource, which represents the primary info of a TMDB movie.', params={
+        **generate_params_from_parser(parser),
         'mov_id': {'description': 'The TMDB ID of the chosen movie, for which to fetch the primary movie data'}
     })
     @marshal_with(MovieSchema, code=(200, 404, 502))
@@ -37,6 +45,8 @@ class Movie(MethodResource):
         """
         try:
             from . import movies_attributes
+            fields = parse_fields(parser.parse_args()[ProjectionParameters.fields])
+            validator = ResponseValidator("movie")
             # Query TMDB API
             # Has Protection against change in pagecount during long query (large popularx)
             tmdb_resp = TMDBClient.get_movie(movie_id=mov_id)
@@ -45,15 +55,19 @@ class Movie(MethodResource):
             if not tmdb_resp.ok:
                 raise NotOKTMDB()
 
+            validator.update(tmdb_resp.content)
+            if validator.not_modified():
+                return validator.not_modified_response()
+
             tmdb_resp_json=tmdb_resp.json()
             tmdb_resp_json["liked"] = movies_attributes.is_liked(mov_id)
-            return make_response_message(E_MSG.SUCCESS, 200, result=tmdb_resp_json)
+            return validator.apply(make_response_message(E_MSG.SUCCESS, 200, result=project_movie(tmdb_resp_json, fields)))
         except JSONDecodeError as e:
             return make_response_error(E_MSG.ERROR, E_TMDB.ERROR_JSON_DECODE, 502)
         except NotOKTMDB as e:
             return make_response_error(E_MSG.ERROR, E_TMDB.NOT_OK, 502)
 
-    @doc(description='Remove a single Movie resource from any and all Webservices API responses, until the next API restart.', params={
+    @doc(description='Remove a single Movie resource from any and all Webservices API responses, until the movie attribute store is reset, i.e. the next API restart with the default in-memory store, or the removal of the database with the SQLite store.', params={
         'mov_id': {'description': 'The TMDB ID of the chosen movie, which to delete'}
     })
     @marshal_with(WebservicesResponseSchema, code=200)
@@ -69,9 +83,7 @@ class Movie(MethodResource):
         """
         from . import movies_attributes
 
-        if mov_id in movies_attributes:
-            movies_attributes[mov_id].deleted = True
-        else:
-            movies_attributes[mov_id] = MovieAttributes(deleted=True)
+        movies_attributes.set_deleted(mov_id, True)
+        PageMap.current().note_deleted(mov_id)
 
         return make_response_message(E_MSG.SUCCESS, 200)
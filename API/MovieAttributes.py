@@ -2,6 +2,8 @@ class MovieAttributes(object):
     """A dataclass to represent the properties of
     a movie as modified through the REST api.
     """
+    __slots__ = ("liked", "deleted")
+
     def __init__(self, liked: bool=False, deleted: bool=False):
         self.liked = liked
         self.deleted = deleted
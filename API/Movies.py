@@ -1,12 +1,17 @@
 from requests.exceptions import JSONDecodeError
 from flask_restful import reqparse
-from flask_apispec import MethodResource, marshal_with, marshal_with, doc
+from flask_apispec import MethodResource, marshal_with, marshal_with, use_kwargs, doc
 
 from .utils import catch_unexpected_exceptions
-from .exceptions import NotOKTMDB
+from .exceptions import NotOKTMDB, InvalidCursor
+from .conditional import ResponseValidator
+from .projection import ProjectionParameters, add_projection_arguments, parse_fields, project_movies
+from .streaming import wants_ndjson, ndjson_response
+from .pagination import collect_movie_pages, stream_movie_pages, decode_cursor, encode_cursor, PagePosition
+from .bulk import apply_bulk_operations
 from .APIResponses import make_response_message, make_response_error, GenericResponseMessages as E_MSG, TMDBResponseMessages as E_TMDB
 from .APIClients import TMDBClient
-from .schemaModels import MoviesSchema, generate_params_from_parser
+from .schemaModels import MoviesSchema, MoviesOperationsSchema, OperationResultsSchema, generate_params_from_parser
 
 
 class MoviesParameters(object):
@@ -17,6 +22,7 @@ class MoviesParameters(object):
     specified in their addition as arguments to the reqparser below.
     """
     amount: str = "amount"
+    cursor: str = "cursor"
 
 """The query arguments passed to this endpoint facilitate
 features related to retrieving the list of available movies.
@@ -26,6 +32,9 @@ The query parameters do notcorrespond to any required project features.
 parser = reqparse.RequestParser()
 parser.add_argument(MoviesParameters.amount, type=int, required=True, location=('args',),
                     help="The amount of movies to fetch, as a positive integer")
+parser.add_argument(MoviesParameters.cursor, type=str, required=False, location=('args',),
+                    help="The opaque cursor to continue at, as returned under the 'next' key of the previous response. Omit it to start at the first movie")
+add_projection_arguments(parser)
 
 
 class Movies(MethodResource):
@@ -50,48 +59,44 @@ class Movies(MethodResource):
         """
         args = parser.parse_args()
         try:
-            from . import movies_attributes
             popular_x: int = args[MoviesParameters.amount]
 
             if popular_x < 0:
                 return make_response_error(E_MSG.MALFORMED_REQ,
                                             f"The {MoviesParameters.amount} parameter must be positive",
                                             400)
-
-            movies = []
-            remaining_movies: int = popular_x
-            total_pages_available: int = 1
-            current_page: int = 1
-
-            while remaining_movies > 0 and current_page <= total_pages_available:
-                # Query TMDB API
-                tmdb_resp = TMDBClient.get_discover_page(page=current_page, query_string="")
-
-                if not tmdb_resp.ok:
-                    raise NotOKTMDB()
-
-                tmdb_resp_json = tmdb_resp.json()
-                results = tmdb_resp_json["results"]
-                results = [
-                    result
-                    for result in results
-                    if not movies_attributes.is_deleted(result["id"])
-                ]
-                results = results[:remaining_movies]
-                for movie in results:
-                    movie_id: int = movie["id"]
-                    movie["liked"] = movies_attributes.is_liked(movie_id)
-                total_pages_available = tmdb_resp_json["total_pages"]
-
-                # Bookkeeping
-                remaining_movies -= len(results)
-                current_page += 1
-
-                # Append results
-                movies.extend(results)
-
-            return make_response_message(E_MSG.SUCCESS, 200, result=movies)
+            try:
+                start: PagePosition = decode_cursor("movies", args[MoviesParameters.cursor])
+            except InvalidCursor as e:
+                return make_response_error(E_MSG.MALFORMED_REQ, f"Invalid {MoviesParameters.cursor} parameter: {e}", 400)
+            fields = parse_fields(args[ProjectionParameters.fields])
+
+            if wants_ndjson():
+                # Stream the movies page by page, the first page is fetched up front, to respond with its errors
+                movie_pages = stream_movie_pages(lambda page: TMDBClient.get_discover_page(page=page, query_string=""), popular_x, start, "discover?")
+                return ndjson_response(next(movie_pages), movie_pages, "fetch the Movies collection", fields)
+
+            # Query TMDB API
+            validator = ResponseValidator("movies")
+            movies, next_position = collect_movie_pages(lambda page: TMDBClient.get_discover_page(page=page, query_string=""), popular_x, validator, start, "discover?")
+            if validator.not_modified():
+                return validator.not_modified_response()
+
+            return validator.apply(make_response_message(E_MSG.SUCCESS, 200, result=project_movies(movies, fields), next=encode_cursor("movies", next_position)))
         except JSONDecodeError as e:
             return make_response_error(E_MSG.ERROR, E_TMDB.ERROR_JSON_DECODE, 502)
         except NotOKTMDB as e:
             return make_response_error(E_MSG.ERROR, E_TMDB.NOT_OK, 502)
+
+    @doc(description="""Apply a batch of delete operations to the Movie resources at once.
+    Each operation has the same effect as a DELETE request to the Movie resource of its movie. The operations are applied in order and atomically, and the result of each operation is returned.""")
+    # The body is documented here, but parsed by apply_bulk_operations, to keep the API's error format
+    @use_kwargs(MoviesOperationsSchema, location='json', apply=False)
+    @marshal_with(OperationResultsSchema, code=(200, 400))
+    @catch_unexpected_exceptions("apply the Movie operations")
+    def patch(self):
+        """The bulk update endpoint of the collection of all Movie resources.
+
+        :return: An OperationResultsSchema instance
+        """
+        return apply_bulk_operations(MoviesOperationsSchema())
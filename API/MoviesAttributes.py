@@ -0,0 +1,539 @@
+import abc
+import os
+import sqlite3
+import threading
+import time
+import weakref
+
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Any
+
+from .MovieAttributes import MovieAttributes
+
+
+class MoviesAttributesDefaults:
+    """The defaults of the movie attribute store, used for the config keys that are absent."""
+    BACKEND: str = "memory"
+    SQLITE_PATH: str = "movies_attributes.sqlite3"
+    SQLITE_BUSY_TIMEOUT: float = 5.0
+
+
+class MoviesAttributes(MutableMapping[int, MovieAttributes]):
+    """The backend api's store of movie attributes.
+
+    The store behaves like a dict of the form ::
+
+        {
+            movie_id : MovieAttributes
+        }
+
+    where MovieAttributes describes the global attributes
+    stored for each movie by the API. These attributes
+    facilitate project requirements 6. (delete movies)
+    and 7. ((un)like movies) described in the project
+    root's README.
+
+    The storage itself is pluggable: subclasses implement the
+    mapping protocol on top of their own storage. Lookups return
+    a snapshot of a movie's attributes, so changes must be written
+    back through the store, e.g. with :func:`set_liked` or
+    :func:`set_deleted`, rather than by mutating the returned
+    MovieAttributes.
+    """
+    def prune_deleted_keys(self, keys: Iterable[int]) -> List[int]:
+        """Filter the iterable of keys and keep only the keys that have a 'deleted' status of `False`.
+
+        :param keys: The list of keys to filter
+        :return: The list of non-deleted keys
+        """
+        return [key for key in keys if self.not_deleted(key)]
+
+    def is_deleted(self, key: int) -> bool:
+        """Check whether the movie corresponding to the key is deleted.
+
+        If the key is not part of the store, then `False` is returned.
+
+        :param key: The key to check the status for
+        :return: The movie's deleted status
+        """
+        return key in self and self[key].deleted
+
+    def not_deleted(self, key: int) -> bool:
+        """Check whether the movie corresponding to the key is not deleted.
+
+        If the key is not part of the store, then `True` is returned.
+
+        :param key: The key to check the status for
+        :return: The movie's non-deleted status
+        """
+        return not self.is_deleted(key)
+
+    def is_liked(self, key: int) -> bool:
+        """Check whether the movie corresponding to the key is liked.
+
+        If the key is not part of the store, then `False` is returned.
+
+        :param key: The key to check the status for
+        :return: The movie's liked status
+        """
+        return key in self and self[key].liked
+
+    def liked_keys(self) -> List[int]:
+        """Get the keys of all movies that are liked and not deleted.
+
+        :return: The list of liked, non-deleted keys
+        """
+        return [key for key, attributes in self.items() if attributes.liked and not attributes.deleted]
+
+    def counts(self) -> Dict[str, int]:
+        """Count the stored movies, e.g. for the metrics endpoint.
+
+        :return: The amount of stored movies, of liked and not deleted movies, and of deleted movies
+        """
+        values: List[MovieAttributes] = list(self.values())
+        return {
+            "stored": len(values),
+            "liked": sum(1 for attributes in values if attributes.liked and not attributes.deleted),
+            "deleted": sum(1 for attributes in values if attributes.deleted),
+        }
+
+    def set_liked(self, key: int, liked: bool):
+        """Set the liked status of the movie corresponding to the key, keeping its other attributes.
+
+        :param key: The key to set the status for
+        :param liked: The new liked status
+        """
+        attributes: MovieAttributes = self.get(key, MovieAttributes())
+        attributes.liked = liked
+        self[key] = attributes
+
+    def set_deleted(self, key: int, deleted: bool):
+        """Set the deleted status of the movie corresponding to the key, keeping its other attributes.
+
+        :param key: The key to set the status for
+        :param deleted: The new deleted status
+        """
+        attributes: MovieAttributes = self.get(key, MovieAttributes())
+        attributes.deleted = deleted
+        self[key] = attributes
+
+    def update_many(self, items: Mapping[int, MovieAttributes]):
+        """Write the attributes of several movies at once.
+
+        Backends that support it write all of them in a single batch.
+
+        :param items: The new attributes, per key
+        """
+        self.update(items)
+
+    @contextmanager
+    def batch(self):
+        """Apply all reads and writes of the with block to the store atomically.
+
+        No other writer, in any thread or process, changes the store while the block runs.
+        Batches may be nested.
+
+        e.g. ::
+
+            with movies_attributes.batch():
+                if movies_attributes.not_deleted(550):
+                    movies_attributes.set_liked(550, True)
+
+        The default implementation provides no isolation at all, backends override it.
+        """
+        yield
+
+    @property
+    @abc.abstractmethod
+    def version(self) -> int:
+        """A counter that increases whenever an attribute of any movie changes.
+
+        Responses that depend on the attributes include it in their validators,
+        so that any like or delete invalidates them.
+        """
+
+    def close(self):
+        """Release the resources held by the store, if any."""
+        pass
+
+
+class InMemoryMoviesAttributes(MoviesAttributes):
+    """A movie attribute store that keeps the attributes in memory.
+
+    The attributes are lost on API restart and are local to the process,
+    as described by project requirement 6. This is the default store.
+
+    Each movie is stored as a small int of packed attribute flags, rather
+    than as a MovieAttributes object, so a tracked movie costs no more than
+    its dict entry. MovieAttributes snapshots are only created on lookup.
+    The ids of the movies that are liked and not deleted are additionally
+    kept in an incrementally updated index set, so listing the likes takes
+    time proportional to the amount of liked movies, rather than to the
+    amount of tracked movies.
+    """
+    _LIKED: int = 1
+    _DELETED: int = 2
+
+    def __init__(self):
+        self._flags: dict[int, int] = {}
+        self._liked_index: set[int] = set()
+        self._deleted_count: int = 0
+        # Starts at the current time, so that the versions of a restarted API never repeat earlier ones
+        self._version: int = time.time_ns()
+        # Writes update both the flags and the index, which must stay consistent.
+        # Reentrant, so that the writes of a batch can take it again.
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _pack(attributes: MovieAttributes) -> int:
+        return (InMemoryMoviesAttributes._LIKED if attributes.liked else 0) \
+            | (InMemoryMoviesAttributes._DELETED if attributes.deleted else 0)
+
+    @staticmethod
+    def _unpack(flags: int) -> MovieAttributes:
+        return MovieAttributes(
+            liked=bool(flags & InMemoryMoviesAttributes._LIKED),
+            deleted=bool(flags & InMemoryMoviesAttributes._DELETED)
+        )
+
+    def _write(self, key: int, flags: int):
+        """Store the flags of a movie and update the index accordingly. Requires the lock to be held."""
+        previous_flags: Optional[int] = self._flags.get(key, None)
+        if previous_flags != flags:
+            self._version += 1
+            self._deleted_count += bool(flags & self._DELETED) - bool((previous_flags or 0) & self._DELETED)
+        self._flags[key] = flags
+        if flags == self._LIKED:
+            self._liked_index.add(key)
+        else:
+            self._liked_index.discard(key)
+
+    def __getitem__(self, key: int) -> MovieAttributes:
+        return self._unpack(self._flags[key])
+
+    def __setitem__(self, key: int, value: MovieAttributes):
+        with self._lock:
+            self._write(key, self._pack(value))
+
+    def __delitem__(self, key: int):
+        with self._lock:
+            flags: int = self._flags.pop(key)
+            self._deleted_count -= bool(flags & self._DELETED)
+            self._liked_index.discard(key)
+            self._version += 1
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._flags
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(list(self._flags))
+
+    def __len__(self) -> int:
+        return len(self._flags)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())})"
+
+    def is_deleted(self, key: int) -> bool:
+        return bool(self._flags.get(key, 0) & self._DELETED)
+
+    def is_liked(self, key: int) -> bool:
+        return bool(self._flags.get(key, 0) & self._LIKED)
+
+    def prune_deleted_keys(self, keys: Iterable[int]) -> List[int]:
+        flags = self._flags
+        return [key for key in keys if not flags.get(key, 0) & self._DELETED]
+
+    def liked_keys(self) -> List[int]:
+        with self._lock:
+            liked_keys: List[int] = list(self._liked_index)
+        liked_keys.sort()
+        return liked_keys
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {"stored": len(self._flags), "liked": len(self._liked_index), "deleted": self._deleted_count}
+
+    def set_liked(self, key: int, liked: bool):
+        with self._lock:
+            flags: int = self._flags.get(key, 0)
+            self._write(key, flags | self._LIKED if liked else flags & ~self._LIKED)
+
+    def set_deleted(self, key: int, deleted: bool):
+        with self._lock:
+            flags: int = self._flags.get(key, 0)
+            self._write(key, flags | self._DELETED if deleted else flags & ~self._DELETED)
+
+    def update_many(self, items: Mapping[int, MovieAttributes]):
+        packed_items = [(key, self._pack(value)) for key, value in items.items()]
+        with self._lock:
+            for key, flags in packed_items:
+                self._write(key, flags)
+
+    @contextmanager
+    def batch(self):
+        with self._lock:
+            yield
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+
+class _ThreadConnection(object):
+    """The SQLite connection of a single thread, closed once the thread ends and its thread local is dropped."""
+    __slots__ = ("connection", "close", "__weakref__")
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection: sqlite3.Connection = connection
+        # Must not reference the holder itself, or it would never be collected
+        self.close: weakref.finalize = weakref.finalize(self, connection.close)
+
+
+class SQLiteMoviesAttributes(MoviesAttributes):
+    """A movie attribute store that persists the attributes in an SQLite database.
+
+    The database runs in write-ahead-log mode, so any amount of threads and
+    processes, e.g. the workers of a gunicorn server, can read the same store
+    concurrently while one of them writes. Every thread of every process uses
+    its own connection, which is closed when the thread ends, so that servers
+    with a thread per request do not run out of file descriptors. Single
+    attribute changes are written with an atomic upsert, so concurrent likes
+    and deletes of the same movie from different processes never overwrite
+    each other.
+
+    e.g. ::
+
+        movies_attributes = SQLiteMoviesAttributes("instance/movies_attributes.sqlite3")
+        movies_attributes.set_deleted(550, True)
+        movies_attributes.is_deleted(550)  # True, in every process using the same file
+    """
+    # SQLite limits the amount of host parameters of a single statement
+    _MAX_VARIABLES: int = 900
+
+    def __init__(self, path: str, busy_timeout: float=MoviesAttributesDefaults.SQLITE_BUSY_TIMEOUT):
+        """
+        :param path: The path of the database file, created if it does not exist
+        :param busy_timeout: The max time to wait for a lock held by another connection, in seconds
+        """
+        self.path: str = path
+        self.busy_timeout: float = busy_timeout
+        self._local = threading.local()
+        # Weak, so that the connections of finished threads are closed by their finalizers
+        self._connections: "weakref.WeakSet[_ThreadConnection]" = weakref.WeakSet()
+        self._connections_lock = threading.Lock()
+        self._pid: int = os.getpid()
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS movie_attributes (
+                movie_id INTEGER PRIMARY KEY,
+                liked INTEGER NOT NULL DEFAULT 0,
+                deleted INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        # Lets liked_keys read only the liked movies, rather than scan the whole table
+        connection.execute("""
+            CREATE INDEX IF NOT EXISTS movie_attributes_liked
+            ON movie_attributes (movie_id) WHERE liked = 1 AND deleted = 0
+        """)
+        # The version is kept in the database, so that every process sees the changes of the others.
+        # Triggers bump it in the same transaction as the change itself.
+        connection.executescript("""
+            CREATE TABLE IF NOT EXISTS movie_attributes_version (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                version INTEGER NOT NULL
+            );
+            CREATE TRIGGER IF NOT EXISTS movie_attributes_inserted AFTER INSERT ON movie_attributes
+            BEGIN
+                UPDATE movie_attributes_version SET version = version + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS movie_attributes_updated AFTER UPDATE ON movie_attributes
+            WHEN OLD.liked IS NOT NEW.liked OR OLD.deleted IS NOT NEW.deleted
+            BEGIN
+                UPDATE movie_attributes_version SET version = version + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS movie_attributes_deleted AFTER DELETE ON movie_attributes
+            BEGIN
+                UPDATE movie_attributes_version SET version = version + 1;
+            END;
+        """)
+        # Starts at the current time, so that the versions of a recreated database never repeat earlier ones
+        connection.execute("INSERT OR IGNORE INTO movie_attributes_version (id, version) VALUES (0, ?)", (time.time_ns(),))
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection of the calling thread, opening it if necessary.
+
+        Connections are never shared with forked child processes, which
+        open their own connections instead. The inherited connections are
+        left alone, as closing them could interfere with the parent's.
+        """
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            for inherited in list(self._connections):
+                inherited.close.detach()
+            self._local = threading.local()
+            self._connections = weakref.WeakSet()
+
+        holder: Optional[_ThreadConnection] = getattr(self._local, "holder", None)
+        if holder is None:
+            # Autocommit mode, transactions are started explicitly. The connection is only
+            # used by its own thread, but may be closed by another one, see close.
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False)
+            # Durable at every checkpoint, rather than at every commit, which is safe in WAL mode
+            connection.execute("PRAGMA synchronous=NORMAL")
+            holder = self._local.holder = _ThreadConnection(connection)
+            with self._connections_lock:
+                self._connections.add(holder)
+        return holder.connection
+
+    def __getitem__(self, key: int) -> MovieAttributes:
+        row = self._connection().execute(
+            "SELECT liked, deleted FROM movie_attributes WHERE movie_id = ?", (key,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return MovieAttributes(liked=bool(row[0]), deleted=bool(row[1]))
+
+    def __setitem__(self, key: int, value: MovieAttributes):
+        self.update_many({key: value})
+
+    def __delitem__(self, key: int):
+        cursor = self._connection().execute("DELETE FROM movie_attributes WHERE movie_id = ?", (key,))
+        if cursor.rowcount == 0:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return self._connection().execute(
+            "SELECT 1 FROM movie_attributes WHERE movie_id = ?", (key,)
+        ).fetchone() is not None
+
+    def __iter__(self) -> Iterator[int]:
+        rows = self._connection().execute("SELECT movie_id FROM movie_attributes ORDER BY movie_id").fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM movie_attributes").fetchone()[0]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.path!r})"
+
+    def items(self) -> List[tuple]:
+        rows = self._connection().execute(
+            "SELECT movie_id, liked, deleted FROM movie_attributes ORDER BY movie_id"
+        ).fetchall()
+        return [(row[0], MovieAttributes(liked=bool(row[1]), deleted=bool(row[2]))) for row in rows]
+
+    def is_deleted(self, key: int) -> bool:
+        return self._flag("deleted", key)
+
+    def is_liked(self, key: int) -> bool:
+        return self._flag("liked", key)
+
+    def prune_deleted_keys(self, keys: Iterable[int]) -> List[int]:
+        keys = list(keys)
+        deleted: set = set()
+        connection = self._connection()
+        for start in range(0, len(keys), self._MAX_VARIABLES):
+            chunk = keys[start:start + self._MAX_VARIABLES]
+            rows = connection.execute(
+                "SELECT movie_id FROM movie_attributes WHERE deleted = 1 AND movie_id IN "
+                f"({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            deleted.update(row[0] for row in rows)
+        return [key for key in keys if key not in deleted]
+
+    def liked_keys(self) -> List[int]:
+        rows = self._connection().execute(
+            "SELECT movie_id FROM movie_attributes WHERE liked = 1 AND deleted = 0 ORDER BY movie_id"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        stored, liked, deleted = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(liked AND NOT deleted), 0), COALESCE(SUM(deleted), 0) FROM movie_attributes"
+        ).fetchone()
+        return {"stored": stored, "liked": liked, "deleted": deleted}
+
+    def set_liked(self, key: int, liked: bool):
+        self._connection().execute(
+            "INSERT INTO movie_attributes (movie_id, liked) VALUES (?, ?) "
+            "ON CONFLICT (movie_id) DO UPDATE SET liked = excluded.liked", (key, int(liked))
+        )
+
+    def set_deleted(self, key: int, deleted: bool):
+        self._connection().execute(
+            "INSERT INTO movie_attributes (movie_id, deleted) VALUES (?, ?) "
+            "ON CONFLICT (movie_id) DO UPDATE SET deleted = excluded.deleted", (key, int(deleted))
+        )
+
+    def update_many(self, items: Mapping[int, MovieAttributes]):
+        """Write the attributes of several movies in a single transaction."""
+        with self.batch():
+            self._connection().executemany(
+                "INSERT INTO movie_attributes (movie_id, liked, deleted) VALUES (?, ?, ?) "
+                "ON CONFLICT (movie_id) DO UPDATE SET liked = excluded.liked, deleted = excluded.deleted",
+                [(key, int(value.liked), int(value.deleted)) for key, value in items.items()]
+            )
+
+    @contextmanager
+    def batch(self):
+        """Run the with block in a single transaction, which holds the database's write lock from the start."""
+        connection = self._connection()
+        if connection.in_transaction:
+            yield
+            return
+
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    @property
+    def version(self) -> int:
+        return self._connection().execute("SELECT version FROM movie_attributes_version").fetchone()[0]
+
+    def close(self):
+        """Close the connections of all threads of the current process."""
+        with self._connections_lock:
+            connections, self._connections = list(self._connections), weakref.WeakSet()
+        for holder in connections:
+            holder.close()
+        self._local = threading.local()
+
+    def _flag(self, column: str, key: int) -> bool:
+        """Get a single boolean attribute column of a movie, `False` if the movie is not part of the store."""
+        row = self._connection().execute(
+            f"SELECT {column} FROM movie_attributes WHERE movie_id = ?", (key,)
+        ).fetchone()
+        return row is not None and bool(row[0])
+
+
+def create_movies_attributes(config: Mapping[str, Any], instance_path: str) -> MoviesAttributes:
+    """Create the movie attribute store described by the app config.
+
+    The ``MOVIES_ATTRIBUTES_BACKEND`` config key selects the backend, either
+    "memory" or "sqlite". A relative ``MOVIES_ATTRIBUTES_SQLITE_PATH`` is
+    resolved against the app's instance folder, which is created if necessary.
+
+    :param config: The app config
+    :param instance_path: The path of the app's instance folder
+    :return: The new store
+    """
+    backend: str = config.get("MOVIES_ATTRIBUTES_BACKEND", MoviesAttributesDefaults.BACKEND)
+    if backend == "memory":
+        return InMemoryMoviesAttributes()
+    if backend == "sqlite":
+        path: str = config.get("MOVIES_ATTRIBUTES_SQLITE_PATH", MoviesAttributesDefaults.SQLITE_PATH)
+        if not os.path.isabs(path):
+            os.makedirs(instance_path, exist_ok=True)
+            path = os.path.join(instance_path, path)
+        return SQLiteMoviesAttributes(
+            path, config.get("MOVIES_ATTRIBUTES_SQLITE_BUSY_TIMEOUT", MoviesAttributesDefaults.SQLITE_BUSY_TIMEOUT)
+        )
+    raise ValueError(f"Unknown MOVIES_ATTRIBUTES_BACKEND {backend!r}, expected 'memory' or 'sqlite'")
@@ -0,0 +1,179 @@
+import threading
+
+from collections import OrderedDict
+from flask import current_app
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+
+class PageMapDefaults:
+    """A class of constants that specifies the fallback values of the page
+    map configuration, used if the app config does not set them."""
+    # The max amount of paginated TMDB lists to keep the pages of, e.g. one per discover query
+    MAX_LISTS: int = 256
+
+
+class _ListPages(object):
+    """The known pages of a single paginated TMDB movie list."""
+    __slots__ = ("total_pages", "page_size", "movie_ids", "deleted_ids")
+
+    def __init__(self):
+        self.total_pages: int = 0
+        self.page_size: int = 0
+        self.movie_ids: Dict[int, Tuple[int, ...]] = {}
+        self.deleted_ids: Dict[int, Set[int]] = {}
+
+
+class PageMap:
+    """A thread-safe map of the movies on each page of the paginated TMDB movie lists, and which of them are deleted.
+
+    The collections fetch TMDB pages until they collected enough non-deleted
+    movies. Without knowing how many movies of each page are deleted, they
+    can only fetch as many pages as would be needed without deletions, and
+    then fetch another round for the movies that turned out to be deleted, and
+    so on. With many deleted movies, that is a long tail of sequential rounds.
+
+    This map records the movie ids of every fetched page, per list, e.g. the
+    popular movies or a discover query, and is notified of every deleted movie
+    through :func:`note_deleted`. :func:`plan` then computes all pages that
+    are needed to reach an amount of non-deleted movies upfront, so that they
+    can be fetched in a single concurrent round. A page is re-recorded every
+    time it is fetched, so the map follows TMDB's changes to the lists.
+
+    The map is only a hint: the collections still filter every page, and fetch
+    another round if the plan fell short, e.g. because of deletions made by
+    another worker process.
+
+    The map is created lazily, once per flask app, and stored in the app's
+    ``extensions`` dict. It keeps the pages of at most ``PAGE_MAP_MAX_LISTS``
+    lists, and drops the least recently used lists first.
+
+    e.g. ::
+
+        pages = PageMap.current().plan("popular", start_page=1, start_index=0, amount=200)
+    """
+    EXTENSION_KEY: str = "page_map"
+    _creation_lock: threading.Lock = threading.Lock()
+
+    def __init__(self, max_lists: int):
+        self.max_lists: int = max_lists
+
+        self._lists: OrderedDict[str, _ListPages] = OrderedDict()
+        # The pages every recorded movie is on, to update them when the movie is deleted
+        self._pages_of_movie: Dict[int, Set[Tuple[str, int]]] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+        self.plans: int = 0
+        self.unplanned: int = 0
+
+    @staticmethod
+    def current() -> "PageMap":
+        """Get the page map of the current app, creating it if necessary.
+
+        :return: The page map
+        """
+        extensions: dict = current_app.extensions
+        page_map = extensions.get(PageMap.EXTENSION_KEY, None)
+        if page_map is None:
+            with PageMap._creation_lock:
+                page_map = extensions.get(PageMap.EXTENSION_KEY, None)
+                if page_map is None:
+                    page_map = PageMap(current_app.config.get("PAGE_MAP_MAX_LISTS", PageMapDefaults.MAX_LISTS))
+                    extensions[PageMap.EXTENSION_KEY] = page_map
+        return page_map
+
+    def record(self, list_key: str, page: int, movie_ids: Sequence[int], deleted_ids: Set[int], total_pages: int):
+        """Record the movies of a fetched page.
+
+        :param list_key: The key of the paginated list, e.g. "popular" or the discover query string
+        :param page: The page number
+        :param movie_ids: The ids of all movies of the page, in page order, including the deleted movies
+        :param deleted_ids: The ids of the deleted movies of the page
+        :param total_pages: The total amount of pages of the list that TMDB serves
+        """
+        with self._lock:
+            pages = self._lists.get(list_key, None)
+            if pages is None:
+                pages = self._lists[list_key] = _ListPages()
+                while len(self._lists) > self.max_lists:
+                    self._drop(*self._lists.popitem(last=False))
+            else:
+                self._lists.move_to_end(list_key)
+
+            self._forget_page(list_key, page, pages.movie_ids.get(page, ()))
+            for movie_id in movie_ids:
+                self._pages_of_movie.setdefault(movie_id, set()).add((list_key, page))
+
+            pages.total_pages = total_pages
+            pages.page_size = max(pages.page_size, len(movie_ids))
+            pages.movie_ids[page] = tuple(movie_ids)
+            pages.deleted_ids[page] = set(deleted_ids)
+
+    def note_deleted(self, movie_id: int):
+        """Mark a movie as deleted on every recorded page it is on.
+
+        :param movie_id: The id of the deleted movie
+        """
+        with self._lock:
+            for list_key, page in self._pages_of_movie.get(movie_id, ()):
+                self._lists[list_key].deleted_ids[page].add(movie_id)
+
+    def plan(self, list_key: str, start_page: int, start_index: int, amount: int) -> List[int]:
+        """Compute the pages that are needed to collect *amount* non-deleted movies, starting at a position.
+
+        Pages that were never recorded are assumed to contain no deleted movies.
+
+        :param list_key: The key of the paginated list
+        :param start_page: The page of the first movie to collect
+        :param start_index: The index of the first movie to collect on its page, including deleted movies
+        :param amount: The amount of movies to collect
+        :return: The consecutive page numbers to fetch, or an empty list if the start page was never recorded
+        """
+        with self._lock:
+            pages = self._lists.get(list_key, None)
+            if pages is None or start_page not in pages.movie_ids or pages.page_size == 0:
+                self.unplanned += 1
+                return []
+            self._lists.move_to_end(list_key)
+            self.plans += 1
+
+            planned: List[int] = []
+            remaining: int = amount
+            page: int = start_page
+            while remaining > 0 and page <= pages.total_pages:
+                planned.append(page)
+                movie_ids: Optional[Tuple[int, ...]] = pages.movie_ids.get(page, None)
+                if movie_ids is None:
+                    remaining -= pages.page_size
+                else:
+                    deleted_ids: Set[int] = pages.deleted_ids[page]
+                    first_index: int = start_index if page == start_page else 0
+                    remaining -= sum(1 for movie_id in movie_ids[first_index:] if movie_id not in deleted_ids)
+                page += 1
+            return planned
+
+    def stats(self) -> Dict[str, float]:
+        """Get a snapshot of the page map counters.
+
+        :return: The amount of planned and unplanned collections, and the amount of recorded lists and pages
+        """
+        with self._lock:
+            return {
+                "plans": self.plans,
+                "unplanned": self.unplanned,
+                "lists": len(self._lists),
+                "pages": sum(len(pages.movie_ids) for pages in self._lists.values()),
+            }
+
+    def _drop(self, list_key: str, pages: _ListPages):
+        """Forget the pages of an evicted list, the lock must be held by the caller."""
+        for page, movie_ids in pages.movie_ids.items():
+            self._forget_page(list_key, page, movie_ids)
+
+    def _forget_page(self, list_key: str, page: int, movie_ids: Sequence[int]):
+        """Remove a page from the pages of its movies, the lock must be held by the caller."""
+        for movie_id in movie_ids:
+            pages_of_movie = self._pages_of_movie.get(movie_id, None)
+            if pages_of_movie is not None:
+                pages_of_movie.discard((list_key, page))
+                if len(pages_of_movie) == 0:
+                    del self._pages_of_movie[movie_id]
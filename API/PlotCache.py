@@ -0,0 +1,132 @@
+import hashlib
+import json
+import threading
+
+from collections import OrderedDict
+from flask import current_app
+from typing import Dict, List, Optional, Tuple
+
+
+class PlotCacheDefaults:
+    """A class of constants that specifies the fallback values of the plot
+    cache configuration, used if the app config does not set them."""
+    MAX_BYTES: int = 32 * 1024 * 1024
+
+
+class PlotCache:
+    """A bounded, thread-safe, in-process cache of rendered plots, addressed by their content.
+
+    A plot is fully determined by its data, its image format and the renderer,
+    so its cache key is a hash of exactly those. Cached plots therefore never go
+    stale and need no TTL. The key doubles as the plot's strong ETag. The cache
+    is bounded in the total byte size of the cached plots, and evicts the least
+    recently used plots first.
+
+    The cache is created lazily, once per flask app, and stored in the app's
+    ``extensions`` dict. Its size is configured through the ``PLOT_CACHE_MAX_BYTES``
+    app config key.
+
+    e.g. ::
+
+        key = PlotCache.key(movies_data, "webp", "local")
+        image = PlotCache.current().get(key)
+    """
+    EXTENSION_KEY: str = "plot_cache"
+    # Bump this whenever the rendered output of the same data changes, so that the ETags change with it
+    RENDER_VERSION: int = 1
+    _creation_lock: threading.Lock = threading.Lock()
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes: int = max_bytes
+
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._bytes: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    @staticmethod
+    def current() -> "PlotCache":
+        """Get the plot cache of the current app, creating it if necessary.
+
+        :return: The plot cache
+        """
+        extensions: dict = current_app.extensions
+        cache = extensions.get(PlotCache.EXTENSION_KEY, None)
+        if cache is None:
+            with PlotCache._creation_lock:
+                cache = extensions.get(PlotCache.EXTENSION_KEY, None)
+                if cache is None:
+                    cache = PlotCache(current_app.config.get("PLOT_CACHE_MAX_BYTES", PlotCacheDefaults.MAX_BYTES))
+                    extensions[PlotCache.EXTENSION_KEY] = cache
+        return cache
+
+    @staticmethod
+    def key(movies_data: List[Tuple[str, float]], image_format: str, backend: str) -> str:
+        """Get the content address of a plot.
+
+        :param movies_data: The movies' data to plot, of the format `[ (label, avg. score), ...]`, in plot order
+        :param image_format: The image format of the plot
+        :param backend: The backend that renders the plot
+        :return: The cache key, a hex digest
+        """
+        content: str = json.dumps([PlotCache.RENDER_VERSION, backend, image_format, movies_data], separators=(",", ":"))
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get the cached plot of the key.
+
+        :param key: The cache key
+        :return: The encoded plot, or None if it is not cached
+        """
+        with self._lock:
+            image = self._entries.get(key, None)
+            if image is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key: str, image: bytes):
+        """Store a plot in the cache. Plots that are larger than the entire cache are ignored.
+
+        :param key: The cache key
+        :param image: The encoded plot
+        """
+        if len(image) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            self._entries[key] = image
+            self._bytes += len(image)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove all plots from the cache. The counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Get a snapshot of the cache counters.
+
+        :return: The counters, the current size and the hit ratio of the cache
+        """
+        with self._lock:
+            lookups: int = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hit_ratio": self.hits / lookups if lookups > 0 else 0.0,
+            }
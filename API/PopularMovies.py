@@ -3,7 +3,11 @@ from flask_restful import reqparse
 from flask_apispec import MethodResource, marshal_with, marshal_with, doc
 
 from .utils import catch_unexpected_exceptions
-from .exceptions import NotOKTMDB
+from .exceptions import NotOKTMDB, InvalidCursor
+from .conditional import ResponseValidator
+from .projection import ProjectionParameters, add_projection_arguments, parse_fields, project_movies
+from .streaming import wants_ndjson, ndjson_response
+from .pagination import collect_movie_pages, stream_movie_pages, decode_cursor, encode_cursor, PagePosition
 from .APIResponses import make_response_message, make_response_error, GenericResponseMessages as E_MSG, TMDBResponseMessages as E_TMDB
 from .APIClients import TMDBClient
 from .Movies import Movies
@@ -17,6 +21,7 @@ class PopularMoviesParameters(object):
     specified in their addition as arguments to the reqparser below.
     """
     amount: str = "amount"
+    cursor: str = "cursor"
 
 """The query arguments passed to this endpoint facilitate
 features related to retrieving the list of the first X
@@ -33,6 +38,9 @@ section of the README.
 parser = reqparse.RequestParser()
 parser.add_argument(PopularMoviesParameters.amount, type=int, required=True, location=('args',),
                     help="The amount of popular movies to retrieve, as a positive integer")
+parser.add_argument(PopularMoviesParameters.cursor, type=str, required=False, location=('args',),
+                    help="The opaque cursor to continue at, as returned under the 'next' key of the previous response. Omit it to start at the first movie")
+add_projection_arguments(parser)
 
 
 class PopularMovies(MethodResource):
@@ -57,49 +65,30 @@ class PopularMovies(MethodResource):
         """
         args = parser.parse_args()
         try:
-            from . import movies_attributes
             popular_x: int = args[PopularMoviesParameters.amount]
 
             if popular_x < 0:
                 return make_response_error(E_MSG.MALFORMED_REQ,
                                             f"The {PopularMoviesParameters.amount} parameter must be positive",
                                             400)
-
-            # Setup
-            popular_x_movies = []
-            remaining_movies: int = popular_x
-            total_pages_available: int = 1
-            current_page: int = 1
-
-            # The TMDB popular API responds with a single fixed size page at a time
-            while remaining_movies > 0 and current_page <= total_pages_available:
-                # Query TMDB API
-                tmdb_resp = TMDBClient.get_popular_page(page=current_page)
-
-                if not tmdb_resp.ok:
-                    raise NotOKTMDB()
-
-                tmdb_resp_json = tmdb_resp.json()
-                results = tmdb_resp_json["results"]
-                results = [
-                    result
-                    for result in results
-                    if not movies_attributes.is_deleted(result["id"])
-                ]
-                results = results[:remaining_movies]
-                for movie in results:
-                    movie_id: int = movie["id"]
-                    movie["liked"] = movies_attributes.is_liked(movie_id)
-                total_pages_available = tmdb_resp_json["total_pages"]
-
-                # Bookkeeping
-                remaining_movies -= len(results)
-                current_page += 1
-
-                # Aggregate results
-                popular_x_movies.extend(results)
-
-            return make_response_message(E_MSG.SUCCESS, 200, result=popular_x_movies)
+            try:
+                start: PagePosition = decode_cursor("popularmovies", args[PopularMoviesParameters.cursor])
+            except InvalidCursor as e:
+                return make_response_error(E_MSG.MALFORMED_REQ, f"Invalid {PopularMoviesParameters.cursor} parameter: {e}", 400)
+            fields = parse_fields(args[ProjectionParameters.fields])
+
+            if wants_ndjson():
+                # Stream the movies page by page, the first page is fetched up front, to respond with its errors
+                movie_pages = stream_movie_pages(TMDBClient.get_popular_page, popular_x, start, "popular")
+                return ndjson_response(next(movie_pages), movie_pages, "query the Movies collection", fields)
+
+            # Query the TMDB API, which responds with a single fixed size page at a time
+            validator = ResponseValidator("popularmovies")
+            popular_x_movies, next_position = collect_movie_pages(TMDBClient.get_popular_page, popular_x, validator, start, "popular")
+            if validator.not_modified():
+                return validator.not_modified_response()
+
+            return validator.apply(make_response_message(E_MSG.SUCCESS, 200, result=project_movies(popular_x_movies, fields), next=encode_cursor("popularmovies", next_position)))
         except JSONDecodeError as e:
             return make_response_error(E_MSG.ERROR, E_TMDB.ERROR_JSON_DECODE, 502)
         except NotOKTMDB as e:
@@ -0,0 +1,201 @@
+import asyncio
+import email.utils
+import threading
+import time
+
+from typing import Dict, Optional
+
+from .exceptions import TMDBRateLimited
+
+
+class RateLimiterDefaults:
+    """A class of constants that specifies the fallback values of the upstream
+    rate limiter configuration, used if the app config does not set them."""
+    # The sustained amount of requests per second, and the amount that may be sent in a burst
+    RATE: float = 40.0
+    BURST: int = 40
+    MIN_CONCURRENCY: int = 2
+    MAX_CONCURRENCY: int = 32
+    # Responses slower than this, in seconds, count as a sign of congestion
+    LATENCY_TARGET: float = 2.0
+    # The factor the concurrency limit is multiplied with on congestion
+    BACKOFF: float = 0.5
+    # The max amount of seconds a request is queued, including its retries after a 429
+    MAX_WAIT: float = 5.0
+    # The amount of seconds to pause after a 429 without a usable Retry-After header
+    RETRY_AFTER: float = 1.0
+    # The interval at which queued coroutines check for a free slot, in seconds
+    POLL_INTERVAL: float = 0.01
+
+
+class RateLimiter:
+    """A thread-safe limiter of the rate and the concurrency of the calls to an upstream API, e.g. TMDB.
+
+    Every call first has to acquire a permit, which takes a token from a token
+    bucket that refills at *rate* tokens per second, up to *burst* tokens, and a
+    slot of the concurrency limit. Calls that can not acquire a permit right
+    away are queued until their deadline, after which :class:`TMDBRateLimited`
+    is raised, rather than sending the call anyway.
+
+    The concurrency limit adapts to the upstream API with AIMD (additive
+    increase, multiplicative decrease). Every fast, successful call raises it
+    by about one per limit's worth of calls, while a 429, a server error, a
+    transport error or a call slower than *latency_target* multiplies it by
+    *backoff*. Calls that started before the last decrease can not decrease it
+    again, so a single burst of failures decreases it only once.
+
+    A 429 pauses all calls until its Retry-After header allows them again.
+
+    Both threads, through :func:`acquire`, and coroutines, through
+    :func:`acquire_async`, may share a single limiter, e.g. the request
+    threads and the async runtime of a single app.
+
+    e.g. ::
+
+        limiter = RateLimiter(rate=40, burst=40, min_concurrency=2, max_concurrency=32)
+        started_at = limiter.acquire(deadline=time.monotonic() + 5)
+        try:
+            response = session.get(url)
+        except requests.RequestException:
+            limiter.release(started_at, None)
+            raise
+        limiter.release(started_at, response.status_code, response.headers.get("Retry-After"))
+    """
+    def __init__(self, rate: float, burst: int, min_concurrency: int, max_concurrency: int,
+                 latency_target: float=RateLimiterDefaults.LATENCY_TARGET, backoff: float=RateLimiterDefaults.BACKOFF):
+        self.rate: float = rate
+        self.burst: int = burst
+        self.min_concurrency: int = min_concurrency
+        self.max_concurrency: int = max_concurrency
+        self.latency_target: float = latency_target
+        self.backoff: float = backoff
+
+        self.limit: float = float(max_concurrency)
+        self._tokens: float = float(burst)
+        self._refilled_at: float = time.monotonic()
+        self._paused_until: float = 0.0
+        self._decreased_at: float = 0.0
+        self._in_flight: int = 0
+        self._condition: threading.Condition = threading.Condition()
+
+        self.acquired: int = 0
+        self.queued: int = 0
+        self.rejected: int = 0
+        self.throttled: int = 0
+        self.congested: int = 0
+
+    def acquire(self, deadline: float) -> float:
+        """Wait for a permit to call the upstream API.
+
+        May raise a `TMDBRateLimited` exception if no permit is available before the deadline.
+
+        :param deadline: The ``time.monotonic`` time to give up at
+        :return: The ``time.monotonic`` time the permit was acquired at, to pass to :func:`release`
+        """
+        with self._condition:
+            wait: Optional[float] = self._try_acquire()
+            if wait is not None:
+                self.queued += 1
+            while wait is not None:
+                remaining: float = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.rejected += 1
+                    raise TMDBRateLimited()
+                # A wait of 0 means the concurrency limit is reached, so wait for a release
+                self._condition.wait(min(wait, remaining) if wait > 0 else remaining)
+                wait = self._try_acquire()
+            return time.monotonic()
+
+    async def acquire_async(self, deadline: float) -> float:
+        """The asyncio counterpart of :func:`acquire`, which never blocks the event loop."""
+        with self._condition:
+            wait: Optional[float] = self._try_acquire()
+            if wait is not None:
+                self.queued += 1
+        while wait is not None:
+            remaining: float = deadline - time.monotonic()
+            if remaining <= 0:
+                with self._condition:
+                    self.rejected += 1
+                raise TMDBRateLimited()
+            await asyncio.sleep(min(wait if wait > 0 else RateLimiterDefaults.POLL_INTERVAL, remaining))
+            with self._condition:
+                wait = self._try_acquire()
+        return time.monotonic()
+
+    def release(self, started_at: float, status_code: Optional[int], retry_after: Optional[str]=None):
+        """Return the permit of a finished call, and adapt the limits to its outcome.
+
+        :param started_at: The time the permit was acquired at, as returned by :func:`acquire`
+        :param status_code: The status code of the response, or None if the call failed on the transport level
+        :param retry_after: The Retry-After header of the response, if any
+        """
+        now: float = time.monotonic()
+        with self._condition:
+            self._in_flight -= 1
+            if status_code == 429:
+                self.throttled += 1
+                self._paused_until = max(self._paused_until, now + self._retry_after_seconds(retry_after))
+                # Whatever was left in the bucket evidently exceeds the quota
+                self._tokens = 0.0
+
+            congested: bool = status_code is None or status_code == 429 or status_code >= 500 or \
+                now - started_at > self.latency_target
+            if not congested:
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+            elif started_at >= self._decreased_at:
+                self.congested += 1
+                self.limit = max(float(self.min_concurrency), self.limit * self.backoff)
+                self._decreased_at = now
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, float]:
+        """Get a snapshot of the limiter counters.
+
+        :return: The counters, the current concurrency limit, and the calls in flight
+        """
+        with self._condition:
+            return {
+                "acquired": self.acquired,
+                "queued": self.queued,
+                "rejected": self.rejected,
+                "throttled": self.throttled,
+                "congested": self.congested,
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+            }
+
+    def _try_acquire(self) -> Optional[float]:
+        """Take a permit if one is available, the lock must be held by the caller.
+
+        :return: None if a permit was taken, else the seconds until a token becomes available, or 0 if the concurrency limit is reached
+        """
+        now: float = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._in_flight >= int(self.limit):
+            return 0.0
+
+        self._tokens = min(float(self.burst), self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+        if self._tokens < 1.0:
+            return (1.0 - self._tokens) / self.rate
+
+        self._tokens -= 1.0
+        self._in_flight += 1
+        self.acquired += 1
+        return None
+
+    @staticmethod
+    def _retry_after_seconds(retry_after: Optional[str]) -> float:
+        """Parse a Retry-After header, which holds either seconds or an http date, into seconds from now."""
+        if retry_after is None:
+            return RateLimiterDefaults.RETRY_AFTER
+        retry_after = retry_after.strip()
+        if retry_after.isdigit():
+            return float(retry_after)
+        try:
+            retry_at = email.utils.parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return RateLimiterDefaults.RETRY_AFTER
+        return max(0.0, retry_at.timestamp() - time.time())
@@ -0,0 +1,223 @@
+import asyncio
+import threading
+import time
+import requests
+
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+
+class _CacheEntry(object):
+    """A single cached response, along with its bookkeeping."""
+    __slots__ = ("response", "size", "stored_at", "expires_at")
+
+    def __init__(self, response: requests.Response, size: int, stored_at: float, expires_at: float):
+        self.response = response
+        self.size = size
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """A bounded, thread-safe, in-process cache of upstream responses.
+
+    Entries expire after a TTL that is chosen per call, so that each
+    upstream endpoint can be cached for as long as its data stays relevant.
+    The cache is bounded both in its amount of entries and in the total
+    byte size of the cached response bodies. If either bound is exceeded,
+    the least recently used entries are evicted first.
+
+    Expired entries are not dropped immediately. For *stale_ttl* more
+    seconds, they are still served (stale-while-revalidate), while a single
+    background refresh of that entry is started. Only successful (ok)
+    responses are ever cached.
+
+    Entries that expired for good are no longer served, but are kept until
+    they are evicted or replaced, as the last known good response of their
+    key. They can be served explicitly, e.g. while the upstream API is down,
+    through :func:`get_last_known`.
+
+    e.g. ::
+
+        cache = ResponseCache(max_entries=1000, max_bytes=8 * 1024 * 1024)
+        response = cache.get_or_fetch(url, lambda: session.get(url), ttl=3600, stale_ttl=300)
+    """
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries: int = max_entries
+        self.max_bytes: int = max_bytes
+
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._bytes: int = 0
+        self._refreshing: Set[str] = set()
+        self._lock: threading.Lock = threading.Lock()
+
+        self.hits: int = 0
+        self.stale_hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], requests.Response], ttl: float, stale_ttl: float=0.0) -> requests.Response:
+        """Get the cached response for the key, or fetch and cache it if it is absent or expired.
+
+        Exceptions raised by *fetch* are propagated on a miss. If a background
+        refresh of a stale entry fails, the stale entry is simply kept.
+
+        :param key: The cache key, e.g. the upstream url
+        :param fetch: The function to fetch a fresh response with, on a cache miss
+        :param ttl: The amount of seconds a fetched response stays fresh
+        :param stale_ttl: The amount of seconds an expired response may still be served while it is being refreshed
+        :return: The cached or freshly fetched response
+        """
+        entry, start_refresh = self._lookup(key, stale_ttl)
+        if entry is not None:
+            if start_refresh:
+                threading.Thread(target=self._refresh, args=(key, fetch, ttl), daemon=True).start()
+            return entry.response
+
+        response = fetch()
+        self.put(key, response, ttl)
+        return response
+
+    async def get_or_fetch_async(self, key: str, fetch: Callable[[], Awaitable[requests.Response]], ttl: float, stale_ttl: float=0.0) -> requests.Response:
+        """The asyncio counterpart of :func:`get_or_fetch`, for a *fetch* coroutine function.
+
+        A background refresh of a stale entry is scheduled as a task on the running event loop.
+
+        :param key: The cache key, e.g. the upstream url
+        :param fetch: The coroutine function to fetch a fresh response with, on a cache miss
+        :param ttl: The amount of seconds a fetched response stays fresh
+        :param stale_ttl: The amount of seconds an expired response may still be served while it is being refreshed
+        :return: The cached or freshly fetched response
+        """
+        entry, start_refresh = self._lookup(key, stale_ttl)
+        if entry is not None:
+            if start_refresh:
+                asyncio.ensure_future(self._refresh_async(key, fetch, ttl))
+            return entry.response
+
+        response = await fetch()
+        self.put(key, response, ttl)
+        return response
+
+    def put(self, key: str, response: requests.Response, ttl: float):
+        """Store a response in the cache, if it is cacheable.
+
+        Responses that are not ok, or that are larger than the entire cache, are ignored.
+
+        :param key: The cache key
+        :param response: The response to cache
+        :param ttl: The amount of seconds the response stays fresh
+        """
+        if not response.ok:
+            return
+        size: int = len(response.content)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            now: float = time.monotonic()
+            self._entries[key] = _CacheEntry(response, size, now, now + ttl)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_last_known(self, key: str) -> Optional[Tuple[requests.Response, float]]:
+        """Get the cached response of the key, no matter how long ago it expired.
+
+        :param key: The cache key
+        :return: The response and its age in seconds, or None if the key is not cached
+        """
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is None:
+                return None
+            return entry.response, time.monotonic() - entry.stored_at
+
+    def invalidate(self, key: str):
+        """Remove the entry of the key from the cache, if present.
+
+        :param key: The cache key
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """Remove all entries from the cache. The counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Get a snapshot of the cache counters.
+
+        :return: The counters, the current size and the hit ratio of the cache
+        """
+        with self._lock:
+            lookups: int = self.hits + self.stale_hits + self.misses
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups > 0 else 0.0,
+            }
+
+    def _refresh(self, key: str, fetch: Callable[[], requests.Response], ttl: float):
+        """Refetch a stale entry in the background, keeping the stale entry if that fails."""
+        try:
+            self.put(key, fetch(), ttl)
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    async def _refresh_async(self, key: str, fetch: Callable[[], Awaitable[requests.Response]], ttl: float):
+        """The asyncio counterpart of :func:`_refresh`."""
+        try:
+            self.put(key, await fetch(), ttl)
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _lookup(self, key: str, stale_ttl: float) -> Tuple[Optional[_CacheEntry], bool]:
+        """Look up the entry of the key and update the counters.
+
+        :param key: The cache key
+        :param stale_ttl: The amount of seconds an expired entry may still be served
+        :return: The fresh or stale entry, or None on a miss, and whether the caller should start a refresh of the entry
+        """
+        now: float = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            if now < entry.expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry, False
+            if now < entry.expires_at + stale_ttl:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                if key in self._refreshing:
+                    return entry, False
+                self._refreshing.add(key)
+                return entry, True
+
+            # Kept as the last known good response, until it is replaced or evicted
+            self.misses += 1
+            return None, False
+
+    def _remove(self, key: str):
+        """Remove an entry, the lock must be held by the caller."""
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
@@ -5,6 +5,10 @@ from flask_apispec import MethodResource, marshal_with, marshal_with, doc
 
 from .utils import catch_unexpected_exceptions, require_movie_not_deleted
 from .exceptions import NotOKTMDB
+from .conditional import ResponseValidator
+from .projection import ProjectionParameters, add_projection_arguments, parse_fields, project_movie, project_movies
+from .streaming import wants_ndjson, ndjson_response
+from .pagination import collect_movie_pages, stream_movie_pages
 from .Movie import Movie
 from .APIResponses import GenericResponseMessages as E_MSG, TMDBResponseMessages as E_TMDB, make_response_error, make_response_message
 from .APIClients import TMDBClient
@@ -18,11 +22,14 @@ class SimilarityParameters(object):
     API accepts as query parameters, as well as static methods that construct the
     corresponding query substrings to pass to the TMDB discover movie API.
 
-    Calling the query substring constructors may cause redundant API calls to
-    TMDB, as each of these constructors is fully contained to make for a
-    cleaner and shorter implementation. For example, if a constructor method
-    needs the movie's primary info it will always query TMDB's `/movie/{movie_id}`
-    itself and does not share these results through its return value.
+    The query substring constructors share the subject movie through their
+    *subject_movie* parameter, which is the TMDB response of
+    :func:`TMDBClient.get_movie_with_credits`. That single fused call provides
+    both the primary info and the credits that the constructors need, so
+    applying multiple similarity criteria does not cause redundant API calls
+    to TMDB. The list of all genres is shared likewise, through the
+    *movie_genres* parameter. If either is not passed, a constructor that
+    needs it fetches it itself.
     """
 
     ACTORS = "overlapping_actors"
@@ -35,7 +42,7 @@ class SimilarityParameters(object):
         return list(SimilarityParameters.function_mapping().keys())
     
     @staticmethod
-    def function_mapping() -> dict[str, Callable[[int], str]]:
+    def function_mapping() -> dict[str, Callable[[int, dict, dict, List[dict]], str]]:
         """The mapping from Webservices similarity API query parameters to TMDB discover API query parameters"""
         return {
             SimilarityParameters.ACTORS: SimilarityParameters.get_tmdb_actors_query_substr,
@@ -44,7 +51,38 @@ class SimilarityParameters(object):
         }
 
     @staticmethod
-    def get_tmdb_actors_query_substr(movie_id: int, intermediate_value_store: dict=None) -> str:
+    def fetch_subject_movie(movie_id: int) -> dict:
+        """Fetch the primary info and credits of the subject movie in a single TMDB call.
+
+        May raise a `JSONDecodeError` in case of an erroneous response from TMDB.
+        May raise a `NotOKTMDB` exception if the TMDB response has an invalid
+        status code.
+
+        :param movie_id: The subject movie
+        :return: The subject movie's primary info, with its credits under the key "credits"
+        """
+        tmdb_resp = TMDBClient.get_movie_with_credits(movie_id)
+        if not tmdb_resp.ok:
+            raise NotOKTMDB()
+        return tmdb_resp.json()
+
+    @staticmethod
+    def fetch_movie_genres() -> List[dict]:
+        """Fetch the list of all TMDB movie genres.
+
+        May raise a `KeyError` or a `JSONDecodeError` in case of an erroneous response
+        from TMDB. May raise a `NotOKTMDB` exception if the TMDB response has an invalid
+        status code.
+
+        :return: The list of all movie genres
+        """
+        tmdb_resp = TMDBClient.get_movie_genres()
+        if not tmdb_resp.ok:
+            raise NotOKTMDB()
+        return tmdb_resp.json()["genres"]
+
+    @staticmethod
+    def get_tmdb_actors_query_substr(movie_id: int, intermediate_value_store: dict=None, subject_movie: dict=None, movie_genres: List[dict]=None) -> str:
         """Get the TMDB discovery api query substring for overlapping cast (actors).
 
         May raise a `KeyError` or a `JSONDecodeError` in case of an erroneous response
@@ -53,13 +91,13 @@ class SimilarityParameters(object):
         
         :param movie_id: The movie to select the actors from
         :param intermediate_value_store: A value store to pass up intermediate values of construction the query substring
+        :param subject_movie: The subject movie's primary info and credits, as fetched by :func:`fetch_subject_movie`
+        :param movie_genres: The list of all TMDB movie genres, as fetched by :func:`fetch_movie_genres`
         :return: The query substring
         """
-        tmdb_resp = TMDBClient.get_credits(movie_id)
-        if not tmdb_resp.ok:
-            raise NotOKTMDB()
-        tmdb_resp_json = tmdb_resp.json()
-        cast = tmdb_resp_json["cast"]
+        if subject_movie is None:
+            subject_movie = SimilarityParameters.fetch_subject_movie(movie_id)
+        cast = subject_movie["credits"]["cast"]
         actor_ids: List[int] = [person["id"] for person in cast]
         first_two_actors = [str(id) for id in actor_ids[:2]]
         if intermediate_value_store is not None:
@@ -70,7 +108,7 @@ class SimilarityParameters(object):
         return f"with_cast={','.join(first_two_actors)}"
     
     @staticmethod
-    def get_tmdb_genres_query_substr(movie_id: int, intermediate_value_store: dict=None) -> str:
+    def get_tmdb_genres_query_substr(movie_id: int, intermediate_value_store: dict=None, subject_movie: dict=None, movie_genres: List[dict]=None) -> str:
         """Get the TMDB discovery api query substring for matching genres.
 
         May raise a `KeyError` or a `JSONDecodeError` in case of an erroneous response
@@ -79,22 +117,20 @@ class SimilarityParameters(object):
 
         :param movie_id: The movie to select the genres from
         :param intermediate_value_store: A value store to pass up intermediate values of construction the query substring
+        :param subject_movie: The subject movie's primary info and credits, as fetched by :func:`fetch_subject_movie`
+        :param movie_genres: The list of all TMDB movie genres, as fetched by :func:`fetch_movie_genres`
         :return: The query substring
         """
         # Get wanted movie genres
-        tmdb_resp = TMDBClient.get_movie(movie_id)
-        if not tmdb_resp.ok:
-            raise NotOKTMDB()
-        tmdb_resp_json = tmdb_resp.json()
-        wanted_genre_ids: List[int] = [genre["id"] for genre in tmdb_resp_json["genres"]]
+        if subject_movie is None:
+            subject_movie = SimilarityParameters.fetch_subject_movie(movie_id)
+        wanted_genre_ids: List[int] = [genre["id"] for genre in subject_movie["genres"]]
         wanted_genre_ids = [str(id) for id in wanted_genre_ids]
 
         # Get unwanted movie genres
-        tmdb_resp = TMDBClient.get_movie_genres()
-        if not tmdb_resp.ok:
-            raise NotOKTMDB()
-        tmdb_resp_json = tmdb_resp.json()
-        unwanted_genre_ids: Set[int] = set([genre["id"] for genre in tmdb_resp_json["genres"]])
+        if movie_genres is None:
+            movie_genres = SimilarityParameters.fetch_movie_genres()
+        unwanted_genre_ids: Set[int] = set([genre["id"] for genre in movie_genres])
         unwanted_genre_ids = set([str(id) for id in unwanted_genre_ids])
         unwanted_genre_ids.difference_update(wanted_genre_ids)
         if intermediate_value_store is not None:
@@ -106,7 +142,7 @@ class SimilarityParameters(object):
         return f"with_genres={','.join(wanted_genre_ids)}&without_genres={','.join(unwanted_genre_ids)}"
     
     @staticmethod
-    def get_tmdb_runtime_query_substr(movie_id: int, intermediate_value_store: dict=None) -> str:
+    def get_tmdb_runtime_query_substr(movie_id: int, intermediate_value_store: dict=None, subject_movie: dict=None, movie_genres: List[dict]=None) -> str:
         """Get the TMDB discovery api query substring for similar runtime.
 
         May raise a `KeyError` or a `JSONDecodeError` in case of an erroneous response
@@ -115,13 +151,13 @@ class SimilarityParameters(object):
 
         :param movie_id: The movie to select the runtime from
         :param intermediate_value_store: A value store to pass up intermediate values of construction the query substring
+        :param subject_movie: The subject movie's primary info and credits, as fetched by :func:`fetch_subject_movie`
+        :param movie_genres: The list of all TMDB movie genres, as fetched by :func:`fetch_movie_genres`
         :return: The query substring
         """
-        tmdb_resp = TMDBClient.get_movie(movie_id)
-        if not tmdb_resp.ok:
-            raise NotOKTMDB()
-        tmdb_resp_json = tmdb_resp.json()
-        runtime: int = tmdb_resp_json["runtime"]
+        if subject_movie is None:
+            subject_movie = SimilarityParameters.fetch_subject_movie(movie_id)
+        runtime: int = subject_movie["runtime"]
 
         variance: int = 10
         lower_bound: int = runtime - variance
@@ -146,6 +182,7 @@ parser.add_argument(SimilarityParameters.RUNTIME, required=False, location=('arg
                     help="Get the movies whose runtime is similar to the subject movie")
 parser.add_argument('amount', type=int, required=True, location=('args',),
                     help="The amount of movies similar to the subject movie to fetch, as a positive integer")
+add_projection_arguments(parser)
 
 
 
@@ -177,22 +214,21 @@ class Similar(MethodResource):
         :return: The similar movies
         """
         from . import movies_attributes
+        validator = ResponseValidator("similar")
         try:
-            tmdb_resp = TMDBClient.get_movie(mov_id)
+            # Fetch the primary info and the credits at once, to share them with all query substring constructors
+            tmdb_resp = TMDBClient.get_movie_with_credits(mov_id)
             if tmdb_resp.status_code == 404:
                 return make_response_error(E_MSG.ERROR, f"The movie resource, {mov_id}, does not exist", 404)
             if not tmdb_resp.ok:
                 raise NotOKTMDB()
+            validator.update(tmdb_resp.content)
             subject_movie_json = tmdb_resp.json()
-            subject_movie_json["liked"] = movies_attributes.is_liked(mov_id)
 
             args = parser.parse_args()
             supplied_valid_arg_names = [argName for argName in SimilarityParameters.accepted_parameters() if args[argName] is not None]
-            remaining_movies: int = args["amount"]
-
-            similar_movies = []
-            total_pages_available: int = 1
-            current_page: int = 1
+            amount: int = args["amount"]
+            fields = parse_fields(args[ProjectionParameters.fields])
 
             # Store intermediate values produced during the dicover
             # API querying, to pass along to the frontend for expressiveness
@@ -206,36 +242,24 @@ class Similar(MethodResource):
                 query_substr_constructor = substring_constructors.get(keyword, None)
                 if query_substr_constructor is None:
                     raise RuntimeError(f"A valid and accepted Webservices similarity parameter, '{keyword}', is missing a TMDB query substring constructor implementation")
-                query_string += "&" + query_substr_constructor(mov_id, intermediate_values_store)
-
-            while remaining_movies > 0 and current_page <= total_pages_available:
-
-                # Query TMDB API for similar movies
-                tmdb_resp = TMDBClient.get_discover_page(current_page, query_string)
-                if not tmdb_resp.ok:
-                    raise NotOKTMDB()
-
-                tmdb_resp_json = tmdb_resp.json()
-                results = tmdb_resp_json["results"]
-                results = [
-                    result
-                    for result in results
-                    if not movies_attributes.is_deleted(result["id"])
-                ]
-                results = results[:remaining_movies]
-                for movie in results:
-                    movie_id: int = movie["id"]
-                    movie["liked"] = movies_attributes.is_liked(movie_id)
-                total_pages_available = tmdb_resp_json["total_pages"]
-
-                # Bookkeeping
-                remaining_movies -= len(results)
-                current_page += 1
-
-                # Append results
-                similar_movies.extend(results)
-
-            return make_response_message(E_MSG.SUCCESS, 200, result=similar_movies, reference_movie=subject_movie_json, **intermediate_values_store)
+                query_string += "&" + query_substr_constructor(mov_id, intermediate_values_store, subject_movie=subject_movie_json)
+
+            # The reference movie only consists of the primary info
+            subject_movie_json.pop("credits", None)
+            subject_movie_json["liked"] = movies_attributes.is_liked(mov_id)
+
+            if wants_ndjson():
+                # Stream the movies page by page, the first page is fetched up front, to respond with its errors
+                movie_pages = stream_movie_pages(lambda page: TMDBClient.get_discover_page(page, query_string), amount, list_key="discover?" + query_string)
+                return ndjson_response(next(movie_pages), movie_pages, "find similar movies", fields)
+
+            # Query TMDB API for similar movies
+            validator.update(query_string.encode("utf-8"))
+            similar_movies, _ = collect_movie_pages(lambda page: TMDBClient.get_discover_page(page, query_string), amount, validator, list_key="discover?" + query_string)
+            if validator.not_modified():
+                return validator.not_modified_response()
+
+            return validator.apply(make_response_message(E_MSG.SUCCESS, 200, result=project_movies(similar_movies, fields), reference_movie=project_movie(subject_movie_json, fields), **intermediate_values_store))
         except (JSONDecodeError, KeyError) as e:
             return make_response_error(E_MSG.ERROR, "TMDB gave an invalid or malformed response", 502)
         except NotOKTMDB as e:
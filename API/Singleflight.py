@@ -0,0 +1,118 @@
+import asyncio
+import threading
+
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class _Call(object):
+    """A single in-flight call, shared by every caller of the same key."""
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done: threading.Event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class Singleflight:
+    """Coalesces concurrent identical calls into a single call, whose result they all share.
+
+    The first caller of a key executes the call. Every caller of the same key
+    that arrives while that call is still in flight waits for it instead, and
+    receives the same result, or the same exception. Once the call finished, the
+    next caller of the key executes a new call, so nothing is cached beyond the
+    duration of a single call.
+
+    Calls made with :func:`do` and coroutines awaited with :func:`do_async` are
+    coalesced separately. The latter must all be awaited on the same event loop.
+
+    e.g. ::
+
+        singleflight = Singleflight()
+        response = singleflight.do(url, lambda: session.get(url))
+    """
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+        self.executions: int = 0
+        self.collapsed: int = 0
+
+    def do(self, key: str, call: Callable[[], Any]) -> Any:
+        """Execute the call, or wait for the in-flight call of the same key, and return its result.
+
+        Exceptions raised by the call are raised to every caller that shared it.
+
+        :param key: The key that identifies identical calls, e.g. the upstream url
+        :param call: The function to execute, if no call of the key is in flight
+        :return: The result of the call
+        """
+        with self._lock:
+            shared = self._calls.get(key, None)
+            if shared is None:
+                shared = self._calls[key] = _Call()
+                self.executions += 1
+                leader: bool = True
+            else:
+                self.collapsed += 1
+                leader: bool = False
+
+        if not leader:
+            shared.done.wait()
+            if shared.error is not None:
+                raise shared.error
+            return shared.result
+
+        try:
+            shared.result = call()
+            return shared.result
+        except BaseException as e:
+            shared.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            shared.done.set()
+
+    async def do_async(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """The asyncio counterpart of :func:`do`, for a coroutine function *call*.
+
+        The call runs in a task of its own, so that a caller that is cancelled,
+        e.g. because its client went away, does not cancel the call of the others.
+
+        :param key: The key that identifies identical calls, e.g. the upstream url
+        :param call: The coroutine function to await, if no call of the key is in flight
+        :return: The result of the call
+        """
+        task: Optional[asyncio.Future] = self._tasks.get(key, None)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(call())
+            task.add_done_callback(lambda _: self._finish_task(key, task))
+            with self._lock:
+                self.executions += 1
+        else:
+            with self._lock:
+                self.collapsed += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, float]:
+        """Get a snapshot of the counters.
+
+        :return: The amount of executed and collapsed calls, the calls in flight, and the share of calls that were collapsed
+        """
+        with self._lock:
+            calls: int = self.executions + self.collapsed
+            return {
+                "executions": self.executions,
+                "collapsed": self.collapsed,
+                "in_flight": len(self._calls) + len(self._tasks),
+                "collapsed_ratio": self.collapsed / calls if calls > 0 else 0.0,
+            }
+
+    def _finish_task(self, key: str, task: asyncio.Future):
+        """Forget a finished task, and retrieve its exception, in case every caller was cancelled."""
+        if self._tasks.get(key, None) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,87 @@
+import threading
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from typing import Callable, Iterable, Iterator, TypeVar, Optional
+
+from .utils import bind_app_context
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class WorkerPoolDefaults:
+    """A class of constants that specifies the fallback values of the worker
+    pool configuration, used if the app config does not set them."""
+    MAX_WORKERS: int = 16
+
+
+class WorkerPool:
+    """A bounded pool of worker threads, shared by all requests of a flask app, to run upstream calls concurrently.
+
+    The pool is created lazily, once per flask app, and stored in the app's
+    ``extensions`` dict. Its size is configured through the ``UPSTREAM_MAX_WORKERS``
+    app config key. Because the pool is shared, the total amount of concurrent
+    upstream calls of the whole process is bounded, no matter how many requests
+    are being handled.
+
+    Functions submitted to the pool run in an app context of the current app,
+    so they may use ``current_app``, e.g. through the upstream API clients.
+    Functions running in the pool must never wait on other functions submitted
+    to the pool themselves, as that may deadlock a saturated pool.
+    """
+    EXTENSION_KEY: str = "upstream_worker_pool"
+    _lock: threading.Lock = threading.Lock()
+
+    @staticmethod
+    def executor() -> ThreadPoolExecutor:
+        """Get the shared executor of the current app, creating it if necessary.
+
+        :return: The shared executor
+        """
+        extensions: dict = current_app.extensions
+        executor = extensions.get(WorkerPool.EXTENSION_KEY, None)
+        if executor is None:
+            with WorkerPool._lock:
+                executor = extensions.get(WorkerPool.EXTENSION_KEY, None)
+                if executor is None:
+                    executor = ThreadPoolExecutor(
+                        max_workers=current_app.config.get("UPSTREAM_MAX_WORKERS", WorkerPoolDefaults.MAX_WORKERS),
+                        thread_name_prefix="upstream"
+                    )
+                    extensions[WorkerPool.EXTENSION_KEY] = executor
+        return executor
+
+    @staticmethod
+    def map(function: Callable[[T], R], iterable: Iterable[T], max_in_flight: Optional[int]=None) -> Iterator[R]:
+        """Call the function on every item of the iterable concurrently, in the shared pool.
+
+        The results are yielded in the order of the iterable. If a call raised an
+        exception, it is re-raised when its result is reached.
+
+        If *max_in_flight* is given, at most that many calls of this single map
+        are submitted to the pool at any time, so that a single request with
+        many items can not occupy the entire shared pool.
+
+        :param function: The function to call on every item
+        :param iterable: The items to call the function on
+        :param max_in_flight: The max amount of calls that are pending at once, unbounded if None
+        :return: An iterator over the results
+        """
+        executor: ThreadPoolExecutor = WorkerPool.executor()
+        bound_function: Callable[[T], R] = bind_app_context(function)
+        if max_in_flight is None:
+            return executor.map(bound_function, iterable)
+
+        def generate_results() -> Iterator[R]:
+            pending = deque()
+            for item in iterable:
+                if len(pending) >= max_in_flight:
+                    yield pending.popleft().result()
+                pending.append(executor.submit(bound_function, item))
+            while len(pending) > 0:
+                yield pending.popleft().result()
+
+        return generate_results()
@@ -2,7 +2,7 @@ from flask import Flask
 from flask_restful import Api as RESTAPI
 from flask_apispec import FlaskApiSpec
 from flask_cors import CORS
-from typing import Iterable, Mapping, Any, List
+from typing import Mapping, Any
 
 from .API import API
 from .Movies import Movies
@@ -12,68 +12,27 @@ from .Likes import Likes
 from .Like import Like
 from .Similar import Similar
 from .AverageScorePlot import AverageScorePlot
-
-from .MovieAttributes import MovieAttributes
+from .Metrics import Metrics
+from .AsyncMovies import AsyncMovies
+from .AsyncPopularMovies import AsyncPopularMovies
+from .AsyncMovie import AsyncMovie
+from .AsyncSimilar import AsyncSimilar
+from .AsyncAverageScorePlot import AsyncAverageScorePlot
+from .AsyncRuntime import AsyncRuntime
+from .CacheWarmer import CacheWarmer
+from .HTTPSessions import httpx
+from .ChartRenderer import ChartRenderer, ChartDefaults, PlotBackends, Image
+
+from .MoviesAttributes import MoviesAttributes, InMemoryMoviesAttributes, SQLiteMoviesAttributes, create_movies_attributes
 from .APIResponses import CustomHeaders
+from .serialization import FastJSONProvider, validate_response
+from .compression import compress_response
+from .staleness import track_staleness, add_staleness_header
+from .instrumentation import start_request_timer, record_request
+from .profiling import profiled, profiling_enabled, ProfilingHeaders
 
 
-class MoviesAttributes(dict[int, MovieAttributes]):
-    """The backend api's database substitute.
-
-    For the sake of simplicity, no database will be used
-    in this project. Instead we use a simple dict of the
-    form ::
-
-        {
-            movie_id : MovieAttributes
-        }
-    
-    where MovieAttributes describes the global attributes
-    stored for each movie by the API. These attributes
-    facilitate project requirements 6. (delete movies)
-    and 7. ((un)like movies) described in the project
-    root's README.
-    """
-    def prune_deleted_keys(self, keys: Iterable[int]) -> List[int]:
-        """Filter the iterable of keys and keep only the keys that have a 'deleted' status of `False`.
-
-        :param keys: The list of keys to filter
-        :return: The list of non-deleted keys
-        """
-        return [key for key in keys if self.not_deleted(key)]
-    
-    def is_deleted(self, key: int) -> bool:
-        """Check whether the movie corresponding to the key is deleted.
-
-        If the key is not part of the dict, then `False` is returned.
-
-        :param key: The key to check the status for
-        :return: The movie's deleted status
-        """
-        return key in self and self[key].deleted
-    
-    def not_deleted(self, key: int) -> bool:
-        """Check whether the movie corresponding to the key is not deleted.
-
-        If the key is not part of the dict, then `True` is returned.
-
-        :param key: The key to check the status for
-        :return: The movie's non-deleted status
-        """
-        return not self.is_deleted(key)
-
-    def is_liked(self, key: int) -> bool:
-        """Check whether the movie corresponding to the key is liked.
-
-        If the key is not part of the dict, then `False` is returned.
-
-        :param key: The key to check the status for
-        :return: The movie's liked status
-        """
-        return key in self and self[key].liked
-
-
-movies_attributes: MoviesAttributes = MoviesAttributes()
+movies_attributes: MoviesAttributes = InMemoryMoviesAttributes()
 
 
 def create_app(test_config: Mapping[str, Any]=None):
@@ -88,7 +47,10 @@ def create_app(test_config: Mapping[str, Any]=None):
     # create and configure the app
     app = Flask(__name__)
     CORS(app, expose_headers=[
-        CustomHeaders.EXCLUDED_MOVIE_IDS
+        CustomHeaders.EXCLUDED_MOVIE_IDS,
+        CustomHeaders.STALE_DATA_AGE,
+        ProfilingHeaders.SERVER_TIMING,
+        "ETag",
     ])
 
 
@@ -99,37 +61,87 @@ def create_app(test_config: Mapping[str, Any]=None):
         # load the test config if passed in
         app.config.from_mapping(test_config)
 
-    # NO database will be used.
-    # ==> Uncomment if it is actually used
-    #
-    # # ensure the instance folder exists
-    # try:
-    #     os.makedirs(app.instance_path)
-    # except OSError:
-    #     pass
+    # Count the requests and measure their durations, per resource. The hooks are
+    # registered first, so that the measured durations include all other hooks.
+    if app.config.get("METRICS_ENABLED", True):
+        app.before_request(start_request_timer)
+        app.after_request(record_request)
+
+    # Serialize the json responses without sorting their keys, with orjson if it is
+    # installed. In debug and test mode, check them against their documented schemas.
+    if app.config.get("FAST_JSON", True):
+        app.json = FastJSONProvider(app)
+    # Compress the larger json, NDJSON and SVG responses with gzip or brotli, as
+    # negotiated with the client. The after_request hooks run in reverse order, so
+    # this is registered first, to validate the responses before they are compressed.
+    if app.config.get("COMPRESSION_ENABLED", True):
+        app.after_request(compress_response)
+    if app.config.get("VALIDATE_RESPONSES", app.testing):
+        app.after_request(validate_response)
+
+    # Flag the responses that are built from stale TMDB data, served while TMDB is down
+    app.before_request(track_staleness)
+    app.after_request(add_staleness_header)
+
+    # The movie attributes are kept in memory by default. The sqlite
+    # backend persists them in the instance folder instead, and shares
+    # them between worker processes, see MoviesAttributes.py
+    global movies_attributes
+    movies_attributes.close()
+    movies_attributes = create_movies_attributes(app.config, app.instance_path)
+
+    # In async mode, the resources that call upstream APIs are
+    # replaced by their async counterparts. They are registered
+    # under the same endpoint names, so the routes and the swagger
+    # docs stay exactly the same.
+    serving_resources: dict = {}
+    if app.config.get("ASYNC_MODE", False):
+        if httpx is None:
+            raise RuntimeError("The async mode requires the httpx package, see requirements-async.txt")
+        serving_resources = {
+            Movies: AsyncMovies,
+            PopularMovies: AsyncPopularMovies,
+            Movie: AsyncMovie,
+            Similar: AsyncSimilar,
+            AverageScorePlot: AsyncAverageScorePlot,
+        }
+
+    if app.config.get("PLOT_BACKEND", ChartDefaults.BACKEND) == PlotBackends.LOCAL and Image is None:
+        raise RuntimeError("The local plot backend requires the Pillow package, see requirements.txt")
 
-    # Flask RESTful API
-    api = RESTAPI(app, prefix="/api")
+    def serving(resource: type) -> type:
+        return serving_resources.get(resource, resource)
+
+    # Flask RESTful API. If a profiling token or a sample rate is configured,
+    # the views of all resources are wrapped to profile the requests, see profiling.py
+    api = RESTAPI(app, prefix="/api", decorators=[profiled] if profiling_enabled(app.config) else [])
 
     api.add_resource(API, API.route())
-    api.add_resource(Movies, Movies.route() + '/')
-    api.add_resource(PopularMovies, PopularMovies.route())
-    api.add_resource(Movie, Movie.route())
+    api.add_resource(serving(Movies), Movies.route() + '/', endpoint='movies')
+    api.add_resource(serving(PopularMovies), PopularMovies.route(), endpoint='popularmovies')
+    api.add_resource(serving(Movie), Movie.route(), endpoint='movie')
     api.add_resource(Likes, Likes.route() + '/')
     api.add_resource(Like, Like.route())
-    api.add_resource(Similar, Similar.route() + '/')
-    api.add_resource(AverageScorePlot, AverageScorePlot.route())
+    api.add_resource(serving(Similar), Similar.route() + '/', endpoint='similar')
+    api.add_resource(serving(AverageScorePlot), AverageScorePlot.route(), endpoint='averagescoreplot')
+    if app.config.get("METRICS_ENABLED", True):
+        api.add_resource(Metrics, Metrics.route())
 
 
     # Swagger doc generation
     docs = FlaskApiSpec(app)
 
-    docs.register(Movies)
-    docs.register(PopularMovies)
-    docs.register(Movie)
+    docs.register(serving(Movies), endpoint='movies')
+    docs.register(serving(PopularMovies), endpoint='popularmovies')
+    docs.register(serving(Movie), endpoint='movie')
     docs.register(Likes)
     docs.register(Like)
-    docs.register(Similar)
-    docs.register(AverageScorePlot)
+    docs.register(serving(Similar), endpoint='similar')
+    docs.register(serving(AverageScorePlot), endpoint='averagescoreplot')
+
+    # Keep the hottest TMDB responses warm in the response cache, in a
+    # background thread. Stop it with CacheWarmer.shutdown, e.g. in tests.
+    if app.config.get("CACHE_WARMER_ENABLED", False):
+        CacheWarmer.start(app)
 
     return app
@@ -0,0 +1,106 @@
+from flask import current_app, request, Response
+from marshmallow import Schema, ValidationError
+from typing import Callable, Dict, List
+
+from .APIResponses import make_response_message, make_response_error, GenericResponseMessages as E_MSG
+from .PageMap import PageMap
+
+
+class BulkDefaults:
+    """The defaults of the bulk endpoints, used for the config keys that are absent."""
+    MAX_OPERATIONS: int = 10000
+
+
+class BulkOperations(object):
+    """An enum of the operations accepted by the bulk endpoints of the Likes and Movies collections.
+
+    Each operation has the same effect as a request to the corresponding single resource endpoint:
+
+    * like: PUT /api/likes/<mov_id>
+    * unlike: DELETE /api/likes/<mov_id>
+    * delete: DELETE /api/movies/<mov_id>
+    """
+    LIKE: str = "like"
+    UNLIKE: str = "unlike"
+    DELETE: str = "delete"
+
+
+def _like(movies_attributes, mov_id: int) -> int:
+    movies_attributes.set_liked(mov_id, True)
+    return 201
+
+def _unlike(movies_attributes, mov_id: int) -> int:
+    if mov_id in movies_attributes:
+        movies_attributes.set_liked(mov_id, False)
+    return 200
+
+def _delete(movies_attributes, mov_id: int) -> int:
+    movies_attributes.set_deleted(mov_id, True)
+    PageMap.current().note_deleted(mov_id)
+    return 200
+
+"""Apply a single operation to the movie attribute store, returning the status code
+of the corresponding single resource endpoint."""
+OPERATIONS: Dict[str, Callable[..., int]] = {
+    BulkOperations.LIKE: _like,
+    BulkOperations.UNLIKE: _unlike,
+    BulkOperations.DELETE: _delete,
+}
+
+
+def apply_bulk_operations(request_schema: Schema) -> Response:
+    """Apply the list of operations in the json body of the current request to the movie attribute store.
+
+    The body is validated against the *request_schema*, which restricts the accepted
+    operations. All operations are applied in order, in a single batch of the store,
+    so that no other request changes the store halfway through. Like their single resource
+    endpoints, operations on a deleted movie fail with a 404 status, without affecting
+    the other operations.
+
+    e.g. the body ::
+
+        {
+            "operations": [
+                {"id": 550, "op": "like"},
+                {"id": 551, "op": "unlike"}
+            ]
+        }
+
+    results in ::
+
+        {
+            "message": "Success",
+            "result": [
+                {"id": 550, "op": "like", "status": 201},
+                {"id": 551, "op": "unlike", "status": 200}
+            ]
+        }
+
+    :param request_schema: The schema of the request body
+    :return: The response, holding the result of each operation in the order of the operations
+    """
+    from . import movies_attributes
+
+    try:
+        body: dict = request_schema.load(request.get_json(silent=True) or {})
+    except ValidationError as e:
+        return make_response_error(E_MSG.MALFORMED_REQ, f"Invalid request body: {e.messages}", 400)
+
+    operations: List[dict] = body["operations"]
+    max_operations: int = current_app.config.get("BULK_MAX_OPERATIONS", BulkDefaults.MAX_OPERATIONS)
+    if len(operations) > max_operations:
+        return make_response_error(E_MSG.MALFORMED_REQ,
+                                   f"At most {max_operations} operations can be applied at once",
+                                   400)
+
+    results: List[dict] = []
+    with movies_attributes.batch():
+        for operation in operations:
+            mov_id: int = operation["id"]
+            op: str = operation["op"]
+            if movies_attributes.is_deleted(mov_id):
+                results.append(dict(id=mov_id, op=op, status=404, error="This movie resource does not exist"))
+            else:
+                results.append(dict(id=mov_id, op=op, status=OPERATIONS[op](movies_attributes, mov_id)))
+
+    return make_response_message(E_MSG.SUCCESS, 200, result=results)
@@ -0,0 +1,238 @@
+import threading
+import zlib
+
+from collections import OrderedDict
+from flask import current_app, request, Response
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+class CompressionDefaults:
+    """A class of constants that specifies the fallback values of the response
+    compression configuration, used if the app config does not set them."""
+    # Bodies smaller than this are sent as is, as compressing them gains too little
+    MIN_SIZE: int = 1024
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 5
+    # The already compressed image formats, e.g. the WebP and PNG plots, are absent
+    MIMETYPES: List[str] = ["application/json", "application/x-ndjson", "image/svg+xml"]
+    CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+
+
+class Encodings(object):
+    """An enum of the supported content encodings."""
+    BROTLI: str = "br"
+    GZIP: str = "gzip"
+
+
+class CompressedBodyCache:
+    """A bounded, thread-safe, in-process cache of compressed response bodies, addressed by their ETag.
+
+    An ETag identifies a single body, so the compressed body of a response
+    with an ETag can be reused for every later response with the same ETag.
+    This saves the compression of repeated views of the same movie lists and
+    plots. The cache is bounded in the total byte size of the cached bodies,
+    and evicts the least recently used bodies first.
+
+    The cache is created lazily, once per flask app, and stored in the app's
+    ``extensions`` dict. Its size is configured through the ``COMPRESSION_CACHE_MAX_BYTES``
+    app config key.
+    """
+    EXTENSION_KEY: str = "compressed_body_cache"
+    _creation_lock: threading.Lock = threading.Lock()
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes: int = max_bytes
+
+        self._entries: OrderedDict[Tuple[str, str], bytes] = OrderedDict()
+        self._bytes: int = 0
+        self._lock: threading.Lock = threading.Lock()
+
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @staticmethod
+    def current() -> "CompressedBodyCache":
+        """Get the compressed body cache of the current app, creating it if necessary.
+
+        :return: The compressed body cache
+        """
+        extensions: dict = current_app.extensions
+        cache = extensions.get(CompressedBodyCache.EXTENSION_KEY, None)
+        if cache is None:
+            with CompressedBodyCache._creation_lock:
+                cache = extensions.get(CompressedBodyCache.EXTENSION_KEY, None)
+                if cache is None:
+                    cache = CompressedBodyCache(
+                        current_app.config.get("COMPRESSION_CACHE_MAX_BYTES", CompressionDefaults.CACHE_MAX_BYTES)
+                    )
+                    extensions[CompressedBodyCache.EXTENSION_KEY] = cache
+        return cache
+
+    def get(self, etag: str, encoding: str) -> Optional[bytes]:
+        """Get the cached compressed body.
+
+        :param etag: The ETag of the uncompressed body, including its weakness indicator
+        :param encoding: The content encoding, one of :class:`Encodings`
+        :return: The compressed body, or None if it is not cached
+        """
+        with self._lock:
+            body = self._entries.get((etag, encoding), None)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((etag, encoding))
+            self.hits += 1
+            return body
+
+    def put(self, etag: str, encoding: str, body: bytes):
+        """Store a compressed body in the cache. Bodies that are larger than the entire cache are ignored.
+
+        :param etag: The ETag of the uncompressed body, including its weakness indicator
+        :param encoding: The content encoding, one of :class:`Encodings`
+        :param body: The compressed body
+        """
+        if len(body) > self.max_bytes:
+            return
+
+        with self._lock:
+            key: Tuple[str, str] = (etag, encoding)
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            self._entries[key] = body
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def stats(self) -> Dict[str, float]:
+        """Get a snapshot of the cache counters.
+
+        :return: The counters, the current size and the hit ratio of the cache
+        """
+        with self._lock:
+            lookups: int = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hit_ratio": self.hits / lookups if lookups > 0 else 0.0,
+            }
+
+
+def compress_response(response: Response) -> Response:
+    """Compress the body of a response with the best content encoding the client accepts.
+
+    This ``after_request`` hook negotiates brotli, if the brotli package is installed,
+    or gzip from the request's Accept-Encoding header. Only the bodies of the
+    ``COMPRESSION_MIMETYPES`` are compressed, and only if they are at least
+    ``COMPRESSION_MIN_SIZE`` bytes. Streamed responses, e.g. the NDJSON movie
+    collections, are compressed chunk by chunk, and each chunk is flushed, so
+    the client still receives every page as soon as it arrives.
+
+    The compressed bodies of responses with an ETag are cached, see
+    :class:`CompressedBodyCache`. A strong ETag is turned into a weak one
+    whenever an encoding is negotiated, as the compressed body is no longer
+    byte for byte the same. This only depends on the mimetype and the
+    Accept-Encoding header, not on the body, so that a 304 Not Modified,
+    which has no body but the mimetype of the full response, carries the
+    same ETag as the full response it stands in for.
+
+    :param response: The response
+    :return: The compressed response, or the same response if it is not compressed
+    """
+    config = current_app.config
+    if response.status_code == 304:
+        # A 304 has no body, but must vary like the full response it stands in for
+        response.vary.add("Accept-Encoding")
+        if _negotiate_encoding(response) is not None:
+            _weaken_etag(response)
+        return response
+    if response.mimetype not in config.get("COMPRESSION_MIMETYPES", CompressionDefaults.MIMETYPES):
+        return response
+    # Caches must store the compressed and uncompressed bodies apart, even if this one is not compressed
+    response.vary.add("Accept-Encoding")
+    if response.status_code < 200 or response.status_code in (204, 206) or "Content-Encoding" in response.headers:
+        return response
+
+    encoding: Optional[str] = _negotiate_encoding(response)
+    if encoding is None:
+        return response
+    # Even if the body turns out too small to compress, so that the ETag does not depend on its size
+    _weaken_etag(response)
+
+    if response.is_streamed and not response.direct_passthrough:
+        response.response = _compress_chunks(response.response, _compressor(encoding))
+        response.headers.pop("Content-Length", None)
+    else:
+        # Files sent with send_file are passed through by default, read them in full instead
+        response.direct_passthrough = False
+        body: bytes = response.get_data()
+        if len(body) < config.get("COMPRESSION_MIN_SIZE", CompressionDefaults.MIN_SIZE):
+            return response
+
+        etag, _ = response.get_etag()
+        cache_key: Optional[str] = f'W/"{etag}"' if etag is not None else None
+        compressed: Optional[bytes] = None
+        cache: CompressedBodyCache = CompressedBodyCache.current()
+        if cache_key is not None:
+            compressed = cache.get(cache_key, encoding)
+        if compressed is None:
+            compress, flush = _compressor(encoding)
+            compressed = compress(body) + flush(True)
+            if cache_key is not None:
+                cache.put(cache_key, encoding, compressed)
+        response.set_data(compressed)
+
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def _negotiate_encoding(response: Response) -> Optional[str]:
+    """Get the best content encoding of the response that the client accepts, None if it is not compressed."""
+    if response.mimetype not in current_app.config.get("COMPRESSION_MIMETYPES", CompressionDefaults.MIMETYPES):
+        return None
+    return request.accept_encodings.best_match(
+        [Encodings.BROTLI, Encodings.GZIP] if brotli is not None else [Encodings.GZIP]
+    )
+
+
+def _weaken_etag(response: Response):
+    """Turn the strong ETag of a response, if any, into a weak one."""
+    etag, weak = response.get_etag()
+    if etag is not None and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def _compressor(encoding: str) -> Tuple[Callable[[bytes], bytes], Callable[[bool], bytes]]:
+    """Create an incremental compressor of the encoding.
+
+    :return: The compress function of a chunk, and the flush function, which ends the body if passed True
+    """
+    config = current_app.config
+    if encoding == Encodings.BROTLI:
+        compressor = brotli.Compressor(quality=config.get("COMPRESSION_BROTLI_QUALITY", CompressionDefaults.BROTLI_QUALITY))
+        return compressor.process, lambda end: compressor.finish() if end else compressor.flush()
+
+    # A window of 16 + 15 bits produces a gzip container rather than a raw zlib stream
+    compressor = zlib.compressobj(config.get("COMPRESSION_GZIP_LEVEL", CompressionDefaults.GZIP_LEVEL), zlib.DEFLATED, 31)
+    return compressor.compress, lambda end: compressor.flush(zlib.Z_FINISH if end else zlib.Z_SYNC_FLUSH)
+
+
+def _compress_chunks(chunks: Iterable[bytes], compressor: Tuple[Callable[[bytes], bytes], Callable[[bool], bytes]]) -> Iterator[bytes]:
+    """Compress a streamed body chunk by chunk, flushing after every chunk."""
+    compress, flush = compressor
+    try:
+        for chunk in chunks:
+            if len(chunk) > 0:
+                yield compress(chunk) + flush(False)
+        yield flush(True)
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,87 @@
+import hashlib
+
+from flask import current_app, make_response, request, Response
+from typing import Mapping
+
+
+class ConditionalDefaults:
+    """The defaults of the conditional GET handling, used for the config keys that are absent."""
+    # The Cache-Control max-age of the routes absent from the CACHE_MAX_AGE config dict, in seconds
+    MAX_AGE: int = 0
+
+
+class ResponseValidator:
+    """Builds the weak ETag of a movie resource response, and applies the conditional GET headers to it.
+
+    A movie resource response is fully determined by the TMDB payloads it is
+    built from, the movie attributes, and the request's path and query string.
+    The ETag is therefore a hash of the payloads, the version of the movie
+    attribute store and the request's full path, so any like or delete changes
+    it. The version is read when the validator is created, which must happen
+    before the resource reads any movie attributes. A change that races with the
+    request then at worst causes a needless 200, never a wrong 304.
+
+    The ETag is weak, as the same payloads may be serialized differently.
+
+    The Cache-Control max-age is configured per endpoint in the ``CACHE_MAX_AGE``
+    app config dict. A max-age of 0 makes the clients revalidate on every use.
+
+    e.g. ::
+
+        validator = ResponseValidator("movie")
+        tmdb_resp = TMDBClient.get_movie(movie_id=550)
+        validator.update(tmdb_resp.content)
+        if validator.not_modified():
+            return validator.not_modified_response()
+        return validator.apply(make_response_message(E_MSG.SUCCESS, 200, result=tmdb_resp.json()))
+    """
+    def __init__(self, endpoint: str):
+        """
+        :param endpoint: The endpoint of the resource, which selects its Cache-Control max-age
+        """
+        from . import movies_attributes
+
+        self.endpoint: str = endpoint
+        self._digest = hashlib.blake2b(digest_size=16)
+        self._digest.update(f"{movies_attributes.version}\0{request.full_path}\0".encode("utf-8"))
+
+    def update(self, payload: bytes):
+        """Add a TMDB payload to the ETag. Payloads must be added in the same order on every request.
+
+        :param payload: The raw body of a TMDB response
+        """
+        self._digest.update(len(payload).to_bytes(8, "big"))
+        self._digest.update(payload)
+
+    @property
+    def etag(self) -> str:
+        """The ETag of the payloads added so far, without the weakness indicator and quotes."""
+        return self._digest.hexdigest()
+
+    def not_modified(self) -> bool:
+        """Check whether the client's cached response is still current, per its If-None-Match header.
+
+        :return: True if the response would be identical to the cached one
+        """
+        return request.if_none_match.contains_weak(self.etag)
+
+    def not_modified_response(self) -> Response:
+        """Build the 304 Not Modified response, which carries the same validators as the full response."""
+        return self.apply(make_response("", 304))
+
+    def apply(self, response: Response) -> Response:
+        """Set the ETag and Cache-Control headers of a successful response, other responses are left as is.
+
+        :param response: The response
+        :return: The response
+        """
+        if response.status_code not in (200, 304):
+            return response
+
+        max_ages: Mapping[str, int] = current_app.config.get("CACHE_MAX_AGE", {})
+        max_age: int = max_ages.get(self.endpoint, ConditionalDefaults.MAX_AGE)
+        response.set_etag(self.etag, weak=True)
+        # The collections stream NDJSON instead, if the client prefers it
+        response.vary.add("Accept")
+        response.headers["Cache-Control"] = f"public, max-age={max_age}" if max_age > 0 else "no-cache"
+        return response
@@ -3,4 +3,134 @@ API_KEY_TMDB='ebae29385c26d7eb94b6daa8e41175a4'
 APISPEC_SWAGGER_URL='/api/swagger/'
 APISPEC_SWAGGER_UI_URL='/api/swagger-ui/'
 APISPEC_TITLE='Webservices'
-APISPEC_VERSION='1.0'
\ No newline at end of file
+APISPEC_VERSION='1.0'
+
+# Pooled upstream HTTP sessions, see HTTPSessions.py
+HTTP_POOL_CONNECTIONS=10
+HTTP_POOL_MAXSIZE=20
+HTTP_CONNECT_TIMEOUT=3.05
+HTTP_READ_TIMEOUT=10.0
+HTTP_RETRY_TOTAL=2
+HTTP_RETRY_BACKOFF_FACTOR=0.3
+
+# TMDB response cache, see ResponseCache.py
+# TTLs are in seconds, per TMDB endpoint. Endpoints absent from the dict are never cached.
+TMDB_CACHE_TTL={
+    "popular": 600.0,
+    "discover": 600.0,
+    "movie": 3600.0,
+    "credits": 86400.0,
+    "genres": 86400.0,
+}
+TMDB_CACHE_STALE_TTL=300.0
+TMDB_CACHE_MAX_ENTRIES=2048
+TMDB_CACHE_MAX_BYTES=16777216
+# Refresh the hottest TMDB responses in the cache in the background, see CacheWarmer.py
+# The TTLs of the warmed endpoints above should exceed the interval, so the hot routes never miss.
+CACHE_WARMER_ENABLED=True
+# Seconds between the warming cycles, randomized by +-JITTER times the interval
+CACHE_WARMER_INTERVAL=300.0
+CACHE_WARMER_JITTER=0.1
+CACHE_WARMER_MAX_WORKERS=4
+# The first pages of the popular movies and of the discover API (the movies collection) to warm
+CACHE_WARMER_POPULAR_PAGES=5
+CACHE_WARMER_DISCOVER_PAGES=5
+# The amount of most popular movies whose details to warm
+CACHE_WARMER_TOP_MOVIES=20
+# Let concurrent calls of the same TMDB url share a single upstream request, see Singleflight.py
+TMDB_SINGLEFLIGHT=True
+# TMDB request quota, see RateLimiter.py. Set TMDB_RATE_LIMIT=None to disable the limiter.
+# The sustained requests per second, and the amount that may be sent in a burst
+TMDB_RATE_LIMIT=40.0
+TMDB_RATE_LIMIT_BURST=40
+# The bounds of the adaptive amount of concurrent TMDB requests
+TMDB_RATE_LIMIT_MIN_CONCURRENCY=2
+TMDB_RATE_LIMIT_MAX_CONCURRENCY=32
+# TMDB responses slower than this, in seconds, lower the concurrency
+TMDB_RATE_LIMIT_LATENCY_TARGET=2.0
+# The max seconds a TMDB request waits for the limiter, including its retries after a 429
+TMDB_RATE_LIMIT_MAX_WAIT=5.0
+# Per TMDB endpoint circuit breakers, see CircuitBreaker.py. Set TMDB_BREAKER_FAILURE_RATIO=None to disable them.
+# The share of failed or slow calls among the last TMDB_BREAKER_WINDOW calls that opens the circuit
+TMDB_BREAKER_FAILURE_RATIO=0.5
+TMDB_BREAKER_WINDOW=20
+TMDB_BREAKER_MIN_CALLS=10
+# Calls slower than this, in seconds, count as failed
+TMDB_BREAKER_SLOW_CALL=5.0
+# Seconds an open circuit refuses calls before it lets a probe through
+TMDB_BREAKER_OPEN_SECONDS=30.0
+
+# Shared pool of worker threads for concurrent upstream calls, see WorkerPool.py
+UPSTREAM_MAX_WORKERS=16
+
+# Average score plot, see AverageScorePlot.py
+PLOT_MAX_MOVIE_IDS=100
+PLOT_MAX_CONCURRENCY=8
+# 'local' renders the plots in-process, see ChartRenderer.py, 'quickchart' fetches them from quickchart
+PLOT_BACKEND='local'
+# The amount of worker processes that render local plots, 0 renders them in the request thread
+PLOT_RENDER_PROCESSES=2
+# The max total size of the cached rendered plots, in bytes, see PlotCache.py
+PLOT_CACHE_MAX_BYTES=33554432
+
+# Serve the upstream bound resources asynchronously, see AsyncRuntime.py
+# Requires the optional dependencies in requirements-async.txt
+ASYNC_MODE=False
+
+# Upstream API base urls, point these to a local stand-in for load tests, see benchmarks/
+TMDB_BASE_URL='https://api.themoviedb.org/3'
+QUICKCHART_BASE_URL='https://quickchart.io'
+
+# Movie attribute store (likes and deletes), see MoviesAttributes.py
+# 'memory' keeps them until API restart, 'sqlite' persists them and shares them between worker processes.
+# A relative sqlite path is resolved against the app's instance folder.
+MOVIES_ATTRIBUTES_BACKEND='memory'
+MOVIES_ATTRIBUTES_SQLITE_PATH='movies_attributes.sqlite3'
+MOVIES_ATTRIBUTES_SQLITE_BUSY_TIMEOUT=5.0
+
+# Bulk like/unlike/delete endpoints, see bulk.py
+BULK_MAX_OPERATIONS=10000
+
+# The movie ids of the fetched popular and discover pages, to plan the pages of the collections around deleted movies, see PageMap.py
+# The max amount of lists to keep, one per discover query string
+PAGE_MAP_MAX_LISTS=256
+
+# Conditional GET of the movie resources, see conditional.py
+# Cache-Control max-age per endpoint, in seconds. 0 makes clients revalidate with the weak ETag on every use.
+CACHE_MAX_AGE={
+    "movie": 0,
+    "movies": 0,
+    "popularmovies": 0,
+    "similar": 0,
+}
+
+# Response serialization, see serialization.py
+# Serialize json responses with orjson, if installed, without sorting their keys
+FAST_JSON=True
+# Check every successful json response against its documented schema, for debugging
+VALIDATE_RESPONSES=False
+
+# Response compression, see compression.py
+# gzip or brotli, if the brotli package is installed, as negotiated through the Accept-Encoding header
+COMPRESSION_ENABLED=True
+# Bodies smaller than this are sent uncompressed, in bytes. Streamed bodies are always compressed.
+COMPRESSION_MIN_SIZE=1024
+COMPRESSION_GZIP_LEVEL=6
+COMPRESSION_BROTLI_QUALITY=5
+# The compressed mimetypes. The WebP and PNG plots are compressed already.
+COMPRESSION_MIMETYPES=["application/json", "application/x-ndjson", "image/svg+xml"]
+# The max total size of the cached compressed bodies of responses with an ETag, in bytes
+COMPRESSION_CACHE_MAX_BYTES=16777216
+
+# Prometheus metrics of the requests, the upstream calls and the caches, served at /api/metrics, see Metrics.py
+METRICS_ENABLED=True
+# The upper bounds of the latency histogram buckets, in seconds
+METRICS_LATENCY_BUCKETS=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+# Request profiling, see profiling.py. Profiled requests get a Server-Timing header, and their cProfile profile is written to PROFILING_DIR.
+# Requests ask for a profile with a Profile-Token header holding this token, None disables the header
+PROFILING_TOKEN=None
+# The share of all requests, between 0 and 1, that are profiled without asking for it
+PROFILING_SAMPLE_RATE=0.0
+# Relative to the instance folder, None only adds the Server-Timing header
+PROFILING_DIR="profiles"
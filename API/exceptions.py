@@ -16,6 +16,30 @@ class NotOKTMDB(NotOKError):
     pass
 
 
+class TMDBRateLimited(NotOKTMDB):
+    """A specification of a NotOKTMDB for TMDB calls that could not
+    be made within the client's rate limit in time."""
+    pass
+
+
+class TMDBUnavailable(NotOKTMDB):
+    """A specification of a NotOKTMDB for TMDB calls that were refused,
+    because the circuit breaker of their endpoint is open."""
+    pass
+
+
 class NotOKQuickchart(NotOKError):
     """A specification of a NotOKError for the quickchart API"""
     pass
+
+
+class InvalidCursor(ValueError):
+    """An error representing a pagination cursor that was
+    not issued by the collection it is passed to."""
+    pass
+
+
+class ResponseValidationError(AssertionError):
+    """An error representing an API response that does not
+    match the schema its endpoint is documented with."""
+    pass
@@ -0,0 +1,121 @@
+import asyncio
+import functools
+import time
+
+from flask import current_app, g, has_app_context, request, Response
+from typing import Callable, Dict
+
+from .MetricsRegistry import MetricsRegistry, Labels
+from .profiling import note_upstream_call
+
+
+class MetricNames(object):
+    """A class of constants that specifies the names of the recorded metrics."""
+    REQUESTS: str = "webservices_requests_total"
+    REQUEST_DURATION: str = "webservices_request_duration_seconds"
+    UPSTREAM_CALLS: str = "webservices_upstream_calls_total"
+    UPSTREAM_ERRORS: str = "webservices_upstream_errors_total"
+    UPSTREAM_DURATION: str = "webservices_upstream_call_duration_seconds"
+
+
+"""The help texts of the recorded metrics, by name."""
+METRIC_HELP: Dict[str, str] = {
+    MetricNames.REQUESTS: "The amount of handled requests, per resource, http method and status code",
+    MetricNames.REQUEST_DURATION: "The time until the response headers are ready, per resource and http method, in seconds",
+    MetricNames.UPSTREAM_CALLS: "The amount of calls of the upstream API client methods, including calls served from the cache",
+    MetricNames.UPSTREAM_ERRORS: "The amount of upstream API client calls that raised or returned an unsuccessful response",
+    MetricNames.UPSTREAM_DURATION: "The duration of the upstream API client calls, in seconds",
+}
+
+
+def start_request_timer():
+    """Note the start time of the current request.
+
+    This ``before_request`` hook should be registered before all others, so
+    that the measured duration includes them.
+    """
+    g.metrics_started_at = time.perf_counter()
+
+
+def record_request(response: Response) -> Response:
+    """Count the current request and record its duration, per resource.
+
+    This ``after_request`` hook should be registered before all others, so
+    that it runs last, and the measured duration includes the others, e.g.
+    the compression. Streamed responses are measured until their first page
+    is ready, as the rest of their body is only produced once the hooks ran.
+
+    :param response: The response
+    :return: The same response
+    """
+    started_at = g.get("metrics_started_at", None)
+    if started_at is None:
+        return response
+
+    resource: str = request.endpoint or "unmatched"
+    registry: MetricsRegistry = MetricsRegistry.current()
+    registry.inc(MetricNames.REQUESTS, (("resource", resource), ("method", request.method), ("status", str(response.status_code))))
+    registry.observe(MetricNames.REQUEST_DURATION, (("resource", resource), ("method", request.method)), time.perf_counter() - started_at)
+    return response
+
+
+def instrumented(client: str):
+    """A decorator that counts the calls, the errors and the durations of an upstream API client method.
+
+    A call fails if it raised an exception, or returned an unsuccessful response.
+    The call is also noted in the profile of the current request, if it is profiled.
+    Coroutine functions, like the methods of the async clients, are measured
+    until they return, rather than until they are created. The async clients
+    share their method names, and thereby their metrics, with the sync clients.
+
+    e.g. ::
+
+        @staticmethod
+        @instrumented("tmdb")
+        def get_movie(movie_id: int) -> requests.Response:
+            ...
+
+    :param client: The name of the upstream API, e.g. "tmdb"
+    :return: The decorator
+    """
+    def decorator(function: Callable) -> Callable:
+        labels: Labels = (("client", client), ("method", function.__name__))
+
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                started_at: float = time.perf_counter()
+                try:
+                    response = await function(*args, **kwargs)
+                except Exception:
+                    _record_call(labels, started_at, failed=True)
+                    raise
+                _record_call(labels, started_at, failed=not response.ok)
+                return response
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started_at: float = time.perf_counter()
+            try:
+                response = function(*args, **kwargs)
+            except Exception:
+                _record_call(labels, started_at, failed=True)
+                raise
+            _record_call(labels, started_at, failed=not response.ok)
+            return response
+        return wrapper
+    return decorator
+
+
+def _record_call(labels: Labels, started_at: float, failed: bool):
+    """Record an upstream API client call, if the metrics of the current app are enabled, and in the profile of the current request."""
+    ended_at: float = time.perf_counter()
+    note_upstream_call(started_at, ended_at)
+    if not has_app_context() or not current_app.config.get("METRICS_ENABLED", True):
+        return
+    registry: MetricsRegistry = MetricsRegistry.current()
+    registry.inc(MetricNames.UPSTREAM_CALLS, labels)
+    if failed:
+        registry.inc(MetricNames.UPSTREAM_ERRORS, labels)
+    registry.observe(MetricNames.UPSTREAM_DURATION, labels, ended_at - started_at)
@@ -0,0 +1,334 @@
+import asyncio
+import base64
+import binascii
+import json
+import math
+import requests
+
+from typing import AsyncIterator, Awaitable, Callable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from .exceptions import NotOKTMDB, InvalidCursor
+from .conditional import ResponseValidator
+from .PageMap import PageMap
+from .profiling import timed_phase, Phases
+from .WorkerPool import WorkerPool
+
+
+class PagePosition(NamedTuple):
+    """The position of a movie in a paginated TMDB movie list.
+
+    The index counts all results of the page, including deleted movies,
+    so a position stays valid when movies are deleted or restored.
+    """
+    page: int
+    index: int
+
+
+"""The position of the first movie of a paginated TMDB movie list."""
+FIRST_POSITION: PagePosition = PagePosition(page=1, index=0)
+
+"""The last page TMDB serves of any paginated list, later pages are rejected even if it reports more."""
+TMDB_MAX_PAGE: int = 500
+
+
+def encode_cursor(endpoint: str, position: Optional[PagePosition]) -> Optional[str]:
+    """Encode the position to continue a paginated collection at as an opaque cursor.
+
+    :param endpoint: The endpoint of the collection, a cursor is only valid for the collection that issued it
+    :param position: The position of the next movie, or None if the collection is exhausted
+    :return: The url-safe cursor, or None if the collection is exhausted
+    """
+    if position is None:
+        return None
+    content: bytes = json.dumps([endpoint, position.page, position.index], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(content).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(endpoint: str, cursor: Optional[str]) -> PagePosition:
+    """Decode a cursor issued by :func:`encode_cursor`.
+
+    May raise an `InvalidCursor` exception if the cursor is malformed, was issued by another collection,
+    or points past the last page TMDB serves.
+
+    :param endpoint: The endpoint of the collection
+    :param cursor: The cursor, or None to start at the first movie
+    :return: The position of the next movie
+    """
+    if cursor is None:
+        return FIRST_POSITION
+    try:
+        content: bytes = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_endpoint, page, index = json.loads(content)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as e:
+        raise InvalidCursor("The cursor is malformed") from e
+    if cursor_endpoint != endpoint:
+        raise InvalidCursor("The cursor belongs to another collection")
+    # bool is a subclass of int, but json true and false are no positions
+    if type(page) is not int or type(index) is not int or page < 1 or index < 0:
+        raise InvalidCursor("The cursor is malformed")
+    if page > TMDB_MAX_PAGE:
+        raise InvalidCursor("The cursor points past the last page")
+    return PagePosition(page=page, index=index)
+
+
+def collect_movie_pages(fetch_page: Callable[[int], requests.Response], amount: int,
+                        validator: Optional[ResponseValidator]=None,
+                        start: PagePosition=FIRST_POSITION,
+                        list_key: Optional[str]=None) -> Tuple[List[dict], Optional[PagePosition]]:
+    """Collect the first *amount* non-deleted movies from a paginated TMDB movie list API.
+
+    Collection starts at the *start* position, so that a client can continue
+    where an earlier request left off, without fetching the earlier pages again.
+    The first page is fetched on its own, to learn the total amount of pages
+    and the page size. All further pages that are needed to reach *amount*
+    movies are then fetched concurrently, in the shared :class:`WorkerPool`.
+    If deleted movies were filtered out and too few movies remain, another
+    round of pages is fetched, until either *amount* movies are collected
+    or the pages run out.
+
+    If a *list_key* is passed, the fetched pages are recorded in the app's
+    :class:`PageMap`. Once the start page is known there, all pages that are
+    needed to reach *amount* non-deleted movies are planned upfront, and fetched
+    in a single concurrent round, instead of the first page and the rounds after it.
+
+    The movies are returned in page order, each annotated with its "liked"
+    status under the key "liked", along with the position to continue at.
+
+    May raise a `JSONDecodeError` or a `KeyError` in case of an erroneous response
+    from TMDB. May raise a `NotOKTMDB` exception if any TMDB response has an invalid
+    status code.
+
+    If a *validator* is passed, every fetched page is added to it, in page order.
+
+    e.g. ::
+
+        movies, next_position = collect_movie_pages(TMDBClient.get_popular_page, 200)
+        more_movies, _ = collect_movie_pages(TMDBClient.get_popular_page, 200, start=next_position)
+
+    :param fetch_page: The TMDB client method to fetch a single page with, given its page number
+    :param amount: The amount of movies to collect
+    :param validator: The validator of the response the movies are collected for, if any
+    :param start: The position of the first movie to collect
+    :param list_key: The key of the paginated list in the page map, e.g. "popular", or None to not use the page map
+    :return: The collected movies, and the position of the next movie, or None if the pages ran out
+    """
+    if amount <= 0:
+        return [], start
+
+    collector = _MovieCollector(amount, start, validator, list_key)
+    pages = collector.planned_pages()
+    if len(pages) == 0:
+        collector.add(start.page, fetch_page(start.page))
+        pages = collector.next_pages()
+    while len(pages) > 0:
+        for page, tmdb_resp in zip(pages, WorkerPool.map(fetch_page, pages)):
+            collector.add(page, tmdb_resp)
+        pages = collector.next_pages()
+
+    return collector.result()
+
+
+async def collect_movie_pages_async(fetch_page: Callable[[int], Awaitable[requests.Response]], amount: int,
+                                    validator: Optional[ResponseValidator]=None,
+                                    start: PagePosition=FIRST_POSITION,
+                                    list_key: Optional[str]=None) -> Tuple[List[dict], Optional[PagePosition]]:
+    """The asyncio counterpart of :func:`collect_movie_pages`, for an async TMDB client method.
+
+    The pages of a single round are fetched concurrently with ``asyncio.gather``.
+
+    :param fetch_page: The async TMDB client method to fetch a single page with, given its page number
+    :param amount: The amount of movies to collect
+    :param validator: The validator of the response the movies are collected for, if any
+    :param start: The position of the first movie to collect
+    :param list_key: The key of the paginated list in the page map, or None to not use the page map
+    :return: The collected movies, and the position of the next movie, or None if the pages ran out
+    """
+    if amount <= 0:
+        return [], start
+
+    collector = _MovieCollector(amount, start, validator, list_key)
+    pages = collector.planned_pages()
+    if len(pages) == 0:
+        collector.add(start.page, await fetch_page(start.page))
+        pages = collector.next_pages()
+    while len(pages) > 0:
+        for page, tmdb_resp in zip(pages, await asyncio.gather(*(fetch_page(page) for page in pages))):
+            collector.add(page, tmdb_resp)
+        pages = collector.next_pages()
+
+    return collector.result()
+
+
+def stream_movie_pages(fetch_page: Callable[[int], requests.Response], amount: int,
+                       start: PagePosition=FIRST_POSITION, list_key: Optional[str]=None) -> Iterator[List[dict]]:
+    """The streaming counterpart of :func:`collect_movie_pages`.
+
+    Rather than collecting all movies first, the non-deleted movies of each
+    page are yielded as soon as that page arrives, annotated with their
+    "liked" status, so only a single page is held in memory at a time.
+    The movies of the first page are always yielded, even if there are
+    none, so that the caller can respond with any error of the first page
+    before it starts streaming.
+
+    e.g. ::
+
+        for movies in stream_movie_pages(TMDBClient.get_popular_page, 2000):
+            send(movies)
+
+    :param fetch_page: The TMDB client method to fetch a single page with, given its page number
+    :param amount: The amount of movies to collect
+    :param start: The position of the first movie to collect
+    :param list_key: The key of the paginated list in the page map, or None to not use the page map
+    :return: An iterator over the movies of each page, in page order
+    """
+    if amount <= 0:
+        yield []
+        return
+
+    collector = _MovieCollector(amount, start, None, list_key)
+    pages = collector.planned_pages()
+    if len(pages) == 0:
+        collector.add(start.page, fetch_page(start.page))
+        yield collector.drain()
+        pages = collector.next_pages()
+    while len(pages) > 0:
+        for page, tmdb_resp in zip(pages, WorkerPool.map(fetch_page, pages)):
+            collector.add(page, tmdb_resp)
+            yield collector.drain()
+        pages = collector.next_pages()
+
+
+async def stream_movie_pages_async(fetch_page: Callable[[int], Awaitable[requests.Response]], amount: int,
+                                   start: PagePosition=FIRST_POSITION,
+                                   list_key: Optional[str]=None) -> AsyncIterator[List[dict]]:
+    """The asyncio counterpart of :func:`stream_movie_pages`, for an async TMDB client method.
+
+    The pages of a single round are fetched concurrently, and yielded in page order.
+
+    :param fetch_page: The async TMDB client method to fetch a single page with, given its page number
+    :param amount: The amount of movies to collect
+    :param start: The position of the first movie to collect
+    :param list_key: The key of the paginated list in the page map, or None to not use the page map
+    :return: An async iterator over the movies of each page, in page order
+    """
+    if amount <= 0:
+        yield []
+        return
+
+    collector = _MovieCollector(amount, start, None, list_key)
+    pages = collector.planned_pages()
+    if len(pages) == 0:
+        collector.add(start.page, await fetch_page(start.page))
+        yield collector.drain()
+        pages = collector.next_pages()
+    while len(pages) > 0:
+        tasks: List[asyncio.Task] = [asyncio.ensure_future(fetch_page(page)) for page in pages]
+        try:
+            for page, task in zip(pages, tasks):
+                collector.add(page, await task)
+                yield collector.drain()
+        finally:
+            # The stream may be closed halfway through a round
+            for task in tasks:
+                task.cancel()
+        pages = collector.next_pages()
+
+
+class _MovieCollector:
+    """Collects the non-deleted movies of consecutive TMDB pages, along with their positions.
+
+    The pages must be added in page order, starting with the page of the start position.
+    If a *list_key* is given, every added page is recorded in the app's :class:`PageMap`.
+    """
+    def __init__(self, amount: int, start: PagePosition, validator: Optional[ResponseValidator],
+                 list_key: Optional[str]=None):
+        self.amount: int = amount
+        self.start: PagePosition = start
+        self.validator: Optional[ResponseValidator] = validator
+        self.list_key: Optional[str] = list_key
+        self.movies: List[Tuple[PagePosition, dict]] = []
+        # The amount of movies that were already taken with drain
+        self.drained: int = 0
+        self.total_pages_available: int = 0
+        self.page_size: int = 0
+        self.next_page: int = start.page
+
+    def add(self, page: int, tmdb_resp: requests.Response):
+        """Add the non-deleted movies of a TMDB page response."""
+        from . import movies_attributes
+
+        if not tmdb_resp.ok:
+            raise NotOKTMDB()
+        if self.validator is not None:
+            self.validator.update(tmdb_resp.content)
+        tmdb_resp_json = tmdb_resp.json()
+        results: List[dict] = tmdb_resp_json["results"]
+        # TMDB may report more pages than it serves, so that no cursor is issued that it would reject
+        total_pages: int = min(tmdb_resp_json["total_pages"], TMDB_MAX_PAGE)
+
+        first_index: int = 0
+        if page == self.start.page:
+            first_index = self.start.index
+            self.total_pages_available = total_pages
+            self.page_size = len(results)
+
+        with timed_phase(Phases.FILTER):
+            movie_ids: List[int] = [result["id"] for result in results]
+            # A single batched lookup, rather than one per movie, which is a query each with the SQLite store
+            deleted_ids: Set[int] = set(movie_ids).difference(movies_attributes.prune_deleted_keys(movie_ids))
+            self.movies.extend(
+                (PagePosition(page, index), result)
+                for index, result in enumerate(results[first_index:], first_index)
+                if result["id"] not in deleted_ids
+            )
+        self.next_page = page + 1
+
+        if self.list_key is not None:
+            PageMap.current().record(self.list_key, page, movie_ids, deleted_ids, total_pages)
+
+    def planned_pages(self) -> List[int]:
+        """Get the pages to fetch to collect *amount* movies from the page map, in a single round.
+
+        The list is empty if there is no list key, or the start page is not in the page map yet.
+        """
+        if self.list_key is None:
+            return []
+        return PageMap.current().plan(self.list_key, self.start.page, self.start.index, self.amount)
+
+    def next_pages(self) -> range:
+        """Get the range of pages to fetch to fill the remainder, if none of them contain deleted movies.
+
+        The range is empty once enough movies are collected, or the pages ran out.
+        """
+        remaining_movies: int = self.amount - self.drained - len(self.movies)
+        if remaining_movies <= 0 or self.page_size == 0:
+            return range(0)
+        pages_needed: int = math.ceil(remaining_movies / self.page_size)
+        return range(self.next_page, min(self.next_page + pages_needed, self.total_pages_available + 1))
+
+    def drain(self) -> List[dict]:
+        """Take the movies collected since the last drain, up to *amount* movies in total, annotated with their "liked" status."""
+        movies: List[dict] = [movie for _, movie in self.movies[:self.amount - self.drained]]
+        self.movies.clear()
+        self.drained += len(movies)
+        return self._annotate(movies)
+
+    def result(self) -> Tuple[List[dict], Optional[PagePosition]]:
+        """Get the first *amount* collected movies, annotated with their "liked" status, and the position after them."""
+        next_position: Optional[PagePosition] = None
+        if len(self.movies) > self.amount:
+            next_position = self.movies[self.amount][0]
+        elif self.next_page <= self.total_pages_available:
+            next_position = PagePosition(page=self.next_page, index=0)
+
+        return self._annotate([movie for _, movie in self.movies[:self.amount]]), next_position
+
+    @staticmethod
+    def _annotate(movies: List[dict]) -> List[dict]:
+        """Annotate each movie with its "liked" status under the key "liked"."""
+        from . import movies_attributes
+
+        with timed_phase(Phases.ANNOTATE):
+            for movie in movies:
+                movie["liked"] = movies_attributes.is_liked(movie["id"])
+        return movies
@@ -0,0 +1,214 @@
+import cProfile
+import functools
+import hmac
+import os
+import random
+import threading
+import time
+import uuid
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import current_app, request, Response
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class ProfilingDefaults:
+    """A class of constants that specifies the fallback values of the request
+    profiling configuration, used if the app config does not set them."""
+    # The share of requests, between 0 and 1, that are profiled without asking for it
+    SAMPLE_RATE: float = 0.0
+    # The directory the profiles are written to, relative paths are resolved against the app's instance folder
+    DIR: str = "profiles"
+
+
+class ProfilingHeaders(object):
+    """A class of constants that specifies the http headers of the request profiling."""
+    # The request header that asks for a profile, must hold the PROFILING_TOKEN
+    PROFILE_TOKEN: str = "Profile-Token"
+    SERVER_TIMING: str = "Server-Timing"
+
+
+class Phases(object):
+    """An enum of the timed phases of a request, in the order of the Server-Timing header."""
+    UPSTREAM: str = "upstream"
+    FILTER: str = "filter"
+    ANNOTATE: str = "annotate"
+    SERIALIZE: str = "serialize"
+
+
+class _RequestTimings(object):
+    """The phase durations of a single profiled request."""
+    __slots__ = ("phases", "upstream_calls", "lock")
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        # The (start, end) times of the upstream calls, which may overlap
+        self.upstream_calls: List[Tuple[float, float]] = []
+        self.lock: threading.Lock = threading.Lock()
+
+    def upstream_seconds(self) -> float:
+        """Get the time during which at least one upstream call was in flight, so concurrent calls count once."""
+        with self.lock:
+            calls: List[Tuple[float, float]] = sorted(self.upstream_calls)
+        total, covered_until = 0.0, float("-inf")
+        for started_at, ended_at in calls:
+            if ended_at > covered_until:
+                total += ended_at - max(started_at, covered_until)
+                covered_until = ended_at
+        return total
+
+
+"""The phase durations of the current request, None if it is not profiled."""
+_timings: ContextVar[Optional[_RequestTimings]] = ContextVar("request_timings", default=None)
+
+"""cProfile can only profile a single request at a time, concurrent profiled requests only get the Server-Timing header."""
+_profiler_lock: threading.Lock = threading.Lock()
+
+
+def profiling_enabled(config) -> bool:
+    """Whether requests may be profiled at all, per the app config.
+
+    :param config: The app config
+    :return: True if a profiling token or a sample rate is configured
+    """
+    return config.get("PROFILING_TOKEN", None) is not None or \
+        config.get("PROFILING_SAMPLE_RATE", ProfilingDefaults.SAMPLE_RATE) > 0
+
+
+@contextmanager
+def timed_phase(phase: str) -> Iterator[None]:
+    """Add the duration of the with block to a phase of the current request, if it is profiled.
+
+    Outside of profiled requests, this costs a single context variable lookup.
+
+    e.g. ::
+
+        with timed_phase(Phases.FILTER):
+            movies = [movie for movie in movies if movies_attributes.not_deleted(movie["id"])]
+
+    :param phase: The phase, one of :class:`Phases`
+    """
+    timings: Optional[_RequestTimings] = _timings.get()
+    if timings is None:
+        yield
+        return
+    started_at: float = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds: float = time.perf_counter() - started_at
+        with timings.lock:
+            timings.phases[phase] = timings.phases.get(phase, 0.0) + seconds
+
+
+def note_upstream_call(started_at: float, ended_at: float):
+    """Note an upstream API call of the current request, if it is profiled.
+
+    The calls may be made concurrently, in the shared worker pool or on the
+    async runtime, as both run in a copy of the request's context.
+
+    :param started_at: The ``time.perf_counter`` time the call started at
+    :param ended_at: The ``time.perf_counter`` time the call ended at
+    """
+    timings: Optional[_RequestTimings] = _timings.get()
+    if timings is not None:
+        with timings.lock:
+            timings.upstream_calls.append((started_at, ended_at))
+
+
+def profiled(view: Callable) -> Callable:
+    """A decorator that profiles the requests of a resource that ask for it, or are sampled.
+
+    A request asks for a profile with the ``Profile-Token`` header, which must
+    hold the configured ``PROFILING_TOKEN``. Additionally, a share of
+    ``PROFILING_SAMPLE_RATE`` of all requests is profiled.
+
+    The response of a profiled request carries a ``Server-Timing`` header with
+    the durations of its phases, see :class:`Phases`, and of the whole resource
+    method, in milliseconds. The resource method also runs under cProfile, and
+    the profile is written to ``PROFILING_DIR``, in the pstats format of
+    ``cProfile.Profile.dump_stats``, which e.g. snakeviz and flameprof read.
+    Its file name is part of the ``Server-Timing`` header.
+
+    The decorator is meant to wrap the views of all resources, through the
+    ``decorators`` of the flask RESTful api, so that the profile includes the
+    resource's own decorators, e.g. :func:`catch_unexpected_exceptions`.
+
+    :param view: The view function of a resource
+    :return: The wrapped view function
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not _wants_profile():
+            return view(*args, **kwargs)
+
+        profiler: Optional[cProfile.Profile] = None
+        if current_app.config.get("PROFILING_DIR", ProfilingDefaults.DIR) is not None and _profiler_lock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+
+        timings = _RequestTimings()
+        context_token = _timings.set(timings)
+        started_at: float = time.perf_counter()
+        try:
+            if profiler is None:
+                response = view(*args, **kwargs)
+            else:
+                profiler.enable()
+                try:
+                    response = view(*args, **kwargs)
+                finally:
+                    profiler.disable()
+        finally:
+            total: float = time.perf_counter() - started_at
+            _timings.reset(context_token)
+            profile_name: Optional[str] = None
+            if profiler is not None:
+                try:
+                    profile_name = _dump_profile(profiler)
+                finally:
+                    _profiler_lock.release()
+
+        if isinstance(response, Response):
+            response.headers[ProfilingHeaders.SERVER_TIMING] = _server_timing(timings, total, profile_name)
+        return response
+    return wrapper
+
+
+def _wants_profile() -> bool:
+    """Whether the current request asks for a profile with a valid token, or is sampled."""
+    config = current_app.config
+    token: Optional[str] = config.get("PROFILING_TOKEN", None)
+    request_token: Optional[str] = request.headers.get(ProfilingHeaders.PROFILE_TOKEN, None)
+    if token is not None and request_token is not None and hmac.compare_digest(request_token.encode(), token.encode()):
+        return True
+    return random.random() < config.get("PROFILING_SAMPLE_RATE", ProfilingDefaults.SAMPLE_RATE)
+
+
+def _dump_profile(profiler: cProfile.Profile) -> str:
+    """Write the profile of the current request to the profiling directory.
+
+    :param profiler: The profiler of the request
+    :return: The file name of the profile
+    """
+    directory: str = os.path.join(current_app.instance_path, current_app.config.get("PROFILING_DIR", ProfilingDefaults.DIR))
+    os.makedirs(directory, exist_ok=True)
+    name: str = f"{time.strftime('%Y%m%dT%H%M%S')}-{request.endpoint}-{request.method.lower()}-{uuid.uuid4().hex[:8]}.prof"
+    profiler.dump_stats(os.path.join(directory, name))
+    return name
+
+
+def _server_timing(timings: _RequestTimings, total: float, profile_name: Optional[str]) -> str:
+    """Format the Server-Timing header of a profiled request, with the durations in milliseconds."""
+    with timings.lock:
+        phases: Dict[str, float] = dict(timings.phases)
+    phases[Phases.UPSTREAM] = timings.upstream_seconds()
+
+    metrics: List[str] = [
+        f"{phase};dur={phases.get(phase, 0.0) * 1000:.2f}"
+        for phase in (Phases.UPSTREAM, Phases.FILTER, Phases.ANNOTATE, Phases.SERIALIZE)
+    ]
+    metrics.append(f"total;dur={total * 1000:.2f}")
+    if profile_name is not None:
+        metrics.append(f"profile;desc=\"{profile_name}\"")
+    return ", ".join(metrics)
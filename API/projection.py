@@ -0,0 +1,67 @@
+from flask_restful import reqparse
+from typing import Iterable, List, Optional, Tuple
+
+
+class ProjectionParameters(object):
+    """An enum of the parameters used by the movie resources to trim the movies in their responses.
+
+    For descriptions of the parameters, refer to the help argument
+    specified in their addition as arguments by :func:`add_projection_arguments`.
+    """
+    fields: str = "fields"
+
+
+"""The keys that every projected movie keeps, so that consumers can always act on it, e.g. (un)like it."""
+ALWAYS_PROJECTED_FIELDS: Tuple[str, ...] = ("id", "liked")
+
+
+def add_projection_arguments(parser: reqparse.RequestParser) -> reqparse.RequestParser:
+    """Add the projection query arguments to the parser of a movie resource.
+
+    :param parser: The parser of the resource
+    :return: The same parser
+    """
+    parser.add_argument(ProjectionParameters.fields, type=str, required=False, location=('args',),
+                        help="A comma separated list of the movie keys to respond with, e.g. 'title,poster_path'. "
+                             "The 'id' and 'liked' keys are always included. Omit it to respond with the full movies")
+    return parser
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Parse the value of the fields query argument.
+
+    e.g. ::
+
+        parse_fields("title, poster_path,,title")  # ("id", "liked", "title", "poster_path")
+
+    :param fields: The comma separated keys, or None
+    :return: The unique keys to keep, or None to keep all keys
+    """
+    if fields is None:
+        return None
+    keys: Iterable[str] = (key.strip() for key in fields.split(","))
+    return tuple(dict.fromkeys([*ALWAYS_PROJECTED_FIELDS, *(key for key in keys if key)]))
+
+
+def project_movie(movie: dict, fields: Optional[Tuple[str, ...]]) -> dict:
+    """Trim a movie to the keys in *fields*. Keys the movie does not have are skipped.
+
+    :param movie: The movie, i.e. TMDB primary movie data with its "liked" status
+    :param fields: The keys to keep, as parsed by :func:`parse_fields`, or None to keep all keys
+    :return: The trimmed movie
+    """
+    if fields is None:
+        return movie
+    return {key: movie[key] for key in fields if key in movie}
+
+
+def project_movies(movies: List[dict], fields: Optional[Tuple[str, ...]]) -> List[dict]:
+    """Trim each movie of the list to the keys in *fields*, see :func:`project_movie`.
+
+    :param movies: The movies
+    :param fields: The keys to keep, or None to keep all keys
+    :return: The trimmed movies
+    """
+    if fields is None:
+        return movies
+    return [project_movie(movie, fields) for movie in movies]
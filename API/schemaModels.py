@@ -1,5 +1,7 @@
 from flask_restful import reqparse
-from marshmallow import Schema, fields, validates, ValidationError
+from marshmallow import Schema, fields, validate, validates, ValidationError
+
+from .bulk import BulkOperations
 
 
 def to_params_type(python_builtin_cls) -> str:
@@ -89,3 +91,51 @@ class MoviesSchema(WebservicesResultSchema):
     result = fields.List(movie_field_type, required=True, default=[], metadata={
         'description': 'A list of Movie resources',
     })
+    next = fields.String(allow_none=True, metadata={
+        'description': 'The cursor to pass to continue the paginated Movies and PopularMovies collections after the last movie of this response, null if no movies remain',
+    })
+
+class LikesOperationSchema(Schema):
+    id = fields.Integer(required=True, strict=True, metadata={
+        'description': 'The TMDB movie id to apply the operation to',
+    })
+    op = fields.String(required=True, validate=validate.OneOf([BulkOperations.LIKE, BulkOperations.UNLIKE]), metadata={
+        'description': 'The operation to apply: "like" sets the "liked" status of the movie to True, "unlike" sets it to False',
+    })
+
+class MoviesOperationSchema(Schema):
+    id = fields.Integer(required=True, strict=True, metadata={
+        'description': 'The TMDB movie id to apply the operation to',
+    })
+    op = fields.String(required=True, validate=validate.OneOf([BulkOperations.DELETE]), metadata={
+        'description': 'The operation to apply: "delete" removes the movie from any and all Webservices API responses',
+    })
+
+class LikesOperationsSchema(Schema):
+    operations = fields.List(fields.Nested(LikesOperationSchema), required=True, validate=validate.Length(min=1), metadata={
+        'description': 'The like operations to apply, in order',
+    })
+
+class MoviesOperationsSchema(Schema):
+    operations = fields.List(fields.Nested(MoviesOperationSchema), required=True, validate=validate.Length(min=1), metadata={
+        'description': 'The movie operations to apply, in order',
+    })
+
+class OperationResultSchema(Schema):
+    id = fields.Integer(required=True, metadata={
+        'description': 'The TMDB movie id the operation was applied to',
+    })
+    op = fields.String(required=True, metadata={
+        'description': 'The applied operation',
+    })
+    status = fields.Integer(required=True, metadata={
+        'description': 'The status code the corresponding single resource endpoint would have responded with',
+    })
+    error = fields.String(required=False, metadata={
+        'description': 'An optional, technical error message, if the operation could not be applied',
+    })
+
+class OperationResultsSchema(WebservicesResultSchema):
+    result = fields.List(fields.Nested(OperationResultSchema), required=True, default=[], metadata={
+        'description': 'The result of each operation, in the order of the operations',
+    })
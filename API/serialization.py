@@ -0,0 +1,99 @@
+from flask import current_app, request, Response
+from flask.json.provider import DefaultJSONProvider
+from flask_apispec.utils import resolve_annotations, merge_recursive
+from marshmallow import Schema, INCLUDE
+from typing import Any, Optional, Type
+
+from .exceptions import ResponseValidationError
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """A flask json provider that serializes with orjson, if it is installed.
+
+    All json responses of the API, e.g. those of :func:`make_response_message`,
+    are serialized by the app's json provider. Flask's default provider uses the
+    standard library json module and sorts the keys, which is a noticeable share
+    of the CPU time of large movie lists. This provider skips the sorting, and
+    uses orjson if it is installed, which is several times faster still. It falls
+    back to the default provider otherwise, and for pretty printed debug responses.
+
+    Values that orjson can not serialize natively, as well as datetimes and
+    dataclasses, are converted by the default provider's ``default`` function,
+    so the output matches the default provider, apart from the key order and
+    whitespace.
+    """
+    sort_keys: bool = False
+
+    @staticmethod
+    def _orjson_options() -> int:
+        return orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._orjson_options()).decode("utf-8")
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        pretty: bool = self.compact is False or (self.compact is None and self._app.debug)
+        if orjson is None or pretty:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self._orjson_options()) + b"\n",
+            mimetype=self.mimetype
+        )
+
+
+def validate_response(response: Response) -> Response:
+    """Validate a successful json response against the schema its http method is documented with.
+
+    The resources build their responses directly, so flask_apispec's ``marshal_with``
+    only documents them, and never dumps them through their schemas. This
+    ``after_request`` hook checks instead that the responses still match their
+    documented schemas, at the cost of parsing every response again. It is meant
+    for debugging and tests, and is enabled with the ``VALIDATE_RESPONSES`` app
+    config key, which defaults to the app's testing flag.
+
+    Keys that the schema does not declare are allowed, as the TMDB payloads are
+    passed through as is.
+
+    May raise a `ResponseValidationError` exception if the response does not match.
+
+    :param response: The response
+    :return: The same response
+    """
+    if response.status_code // 100 != 2 or not response.is_json or response.is_streamed:
+        return response
+
+    schema_cls: Optional[Type[Schema]] = _documented_schema(response.status_code)
+    if schema_cls is None:
+        return response
+
+    errors: dict = schema_cls(unknown=INCLUDE).validate(response.get_json())
+    if errors:
+        raise ResponseValidationError(
+            f"The {request.method} {request.path} response does not match {schema_cls.__name__}: {errors}"
+        )
+    return response
+
+
+def _documented_schema(status_code: int) -> Optional[Type[Schema]]:
+    """Get the schema that the http method of the current request is documented with, for the status code, if any."""
+    view_class = getattr(current_app.view_functions.get(request.endpoint), "view_class", None)
+    http_method = getattr(view_class, request.method.lower(), None)
+    if http_method is None:
+        return None
+
+    schemas: dict = merge_recursive(resolve_annotations(http_method, "schemas").options)
+    for code, option in schemas.items():
+        codes = code if isinstance(code, tuple) else (code,)
+        if status_code in codes or code == "default":
+            schema = option.get("schema", None)
+            if isinstance(schema, type) and issubclass(schema, Schema):
+                return schema
+    return None
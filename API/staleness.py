@@ -0,0 +1,44 @@
+from contextvars import ContextVar
+from flask import Response
+from typing import List, Optional
+
+from .APIResponses import CustomHeaders
+
+
+"""The ages of the stale upstream responses used by the current request, None outside of requests."""
+_stale_ages: ContextVar[Optional[List[float]]] = ContextVar("stale_ages", default=None)
+
+
+def track_staleness():
+    """Start tracking the stale upstream responses used by the current request.
+
+    This ``before_request`` hook gives each request its own record. The record
+    is shared with the upstream calls the request makes in the shared worker
+    pool or on the async runtime, as both run in a copy of the request's context.
+    """
+    _stale_ages.set([])
+
+
+def note_stale_response(age: float):
+    """Note that the current request uses a stale upstream response, e.g. because the upstream API is down.
+
+    :param age: The age of the stale response, in seconds
+    """
+    stale_ages: Optional[List[float]] = _stale_ages.get()
+    if stale_ages is not None:
+        stale_ages.append(age)
+
+
+def add_staleness_header(response: Response) -> Response:
+    """Flag a response that is built from stale upstream responses with the age of the oldest one.
+
+    This ``after_request`` hook sets the ``Stale-Data-Age`` header, in whole seconds.
+    The header is absent from responses that are built from fresh data only.
+
+    :param response: The response
+    :return: The same response
+    """
+    stale_ages: Optional[List[float]] = _stale_ages.get()
+    if stale_ages:
+        response.headers[CustomHeaders.STALE_DATA_AGE] = str(int(max(stale_ages)))
+    return response
@@ -0,0 +1,80 @@
+import logging
+
+from flask import current_app, request, Response
+from json import JSONDecodeError
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .exceptions import NotOKTMDB
+from .projection import project_movies
+from .APIResponses import GenericResponseMessages as E_MSG, TMDBResponseMessages as E_TMDB
+
+
+NDJSON_MIMETYPE: str = "application/x-ndjson"
+
+
+def wants_ndjson() -> bool:
+    """Check whether the client prefers a streamed NDJSON response over a single json document, per its Accept header.
+
+    :return: True if the client explicitly accepts NDJSON with a higher preference than json
+    """
+    return request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def ndjson_response(first_movies: List[dict], movie_pages: Iterable[List[dict]], action_description: str,
+                    fields: Optional[Tuple[str, ...]]=None) -> Response:
+    """Build a streamed NDJSON response of a movie collection, with one movie per line.
+
+    The movies of the first page are passed separately, as they should be fetched
+    before the response starts, so that their errors still result in an error
+    status code. The movies of every further page are sent as soon as the page
+    arrives, in a single chunk per page.
+
+    Once the response started, its status code can no longer change. An error
+    halfway through therefore ends the stream with a last line in the error format
+    of the json responses, e.g. ::
+
+        {"id": 550, "title": "Fight Club", ..., "liked": false}
+        {"id": 551, "title": "The Poseidon Adventure", ..., "liked": true}
+        {"error": "TMDB raised an exception", "message": "Something went wrong"}
+
+    :param first_movies: The movies of the first page
+    :param movie_pages: The movies of the remaining pages, fetched lazily
+    :param action_description: The description of the action, for unexpected errors, see :func:`catch_unexpected_exceptions`
+    :param fields: The keys to trim each movie to, see :func:`project_movie`, or None to send the full movies
+    :return: The streamed response
+    """
+    app = current_app._get_current_object()
+
+    # The stream is sent after the request context is gone, but fetching the
+    # remaining pages only needs the app context. It is pushed by the generator
+    # itself, rather than with stream_with_context, as async mode resources
+    # build the response in another thread than the one that sends it.
+    def generate_chunks() -> Iterator[bytes]:
+        with app.app_context():
+            yield _ndjson_chunk(project_movies(first_movies, fields))
+            try:
+                for movies in movie_pages:
+                    yield _ndjson_chunk(project_movies(movies, fields))
+            except (JSONDecodeError, KeyError):
+                yield _ndjson_chunk([dict(message=E_MSG.ERROR, error=E_TMDB.ERROR_JSON_DECODE)])
+            except NotOKTMDB:
+                yield _ndjson_chunk([dict(message=E_MSG.ERROR, error=E_TMDB.NOT_OK)])
+            except Exception:
+                logging.getLogger(__name__).exception("Failed to %s", action_description)
+                yield _ndjson_chunk([dict(message=E_MSG.UNEXPECTED, error=f"Unexpected error, failed to {action_description}")])
+            finally:
+                # Stop fetching pages if the client went away, while the app context is still there
+                close = getattr(movie_pages, "close", None)
+                if close is not None:
+                    close()
+
+    response = Response(generate_chunks(), mimetype=NDJSON_MIMETYPE)
+    response.vary.add("Accept")
+    # Keep reverse proxies from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _ndjson_chunk(movies: List[dict]) -> bytes:
+    """Serialize the movies as NDJSON lines."""
+    return "".join(current_app.json.dumps(movie) + "\n" for movie in movies).encode("utf-8")
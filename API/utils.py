@@ -1,3 +1,4 @@
+import contextvars
 import flask
 from werkzeug import exceptions as w_exceptions
 from typing import Callable
@@ -107,10 +108,43 @@ def require_movie_not_deleted(http_method: Callable):
         # delete, ...) as its name.
         from . import movies_attributes
         mov_id: int = kwargs["mov_id"]
-        if mov_id in movies_attributes and movies_attributes.is_deleted(mov_id):
+        if movies_attributes.is_deleted(mov_id):
             return make_response_error(E_MSG.ERROR, "This movie resource does not exist", 404)
 
         return http_method(*args, **kwargs)
 
     wrapper.__name__ = http_method.__name__
     return wrapper
+
+def bind_app_context(function: Callable) -> Callable:
+    """Bind the current flask app to a function, so that it can be called from outside the request thread.
+
+    Functions that use ``current_app``, like the upstream API clients, fail when
+    they are called from a worker thread, because flask's app context is local
+    to the thread that handles the request. The returned function pushes an app
+    context of the app that was current at the time of binding before calling
+    the wrapped function. Each call runs in a copy of the context variables at
+    the time of binding, like the coroutines of :func:`AsyncRuntime.run`, so that
+    e.g. :func:`note_stale_response` reaches the request that made the call.
+
+    e.g. ::
+
+        fetch = bind_app_context(TMDBClient.get_movie)
+        threading.Thread(target=fetch, args=(550,)).start()
+
+    :param function: The function to bind the current app to
+    :return: The bound function
+    """
+    app = flask.current_app._get_current_object()
+    context: contextvars.Context = contextvars.copy_context()
+
+    def call_in_app_context(*args, **kwargs):
+        with app.app_context():
+            return function(*args, **kwargs)
+
+    def wrapper(*args, **kwargs):
+        # A context can only be entered by one thread at a time, so every call gets its own copy
+        return context.copy().run(call_in_app_context, *args, **kwargs)
+
+    wrapper.__name__ = function.__name__
+    return wrapper
@@ -0,0 +1,231 @@
+"""
+An end-to-end load benchmark of every route of the Webservices API.
+
+By default, the benchmark starts the upstream stand-in (see standin.py) and the
+Webservices API itself in-process, each on a threaded local server, with the API
+pointed at the stand-in. It then drives every route registered in ``create_app``
+from concurrent client threads for a fixed duration, and reports the throughput
+and the p50/p95/p99 latencies per route. ::
+
+    python -m benchmarks.load --duration 20 --concurrency 32 --latency 80 --jitter 30
+
+Any API config key can be overridden, to compare configurations on the same load, e.g. ::
+
+    python -m benchmarks.load --config ASYNC_MODE=True --config UPSTREAM_MAX_WORKERS=64
+
+To benchmark an already running API instead, pass its url with ``--api-url``.
+"""
+
+import argparse
+import ast
+import itertools
+import logging
+import random
+import threading
+import time
+import requests
+
+from werkzeug.serving import make_server
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .standin import create_standin_app, NOT_FOUND_MOVIE_ID
+
+
+"""A scenario is a (method, path, json body) generator. The paths are relative to the API url."""
+Scenario = Callable[[random.Random], Tuple[str, str, Optional[object]]]
+
+# Movies deleted by the benchmark are taken from a reserved id range, so that
+# they never overlap with the movies the other scenarios fetch
+_deleted_movie_ids = itertools.count(5_000_000)
+
+
+def movie_id(rng: random.Random) -> int:
+    """A random movie id, of which about 1 in 50 does not exist upstream"""
+    if rng.random() < 0.02:
+        return NOT_FOUND_MOVIE_ID + rng.randint(0, 1000)
+    return rng.randint(1, 2000)
+
+
+def bulk_operations(ops: List[str], ids: List[int], rng: random.Random) -> dict:
+    """The body of a bulk PATCH request, with an operation randomly chosen from ops per movie id"""
+    return {"operations": [{"id": id, "op": rng.choice(ops)} for id in ids]}
+
+
+# The amount of operations per bulk PATCH request
+BULK_SIZE: int = 100
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "GET /":                           lambda rng: ("GET", "/", None),
+    "GET /movies/":                    lambda rng: ("GET", f"/movies/?amount={rng.choice([20, 100, 200])}", None),
+    "GET /movies/popular":             lambda rng: ("GET", f"/movies/popular?amount={rng.choice([20, 100, 200])}", None),
+    "GET /movies/<id>":                lambda rng: ("GET", f"/movies/{movie_id(rng)}", None),
+    "DELETE /movies/<id>":             lambda rng: ("DELETE", f"/movies/{next(_deleted_movie_ids)}", None),
+    "GET /movies/<id>/similar/":       lambda rng: ("GET", f"/movies/{movie_id(rng)}/similar/?amount=40&matching_genres=t&overlapping_actors=t&similar_runtime=t", None),
+    "GET /movies/average-score-plot":  lambda rng: ("GET", f"/movies/average-score-plot?format={rng.choice(['webp', 'png', 'svg'])}&movie_ids="
+                                                          + ",".join(str(movie_id(rng)) for _ in range(30)), None),
+    "GET /likes/":                     lambda rng: ("GET", "/likes/", None),
+    "GET /likes/<id>":                 lambda rng: ("GET", f"/likes/{movie_id(rng)}", None),
+    "PUT /likes/<id>":                 lambda rng: ("PUT", f"/likes/{movie_id(rng)}", None),
+    "DELETE /likes/<id>":              lambda rng: ("DELETE", f"/likes/{movie_id(rng)}", None),
+    "PATCH /likes/":                   lambda rng: ("PATCH", "/likes/", bulk_operations(["like", "unlike"], [movie_id(rng) for _ in range(BULK_SIZE)], rng)),
+    "PATCH /movies/":                  lambda rng: ("PATCH", "/movies/", bulk_operations(["delete"], [next(_deleted_movie_ids) for _ in range(BULK_SIZE)], rng)),
+    "GET /metrics":                    lambda rng: ("GET", "/metrics", None),
+}
+
+
+class ServerThread(threading.Thread):
+    """Serve a wsgi app on a threaded local server, in a background thread."""
+    def __init__(self, app, host: str="127.0.0.1", port: int=0):
+        super().__init__(daemon=True)
+        self.server = make_server(host, port, app, threaded=True)
+        self.url: str = f"http://{host}:{self.server.server_port}"
+
+    def run(self):
+        self.server.serve_forever()
+
+    def shutdown(self):
+        self.server.shutdown()
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """The nearest-rank percentile of an already sorted list of values"""
+    if len(sorted_values) == 0:
+        return float("nan")
+    index: int = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_load(api_url: str, scenarios: Dict[str, Scenario], duration: float, concurrency: int, seed: int) -> Dict[str, dict]:
+    """Drive the API with the scenarios from concurrent client threads, for a fixed duration.
+
+    Each client thread keeps its own keep-alive session and cycles through the scenarios.
+
+    :param api_url: The url of the API, including the '/api' prefix
+    :param scenarios: The scenarios to run, by name
+    :param duration: The duration of the run, in seconds
+    :param concurrency: The amount of concurrent client threads
+    :param seed: The seed of the random scenario parameters
+    :return: The measured latencies, in seconds, and the status codes per scenario name
+    """
+    results: Dict[str, dict] = {name: {"latencies": [], "statuses": {}} for name in scenarios}
+    results_lock = threading.Lock()
+    deadline: float = time.perf_counter() + duration
+
+    def client(client_index: int):
+        rng = random.Random(seed + client_index)
+        session = requests.Session()
+        names = list(scenarios.keys())
+        rng.shuffle(names)
+        for name in itertools.cycle(names):
+            if time.perf_counter() >= deadline:
+                break
+            method, path, body = scenarios[name](rng)
+            start: float = time.perf_counter()
+            try:
+                status = session.request(method, api_url + path, json=body, timeout=60).status_code
+            except requests.RequestException:
+                status = "failed"
+            latency: float = time.perf_counter() - start
+            with results_lock:
+                results[name]["latencies"].append(latency)
+                results[name]["statuses"][status] = results[name]["statuses"].get(status, 0) + 1
+
+    clients = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for client_thread in clients:
+        client_thread.start()
+    for client_thread in clients:
+        client_thread.join()
+    return results
+
+
+def report(results: Dict[str, dict], duration: float):
+    """Print the throughput and latency percentiles per scenario, and in total."""
+    header: str = f"{'route':<32} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  statuses"
+    print(header)
+    print("-" * len(header))
+
+    all_latencies: List[float] = []
+    for name, result in results.items():
+        latencies: List[float] = sorted(result["latencies"])
+        all_latencies.extend(latencies)
+        statuses: str = ",".join(f"{status}:{count}" for status, count in sorted(result["statuses"].items(), key=str))
+        print(f"{name:<32} {len(latencies):>9} {len(latencies) / duration:>9.1f} "
+              f"{percentile(latencies, 0.50) * 1000:>9.1f} {percentile(latencies, 0.95) * 1000:>9.1f} "
+              f"{percentile(latencies, 0.99) * 1000:>9.1f}  {statuses}")
+
+    all_latencies.sort()
+    print("-" * len(header))
+    print(f"{'total':<32} {len(all_latencies):>9} {len(all_latencies) / duration:>9.1f} "
+          f"{percentile(all_latencies, 0.50) * 1000:>9.1f} {percentile(all_latencies, 0.95) * 1000:>9.1f} "
+          f"{percentile(all_latencies, 0.99) * 1000:>9.1f}")
+
+
+def parse_config_overrides(overrides: List[str]) -> dict:
+    """Parse KEY=VALUE config overrides, where VALUE is a python literal or else a plain string"""
+    config: dict = {}
+    for override in overrides:
+        key, _, value = override.partition("=")
+        try:
+            config[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            config[key] = value
+    return config
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Load test every route of the Webservices API")
+    arg_parser.add_argument("--duration", type=float, default=10.0, help="The duration of the run, in seconds")
+    arg_parser.add_argument("--concurrency", type=int, default=16, help="The amount of concurrent clients")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--route", action="append", default=[], choices=list(SCENARIOS.keys()),
+                            help="Only run the given route(s), may be repeated")
+    arg_parser.add_argument("--api-url", default=None, help="The url of an already running API, including the '/api' prefix")
+    arg_parser.add_argument("--latency", type=float, default=50.0, help="The mean injected upstream latency, in milliseconds")
+    arg_parser.add_argument("--jitter", type=float, default=20.0, help="The max injected upstream latency deviation, in milliseconds")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="The fraction of upstream requests to fail")
+    arg_parser.add_argument("--quota", type=int, default=0, help="The max upstream requests per second, 0 for no quota")
+    arg_parser.add_argument("--config", action="append", default=[], metavar="KEY=VALUE",
+                            help="Override an API config key, may be repeated")
+    args = arg_parser.parse_args()
+
+    # Keep the per-request access logs of the local servers out of the report
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    scenarios = {name: SCENARIOS[name] for name in args.route} if args.route else SCENARIOS
+    servers: List[ServerThread] = []
+    api_url: str = args.api_url
+    app = None
+    if api_url is None:
+        from API import create_app, config as api_config
+
+        standin = ServerThread(create_standin_app(args.latency, args.jitter, args.error_rate, quota=args.quota))
+        standin.start()
+        servers.append(standin)
+
+        config: dict = {key: getattr(api_config, key) for key in dir(api_config) if key.isupper()}
+        config.update(TMDB_BASE_URL=f"{standin.url}/3", QUICKCHART_BASE_URL=standin.url)
+        config.update(parse_config_overrides(args.config))
+        app = create_app(config)
+        api = ServerThread(app)
+        api.start()
+        servers.append(api)
+        api_url = f"{api.url}/api"
+
+    print(f"Running {len(scenarios)} route(s) against {api_url} for {args.duration}s with {args.concurrency} clients")
+    results = run_load(api_url, scenarios, args.duration, args.concurrency, args.seed)
+    report(results, args.duration)
+
+    for server in reversed(servers):
+        server.shutdown()
+    if app is not None:
+        from API.AsyncRuntime import AsyncRuntime
+        from API.CacheWarmer import CacheWarmer
+        from API.ChartRenderer import ChartRenderer
+        CacheWarmer.shutdown(app)
+        AsyncRuntime.shutdown(app)
+        ChartRenderer.shutdown(app)
+
+
+if __name__ == "__main__":
+    main()
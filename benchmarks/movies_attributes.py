@@ -0,0 +1,160 @@
+"""
+A memory and throughput benchmark of the movie attribute stores, see API/MoviesAttributes.py.
+
+Every store tracks the same amount of movies, of which a fraction is liked and
+a fraction is deleted. The benchmark reports the memory per tracked movie and
+the throughput of the operations the API resources use. ::
+
+    python -m benchmarks.movies_attributes --movies 1000000 --liked 0.01 --deleted 0.01
+
+The "dict" store is the plain dict of MovieAttributes objects the API used
+before the stores kept packed flags, included for reference. The memory of
+the sqlite store is the size of its database file.
+"""
+
+import argparse
+import gc
+import itertools
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from typing import Callable, Dict, List
+
+from API.MovieAttributes import MovieAttributes
+from API.MoviesAttributes import MoviesAttributes, InMemoryMoviesAttributes, SQLiteMoviesAttributes
+
+
+class DictMoviesAttributes(InMemoryMoviesAttributes):
+    """The reference store: a plain dict of MovieAttributes objects, scanned in full to list the likes."""
+    def __init__(self):
+        self._attributes: dict[int, MovieAttributes] = {}
+
+    def __getitem__(self, key: int) -> MovieAttributes:
+        return self._attributes[key]
+
+    def __setitem__(self, key: int, value: MovieAttributes):
+        self._attributes[key] = value
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._attributes
+
+    def __iter__(self):
+        return iter(list(self._attributes))
+
+    def __len__(self) -> int:
+        return len(self._attributes)
+
+    def is_deleted(self, key: int) -> bool:
+        return key in self._attributes and self._attributes[key].deleted
+
+    def is_liked(self, key: int) -> bool:
+        return key in self._attributes and self._attributes[key].liked
+
+    def prune_deleted_keys(self, keys) -> List[int]:
+        return [key for key in keys if not self.is_deleted(key)]
+
+    def liked_keys(self) -> List[int]:
+        return [key for key in self.prune_deleted_keys(self._attributes.keys()) if self.is_liked(key)]
+
+    def set_liked(self, key: int, liked: bool):
+        if key in self._attributes:
+            self._attributes[key].liked = liked
+        else:
+            self._attributes[key] = MovieAttributes(liked=liked)
+
+    def set_deleted(self, key: int, deleted: bool):
+        if key in self._attributes:
+            self._attributes[key].deleted = deleted
+        else:
+            self._attributes[key] = MovieAttributes(deleted=deleted)
+
+    def update_many(self, items):
+        self._attributes.update(items)
+
+
+def populate(store: MoviesAttributes, movie_ids: List[int], liked_fraction: float, deleted_fraction: float, rng: random.Random):
+    """Track every movie id in the store, liking and deleting random fractions of them."""
+    batch_size: int = 10_000
+    for start in range(0, len(movie_ids), batch_size):
+        store.update_many({
+            movie_id: MovieAttributes(liked=rng.random() < liked_fraction, deleted=rng.random() < deleted_fraction)
+            for movie_id in movie_ids[start:start + batch_size]
+        })
+
+
+def measure(operation: Callable[[], object], min_duration: float=0.5) -> float:
+    """The throughput of an operation, in calls per second"""
+    calls: int = 0
+    start: float = time.perf_counter()
+    elapsed: float = 0.0
+    while elapsed < min_duration:
+        operation()
+        calls += 1
+        elapsed = time.perf_counter() - start
+    return calls / elapsed
+
+
+def run(name: str, create_store: Callable[[], MoviesAttributes], movies: int, liked: float, deleted: float, seed: int) -> Dict[str, float]:
+    rng = random.Random(seed)
+    movie_ids: List[int] = rng.sample(range(1, movies * 10), movies)
+
+    gc.collect()
+    tracemalloc.start()
+    store = create_store()
+    populate(store, movie_ids, liked, deleted, rng)
+    gc.collect()
+    memory: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    if isinstance(store, SQLiteMoviesAttributes):
+        # The database lives outside the python heap, count its size on disk instead
+        memory = sum(os.path.getsize(path) for path in (store.path, store.path + "-wal") if os.path.exists(path))
+
+    lookup_ids = itertools.cycle(rng.choices(movie_ids, k=1_000_000))
+    write_ids = itertools.cycle(rng.choices(movie_ids, k=1_000_000))
+    page: List[int] = rng.sample(movie_ids, 20)
+    # The likes are listed before the writes, which would like ever more movies
+    results: Dict[str, float] = {
+        "bytes/movie": memory / movies,
+        "liked_keys/s": measure(store.liked_keys, min_duration=2.0),
+        "is_liked/s": measure(lambda: store.is_liked(next(lookup_ids))),
+        "is_deleted/s": measure(lambda: store.is_deleted(next(lookup_ids))),
+        "prune 20/s": measure(lambda: store.prune_deleted_keys(page)),
+        "set_liked/s": measure(lambda: store.set_liked(next(write_ids), True)),
+    }
+    store.close()
+    print(f"{name:<8} " + " ".join(f"{value:>14,.1f}" for value in results.values()), flush=True)
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark the movie attribute stores")
+    arg_parser.add_argument("--movies", type=int, default=1_000_000, help="The amount of tracked movies")
+    arg_parser.add_argument("--liked", type=float, default=0.01, help="The fraction of liked movies")
+    arg_parser.add_argument("--deleted", type=float, default=0.01, help="The fraction of deleted movies")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--store", action="append", default=[], choices=["dict", "memory", "sqlite"],
+                            help="Only run the given store(s), may be repeated")
+    args = arg_parser.parse_args()
+
+    database_dir = tempfile.TemporaryDirectory()
+    stores: Dict[str, Callable[[], MoviesAttributes]] = {
+        "dict": DictMoviesAttributes,
+        "memory": InMemoryMoviesAttributes,
+        "sqlite": lambda: SQLiteMoviesAttributes(os.path.join(database_dir.name, "movies_attributes.sqlite3")),
+    }
+    if args.store:
+        stores = {name: stores[name] for name in args.store}
+
+    print(f"{args.movies:,} tracked movies, {args.liked:.1%} liked, {args.deleted:.1%} deleted")
+    print(f"{'store':<8} " + " ".join(f"{column:>14}" for column in
+                                     ["bytes/movie", "liked_keys/s", "is_liked/s", "is_deleted/s", "prune 20/s", "set_liked/s"]))
+    for name, create_store in stores.items():
+        run(name, create_store, args.movies, args.liked, args.deleted, args.seed)
+    database_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
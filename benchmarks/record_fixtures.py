@@ -0,0 +1,45 @@
+"""
+Record the fixtures served by the upstream stand-in (see standin.py) from the real TMDB API.
+
+Uses the TMDB API key of the Webservices API config. ::
+
+    python -m benchmarks.record_fixtures --movie-id 550
+"""
+
+import argparse
+import json
+import os
+import requests
+
+from .standin import FIXTURES_DIR
+
+
+def main():
+    from API import config as api_config
+
+    arg_parser = argparse.ArgumentParser(description="Record the upstream stand-in fixtures from TMDB")
+    arg_parser.add_argument("--movie-id", type=int, default=550, help="The movie to record the details and credits of")
+    arg_parser.add_argument("--fixtures-dir", default=FIXTURES_DIR)
+    args = arg_parser.parse_args()
+
+    base_url: str = api_config.TMDB_BASE_URL.rstrip("/")
+    params: dict = {"api_key": api_config.API_KEY_TMDB}
+    fixtures: dict = {
+        "movie.json": (f"/movie/{args.movie_id}", {}),
+        "movie_credits.json": (f"/movie/{args.movie_id}/credits", {}),
+        "movie_popular.json": ("/movie/popular", {"page": 1}),
+        "discover_movie.json": ("/discover/movie", {"page": 1, "language": "en-US"}),
+        "genre_movie_list.json": ("/genre/movie/list", {}),
+    }
+
+    with requests.Session() as session:
+        for name, (path, extra_params) in fixtures.items():
+            response = session.get(base_url + path, params={**params, **extra_params}, timeout=10)
+            response.raise_for_status()
+            with open(os.path.join(args.fixtures_dir, name), "w") as fixture:
+                json.dump(response.json(), fixture, indent=2)
+            print(f"Recorded {path} to {name}")
+
+
+if __name__ == "__main__":
+    main()
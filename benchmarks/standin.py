@@ -0,0 +1,183 @@
+"""
+A local stand-in for the TMDB v3 and quickchart APIs, for load tests of the Webservices API.
+
+The stand-in serves the recorded fixtures in the fixtures/ directory for every
+TMDB endpoint the Webservices API uses. Upstream latency, jitter, error rates and
+a request quota can be injected, to mimic a slow, failing or rate limiting upstream.
+
+Point the Webservices API at it through the ``TMDB_BASE_URL`` and
+``QUICKCHART_BASE_URL`` config keys, e.g. ::
+
+    python -m benchmarks.standin --port 5001 --latency 80 --jitter 30 --error-rate 0.01
+
+    TMDB_BASE_URL='http://127.0.0.1:5001/3'
+    QUICKCHART_BASE_URL='http://127.0.0.1:5001'
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+import threading
+import time
+
+from flask import Flask, Response, jsonify, request
+from typing import Callable
+
+
+FIXTURES_DIR: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+"""Movie ids at or above this value do not exist in the stand-in, and respond with a 404."""
+NOT_FOUND_MOVIE_ID: int = 10_000_000
+
+"""The movie ids of page *n* of a paginated fixture are offset by (n - 1) times this stride,
+so that every page holds unique movies."""
+PAGE_ID_STRIDE: int = 1_000
+
+
+class StandinFixtures:
+    """The recorded TMDB and quickchart responses served by the stand-in.
+
+    Only a single movie, a single page of each paginated endpoint and the genre list
+    are recorded. Responses for other movies and pages are derived from them, by
+    substituting the movie ids.
+    """
+    def __init__(self, fixtures_dir: str=FIXTURES_DIR):
+        def load(name: str) -> dict:
+            with open(os.path.join(fixtures_dir, name)) as fixture:
+                return json.load(fixture)
+
+        self.movie: dict = load("movie.json")
+        self.credits: dict = load("movie_credits.json")
+        self.popular_page: dict = load("movie_popular.json")
+        self.discover_page: dict = load("discover_movie.json")
+        self.genres: dict = load("genre_movie_list.json")
+        with open(os.path.join(fixtures_dir, "chart.webp"), "rb") as chart:
+            self.chart: bytes = chart.read()
+
+    def get_movie(self, movie_id: int) -> dict:
+        movie = copy.deepcopy(self.movie)
+        if movie_id != movie["id"]:
+            movie["id"] = movie_id
+            movie["title"] = movie["original_title"] = f"{movie['title']} #{movie_id}"
+        return movie
+
+    def get_credits(self, movie_id: int) -> dict:
+        credits = copy.deepcopy(self.credits)
+        credits["id"] = movie_id
+        return credits
+
+    @staticmethod
+    def get_page(fixture_page: dict, page: int) -> dict:
+        page_json = copy.deepcopy(fixture_page)
+        page_json["page"] = page
+        for result in page_json["results"]:
+            result["id"] += (page - 1) * PAGE_ID_STRIDE
+        return page_json
+
+
+def create_standin_app(latency_ms: float=0.0, jitter_ms: float=0.0, error_rate: float=0.0,
+                       error_status: int=503, quota: int=0, fixtures_dir: str=FIXTURES_DIR) -> Flask:
+    """The flask app factory of the upstream stand-in.
+
+    :param latency_ms: The mean latency to inject into every response, in milliseconds
+    :param jitter_ms: The max deviation from the mean latency, uniformly distributed, in milliseconds
+    :param error_rate: The fraction of requests, between 0 and 1, to fail with *error_status*
+    :param error_status: The status code of injected errors
+    :param quota: The max amount of requests per second, further requests of that second fail with a 429. 0 for no quota
+    :param fixtures_dir: The directory holding the recorded fixtures
+    :return: The stand-in app
+    """
+    app = Flask(__name__)
+    fixtures = StandinFixtures(fixtures_dir)
+    rng = random.Random()
+    quota_window: dict = {"second": 0, "requests": 0}
+    quota_lock = threading.Lock()
+
+    def tmdb_error(status_code: int, tmdb_status_code: int, message: str) -> Response:
+        response = jsonify(success=False, status_code=tmdb_status_code, status_message=message)
+        response.status_code = status_code
+        return response
+
+    @app.before_request
+    def enforce_quota():
+        if quota <= 0:
+            return None
+        now: float = time.time()
+        with quota_lock:
+            if int(now) != quota_window["second"]:
+                quota_window["second"], quota_window["requests"] = int(now), 0
+            quota_window["requests"] += 1
+            if quota_window["requests"] <= quota:
+                return None
+        response = tmdb_error(429, 25, "Your request count is over the allowed limit.")
+        response.headers["Retry-After"] = "1"
+        return response
+
+    @app.before_request
+    def inject_latency_and_errors():
+        delay_ms: float = latency_ms + rng.uniform(-jitter_ms, jitter_ms)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+        if error_rate > 0 and rng.random() < error_rate:
+            return tmdb_error(error_status, 11, "Internal error: Something went wrong, contact TMDb.")
+
+    def existing_movie(view: Callable) -> Callable:
+        def wrapper(movie_id: int):
+            if movie_id >= NOT_FOUND_MOVIE_ID:
+                return tmdb_error(404, 34, "The resource you requested could not be found.")
+            return view(movie_id)
+
+        wrapper.__name__ = view.__name__
+        return wrapper
+
+    @app.get("/3/movie/<int:movie_id>")
+    @existing_movie
+    def movie(movie_id: int):
+        movie_json = fixtures.get_movie(movie_id)
+        if "credits" in request.args.get("append_to_response", "").split(","):
+            movie_json["credits"] = fixtures.get_credits(movie_id)
+        return jsonify(movie_json)
+
+    @app.get("/3/movie/<int:movie_id>/credits")
+    @existing_movie
+    def credits(movie_id: int):
+        return jsonify(fixtures.get_credits(movie_id))
+
+    @app.get("/3/movie/popular")
+    def popular():
+        return jsonify(fixtures.get_page(fixtures.popular_page, request.args.get("page", 1, type=int)))
+
+    @app.get("/3/discover/movie")
+    def discover():
+        return jsonify(fixtures.get_page(fixtures.discover_page, request.args.get("page", 1, type=int)))
+
+    @app.get("/3/genre/movie/list")
+    def genres():
+        return jsonify(fixtures.genres)
+
+    @app.get("/chart")
+    def chart():
+        return Response(fixtures.chart, mimetype="image/webp")
+
+    return app
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Serve a local stand-in of the TMDB and quickchart APIs")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=5001)
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="The mean injected latency, in milliseconds")
+    arg_parser.add_argument("--jitter", type=float, default=0.0, help="The max injected latency deviation, in milliseconds")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="The fraction of requests to fail")
+    arg_parser.add_argument("--error-status", type=int, default=503, help="The status code of failed requests")
+    arg_parser.add_argument("--quota", type=int, default=0, help="The max requests per second, 0 for no quota")
+    args = arg_parser.parse_args()
+
+    app = create_standin_app(args.latency, args.jitter, args.error_rate, args.error_status, args.quota)
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()